@@ -0,0 +1,59 @@
+"""Memory used per TrackingEvent, before (a dict subclass holding every
+attribute) and after (__slots__ with an extras dict only when needed).
+
+Only the objects themselves are counted, the timestamp, location and detail
+values are the same either way.
+
+    $ python benchmarks/bench_event_memory.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from packagetrack.data import TrackingEvent
+
+EVENTS = 100000
+
+class DictTrackingEvent(dict):
+    """TrackingEvent as it was, a dict behind __getattr__/__setattr__"""
+
+    def __init__(self, timestamp, location, detail, **kwargs):
+        self.timestamp = timestamp
+        self.location = location
+        self.detail = detail
+        self.update(kwargs)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, val):
+        self[name] = val
+
+def event_size(event):
+    size = sys.getsizeof(event)
+    extras = getattr(event, '_extras', None)
+    if extras is not None:
+        size += sys.getsizeof(extras)
+    return size
+
+def bytes_per_event(cls, **extras):
+    timestamp = datetime(2012, 6, 1, 10, 15)
+    events = [cls(timestamp, 'NEWTON,IA', 'Delivered', **extras) \
+        for _ in xrange(EVENTS)]
+    return sum(event_size(e) for e in events) / float(len(events))
+
+def main():
+    for label, extras in [('no extras', {}), ('one extra', {'code': 'DL'})]:
+        for name, cls in [('dict', DictTrackingEvent),
+                ('slots', TrackingEvent)]:
+            print '%-10s %-6s %6.0f bytes/event' % (label, name,
+                bytes_per_event(cls, **extras))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Offline cost of the tracking steps that don't touch the network: parsing
+the UPS, USPS, DHL and Prestige responses of small, typical and huge event
+histories (built by packagetrack.testing), xml_to_dict() on its own, identifying
+tracking numbers and building requests. Items are the events parsed or the
+numbers identified per call.
+
+    $ python benchmarks/bench_parsing.py
+    $ python benchmarks/bench_parsing.py --quick
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from packagetrack.carriers import register_carrier, identify_tracking_number
+from packagetrack.carriers.dhl_interface import DHLInterface
+from packagetrack.carriers.prestige_interface import PrestigeInterface
+from packagetrack.carriers.ups_interface import UPSInterface
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.testing import carrier_response, SAMPLE_TRACKING_NUMBERS
+from packagetrack.xml_dict import xml_to_dict
+
+# events in a freshly shipped package, a delivered domestic one and one that
+# spent weeks in transit or in customs
+HISTORIES = (('small', 1), ('typical', 12), ('huge', 500))
+
+CONFIG = DictConfig({
+    'UPS': {
+        'license_number': 'ABCDEF0123456789',
+        'user_id': 'user',
+        'password': 'secret',
+    },
+    'USPS': {'userid': 'USER'},
+})
+CARRIERS = [register_carrier(iface, CONFIG) for iface in \
+    (UPSInterface, USPSInterface, DHLInterface, PrestigeInterface)]
+XML_CARRIERS = ('UPS', 'USPS', 'DHL')
+# tracking numbers of every registered carrier, identified round robin
+IDENTIFY_NUMBERS = sorted(SAMPLE_TRACKING_NUMBERS.values()) + \
+    ['9400110200881234567894', '1Z58R4770350889571']
+
+def bench(func, budget):
+    """Return the seconds per call of {func}, calling it for about {budget}
+    seconds
+    """
+    number = 1
+    while True:
+        seconds = timeit.timeit(func, number=number)
+        if seconds >= budget / 10.0:
+            break
+        number *= 10
+    number = max(int(number * budget / seconds), 1)
+    return min(timeit.repeat(func, number=number, repeat=3)) / number
+
+def parse_results(budget):
+    for carrier in CARRIERS:
+        name = str(carrier)
+        tracking_number = SAMPLE_TRACKING_NUMBERS[name]
+        for history, events in HISTORIES:
+            raw = carrier_response(name, [tracking_number], events)
+            info = carrier._parse_response(raw, tracking_number)
+            assert len(info.events) == events and info.is_delivered, \
+                '%s parsed the %s response wrong' % (name, history)
+            yield '%s parse %s' % (name, history), events, bench(
+                lambda: carrier._parse_response(raw, tracking_number), budget)
+            if name in XML_CARRIERS:
+                yield '%s xml_to_dict %s' % (name, history), events, bench(
+                    lambda: xml_to_dict(raw), budget)
+
+def identify_results(budget):
+    def identify_all():
+        for tracking_number in IDENTIFY_NUMBERS:
+            try:
+                identify_tracking_number(tracking_number)
+            except Exception:
+                pass
+    yield 'identify_tracking_number', len(IDENTIFY_NUMBERS), \
+        bench(identify_all, budget)
+
+def build_results(budget):
+    for carrier in CARRIERS:
+        name = str(carrier)
+        if name == 'Prestige':
+            # the request is just a query string
+            continue
+        if name == 'DHL':
+            build = carrier._format_request
+        else:
+            build = carrier._build_request
+        tracking_number = SAMPLE_TRACKING_NUMBERS[name]
+        yield '%s build request' % name, 1, bench(
+            lambda: build(tracking_number), budget)
+
+def main(argv):
+    budget = 0.05 if '--quick' in argv else 0.5
+    print '%-28s %7s %12s %12s' % ('', 'items', 'us/call', 'us/item')
+    for results in (parse_results, identify_results, build_results):
+        for name, events, seconds in results(budget):
+            print '%-28s %7d %12.1f %12.2f' % (name, events, seconds * 1e6,
+                seconds * 1e6 / events)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
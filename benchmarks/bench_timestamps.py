@@ -0,0 +1,75 @@
+"""Per-event cost of parsing each carrier's timestamps, before (strptime()
+for the date and the time) and after (packagetrack.carriers.timestamps).
+The timestamps are those of a huge simulated history, so the memoized
+parsers see as many distinct dates and times as they would in real
+responses.
+
+    $ python benchmarks/bench_timestamps.py
+"""
+
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from packagetrack.carriers.timestamps import parse_ymd_hms, \
+    parse_iso_date_time, parse_mdy, parse_month_day_year, parse_clock_time
+from packagetrack.testing import event_times
+
+EVENTS = 500
+REPEAT = 20
+
+TIMES = event_times(EVENTS)
+UPS = [(t.strftime('%Y%m%d'), t.strftime('%H%M%S')) for t in TIMES]
+DHL = [(t.strftime('%Y-%m-%d'), t.strftime('%H:%M:%S')) for t in TIMES]
+USPS = [('%s %d, %d' % (t.strftime('%B'), t.day, t.year),
+    t.strftime('%I:%M %p').lstrip('0').lower()) for t in TIMES]
+PRESTIGE = [(t.strftime('%m/%d/%Y'), t.strftime('%I:%M %p')) for t in TIMES]
+
+def strptime_ups(d, t):
+    return datetime.combine(datetime.strptime(d, '%Y%m%d').date(),
+        datetime.strptime(t, '%H%M%S').time())
+
+def strptime_dhl(d, t):
+    return datetime.strptime('{0}T{1}'.format(d, t), '%Y-%m-%dT%H:%M:%S')
+
+def strptime_usps(d, t):
+    return datetime.combine(datetime.strptime(d, '%B %d, %Y').date(),
+        datetime.strptime(t, '%I:%M %p').time())
+
+def strptime_prestige(d, t):
+    return datetime.combine(datetime.strptime(d, '%m/%d/%Y').date(),
+        datetime.strptime(t, '%I:%M %p').time())
+
+def fast_usps(d, t):
+    return datetime.combine(parse_month_day_year(d), parse_clock_time(t))
+
+def fast_prestige(d, t):
+    return datetime.combine(parse_mdy(d), parse_clock_time(t))
+
+BENCHMARKS = [
+    ('UPS', UPS, strptime_ups, parse_ymd_hms),
+    ('DHL', DHL, strptime_dhl, parse_iso_date_time),
+    ('USPS', USPS, strptime_usps, fast_usps),
+    ('Prestige', PRESTIGE, strptime_prestige, fast_prestige),
+]
+
+def per_event(parse, fields):
+    def run():
+        for d, t in fields:
+            parse(d, t)
+    return min(timeit.repeat(run, number=REPEAT, repeat=3)) / \
+        (REPEAT * len(fields))
+
+def main():
+    print '%-10s %14s %14s %8s' % ('', 'strptime', 'timestamps', 'speedup')
+    for name, fields, before, after in BENCHMARKS:
+        assert [before(*f) for f in fields] == [after(*f) for f in fields]
+        slow, fast = per_event(before, fields), per_event(after, fields)
+        print '%-10s %9.2f us/ev %9.2f us/ev %7.1fx' % (name, slow * 1e6,
+            fast * 1e6, slow / fast)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""End to end tracking throughput without the network: track() one number
+at a time and track_many() over a mix of carriers, against the carrier
+simulator in packagetrack.testing. Covers everything from building the
+request to the TrackingInfo, including the HTTP round trip over keep-alive
+connections to localhost. The simulator answers without delay unless given a
+--latency, and runs in its own process so that it doesn't compete with the
+tracking threads for the GIL, as a real carrier API wouldn't.
+
+track_many() is compared with tracking the same mix of numbers serially,
+one track() call after another, and with track_async() keeping --in-flight
+requests going at once on the shared async pool.
+
+    $ python benchmarks/bench_track.py
+    $ python benchmarks/bench_track.py --events 500 --packages 2000
+    $ python benchmarks/bench_track.py --latency 0.2 --workers 64
+    $ python benchmarks/bench_track.py --latency 0.2 --workers 300 \
+    >     --in-flight 300 --packages 4000
+"""
+
+import multiprocessing
+import optparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from packagetrack.batch import track_many
+from packagetrack.carriers import register_carrier, \
+    identify_tracking_number, set_async_pool_size
+from packagetrack.carriers.dhl_interface import DHLInterface
+from packagetrack.carriers.prestige_interface import PrestigeInterface
+from packagetrack.carriers.ups_interface import UPSInterface
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.data import TrackingInfo
+from packagetrack.testing import CarrierSimulator, CarrierProfile, \
+    SAMPLE_TRACKING_NUMBERS, simulator_config
+
+from bench_parsing import CONFIG
+
+def serve(profile, connection):
+    simulator = CarrierSimulator(profile)
+    connection.send(simulator.base_url)
+    simulator.serve_forever()
+
+def start_simulator(profile, in_process):
+    """Returns the simulator's base URL and a function to stop it"""
+    if in_process:
+        simulator = CarrierSimulator(profile)
+        simulator.start()
+        return simulator.base_url, simulator.stop
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(profile, child))
+    process.daemon = True
+    process.start()
+    return parent.recv(), process.terminate
+
+def bench_track(carriers, seconds):
+    for carrier in carriers:
+        tracking_number = SAMPLE_TRACKING_NUMBERS[str(carrier)]
+        calls = 0
+        start = time.time()
+        while time.time() - start < seconds:
+            carrier.track(tracking_number)
+            calls += 1
+        elapsed = time.time() - start
+        print '%-10s track()        %8.1f packages/s %8.2f ms/package' % (
+            carrier, calls / elapsed, elapsed / calls * 1e3)
+
+def bench_serial(numbers):
+    start = time.time()
+    for tracking_number in numbers:
+        identify_tracking_number(tracking_number).track(tracking_number)
+    rate = len(numbers) / (time.time() - start)
+    print 'serial track() %d packages %21.1f packages/s' % (len(numbers), rate)
+    return rate
+
+def bench_track_many(numbers, max_workers):
+    start = time.time()
+    results = list(track_many(numbers, max_workers=max_workers))
+    elapsed = time.time() - start
+    failed = sum(1 for _, result in results \
+        if not isinstance(result, TrackingInfo))
+    rate = len(results) / elapsed
+    print 'track_many(max_workers=%d) %d packages, %d failed %5.1f packages/s' \
+        % (max_workers, len(results), failed, rate)
+    return rate
+
+def bench_track_async(numbers, in_flight):
+    set_async_pool_size(in_flight)
+    start = time.time()
+    pending = [identify_tracking_number(tracking_number).track_async(
+        tracking_number) for tracking_number in numbers]
+    for result in pending:
+        result.get()
+    rate = len(numbers) / (time.time() - start)
+    print 'track_async() %d in flight, %d packages %10.1f packages/s' % (
+        in_flight, len(numbers), rate)
+    return rate
+
+def main(argv):
+    parser = optparse.OptionParser()
+    parser.add_option('--events', type='int', default=12,
+        help='events in each response [%default]')
+    parser.add_option('--packages', type='int', default=1000,
+        help='packages tracked with track_many() [%default]')
+    parser.add_option('--serial', type='int', default=200,
+        help='packages tracked one at a time to compare with [%default]')
+    parser.add_option('--workers', type='int', default=16,
+        help='track_many() max_workers [%default]')
+    parser.add_option('--in-flight', type='int', default=32,
+        help='track_async() pool size [%default]')
+    parser.add_option('--seconds', type='float', default=2.0,
+        help='seconds to run track() for, per carrier [%default]')
+    parser.add_option('--latency', type='float', default=0,
+        help='seconds the simulator takes to answer [%default]')
+    parser.add_option('--in-process', action='store_true',
+        help='run the simulator on threads of the benchmark process')
+    options, _ = parser.parse_args(argv)
+
+    base_url, stop = start_simulator(CarrierProfile(latency=options.latency,
+        events=options.events), options.in_process)
+    try:
+        config = simulator_config(base_url, CONFIG)
+        # keep a connection alive for every request in flight
+        for section in config.itervalues():
+            section['http_pool_size'] = max(options.workers,
+                options.in_flight)
+        carriers = [register_carrier(iface, config) for iface in \
+            (UPSInterface, USPSInterface, DHLInterface, PrestigeInterface)]
+        bench_track(carriers, options.seconds)
+        numbers = sorted(SAMPLE_TRACKING_NUMBERS.values()) * \
+            (options.packages // 4)
+        serial = bench_serial(numbers[:options.serial])
+        concurrent = bench_track_many(numbers, options.workers)
+        print '%52.1fx serial' % (concurrent / serial)
+        concurrent = bench_track_async(numbers, options.in_flight)
+        print '%52.1fx serial' % (concurrent / serial)
+    finally:
+        stop()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,56 @@
+"""Per-request cost of building a UPS tracking request, before (a minidom
+document per call via dict_to_xml) and after (cached AccessRequest and a
+pre-serialized TrackRequest template).
+
+    $ python benchmarks/bench_ups_request.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from packagetrack.carriers.ups_interface import UPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.xml_dict import dict_to_xml
+
+TRACKING_NUMBER = '1Z58R4770350889570'
+ITERATIONS = 20000
+
+ups = UPSInterface(DictConfig({'UPS': {
+    'license_number': 'ABCDEF0123456789',
+    'user_id': 'user',
+    'password': 'secret',
+}}))
+
+def minidom_build_request(tracking_number):
+    access = dict_to_xml({
+        'AccessRequest': {
+            'AccessLicenseNumber': ups._cfg_value('license_number'),
+            'UserId': ups._cfg_value('user_id'),
+            'Password': ups._cfg_value('password'),
+        }
+    }, {'xml:lang': ups._cfg_value('lang')})
+    track = dict_to_xml({
+        'TrackRequest': {
+            'Request': {
+                'TransactionReference': {
+                    'RequestAction': 'Track',
+                },
+                'RequestOption': '1',
+            },
+            'TrackingNumber': tracking_number,
+        }
+    })
+    return access + track
+
+def main():
+    for name, build in [('minidom', minidom_build_request),
+            ('template', ups._build_request)]:
+        seconds = timeit.timeit(lambda: build(TRACKING_NUMBER),
+            number=ITERATIONS)
+        print '%-10s %8.2f us/request' % (name, seconds / ITERATIONS * 1e6)
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,17 @@ Basic usage:
     >>> print package.url
     http://wwwapps.ups.com/WebTracking/processInputRequest?TypeOfInquiryNumber=T&InquiryNumber1=1Z9999999999999999
 
+Track many packages concurrently, results are yielded as they complete:
+
+    >>> from packagetrack import track_many
+    >>> for tracking_number, info in track_many(numbers, max_workers=16):
+    ...     print tracking_number, info
+
+Or without blocking, with Package.track_async() and track_many_async():
+
+    >>> result = package.track_async()
+    >>> info = result.get()
+
 Configuration:
 
 To enable package tracking (not just finding URLs or matching TNs to carriers),
@@ -67,7 +78,8 @@ __version__     = '0.4'
 
 from .configuration import ConfigError, DotFileConfig, NullConfig
 from .data import Package
-from .carriers import auto_register_carriers
+from .carriers import auto_register_carriers, identify_many
+from .batch import track_many, track_many_async
 
 try:
     config = DotFileConfig()
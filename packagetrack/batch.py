@@ -0,0 +1,176 @@
+"""Track many packages at once.
+
+Tracking numbers are matched to their carriers, grouped by carrier and then
+tracked on a bounded pool of worker threads, with results handed back as soon
+as they are available:
+
+    >>> from packagetrack import track_many
+    >>> for tracking_number, result in track_many(numbers, max_workers=16,
+    ...         per_carrier_concurrency={'UPS': 8, 'USPS': 4}):
+    ...     print tracking_number, result
+
+track_many_async() does the same without blocking the caller.
+
+Each result is either a TrackingInfo object or the TrackingFailure that was
+raised while identifying or tracking that number. Carriers that can track
+several numbers in one request (see BaseInterface.BATCH_SIZE) are sent chunks
+of numbers instead of one number per request.
+"""
+
+import sys
+import threading
+from collections import deque
+from Queue import Queue, Empty
+
+from .carriers import identify_tracking_number, get_async_pool
+from .carriers.errors import TrackingFailure
+
+DEFAULT_MAX_WORKERS = 8
+
+def track_many(tracking_numbers, max_workers=DEFAULT_MAX_WORKERS,
+        per_carrier_concurrency=None):
+    """Track every number in {tracking_numbers}, yielding
+    (tracking_number, TrackingInfo or TrackingFailure) tuples in the order
+    they complete.
+
+    At most {max_workers} requests are in flight at once. {per_carrier_concurrency}
+    further limits the requests in flight for a single carrier, it can be an
+    int applied to every carrier or a dict keyed by the carrier's SHORT_NAME,
+    carriers missing from the dict are only limited by {max_workers}. Limits
+    below 1 raise ValueError.
+    """
+
+    _check_concurrency(max_workers, per_carrier_concurrency)
+    pending = {}
+    order = []
+    for tracking_number in tracking_numbers:
+        try:
+            carrier = identify_tracking_number(tracking_number)
+        except TrackingFailure as err:
+            yield tracking_number, err
+            continue
+        if carrier not in pending:
+            pending[carrier] = deque()
+            order.append(carrier)
+        pending[carrier].append(tracking_number)
+    if not order:
+        return
+
+    limits = dict((carrier, _carrier_limit(carrier, per_carrier_concurrency,
+        max_workers)) for carrier in order)
+    in_flight = dict((carrier, 0) for carrier in order)
+    state = {'total': 0}
+    chunks = sum(-(-len(numbers) // carrier.BATCH_SIZE) \
+        for carrier, numbers in pending.iteritems())
+    tasks = Queue()
+    results = Queue()
+    workers = _start_workers(min(max_workers, chunks), tasks, results)
+
+    def dispatch(carrier):
+        numbers = pending[carrier]
+        while numbers and in_flight[carrier] < limits[carrier] and \
+                state['total'] < max_workers:
+            chunk = [numbers.popleft() for _ in \
+                range(min(carrier.BATCH_SIZE, len(numbers)))]
+            tasks.put((carrier, chunk))
+            in_flight[carrier] += 1
+            state['total'] += 1
+        if not numbers:
+            order.remove(carrier)
+
+    try:
+        for carrier in list(order):
+            dispatch(carrier)
+        while state['total']:
+            carrier, chunk_results, exc_info = results.get()
+            in_flight[carrier] -= 1
+            state['total'] -= 1
+            if exc_info is not None:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            # the freed slot goes to the same carrier if it has numbers
+            # left, the others only wait on it when max_workers is the limit
+            if carrier in order:
+                dispatch(carrier)
+            for other in list(order):
+                if state['total'] >= max_workers:
+                    break
+                dispatch(other)
+            for result in chunk_results:
+                yield result
+    finally:
+        # drop the queued work, the workers exit once their current chunk
+        # is done
+        try:
+            while True:
+                tasks.get_nowait()
+        except Empty:
+            pass
+        for _ in range(workers):
+            tasks.put(None)
+
+def track_many_async(tracking_numbers, callback=None,
+        max_workers=DEFAULT_MAX_WORKERS, per_carrier_concurrency=None):
+    """Like track_many(), but returns immediately with an AsyncResult whose
+    get() returns the list of (tracking_number, result) tuples. {callback} is
+    called with each tracking_number and result as soon as it's available.
+    """
+    tracking_numbers = list(tracking_numbers)
+
+    def run():
+        results = []
+        for tracking_number, result in track_many(tracking_numbers,
+                max_workers, per_carrier_concurrency):
+            if callback is not None:
+                callback(tracking_number, result)
+            results.append((tracking_number, result))
+        return results
+    return get_async_pool().apply_async(run)
+
+def _check_concurrency(max_workers, per_carrier_concurrency):
+    """Raise ValueError for limits that would never let a request through"""
+    if max_workers < 1:
+        raise ValueError('max_workers must be at least 1, not %r' %
+            max_workers)
+    if isinstance(per_carrier_concurrency, dict):
+        limits = per_carrier_concurrency.values()
+    elif per_carrier_concurrency is not None:
+        limits = [per_carrier_concurrency]
+    else:
+        limits = []
+    for limit in limits:
+        if limit < 1:
+            raise ValueError('per_carrier_concurrency must be at least 1, '
+                'not %r' % limit)
+
+def _start_workers(count, tasks, results):
+    """Start {count} daemon threads taking (carrier, chunk) tasks until they
+    get None. Lighter than a ThreadPool, which polls while shutting down.
+    """
+    def work():
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            results.put(_track(*task))
+    for _ in range(count):
+        thread = threading.Thread(target=work)
+        thread.daemon = True
+        thread.start()
+    return count
+
+def _carrier_limit(carrier, per_carrier_concurrency, max_workers):
+    if per_carrier_concurrency is None:
+        return max_workers
+    elif isinstance(per_carrier_concurrency, dict):
+        return per_carrier_concurrency.get(str(carrier), max_workers)
+    else:
+        return per_carrier_concurrency
+
+def _track(carrier, tracking_numbers):
+    """Runs in a worker thread. Unexpected exceptions are handed back to the
+    consumer instead of being lost inside the pool.
+    """
+    try:
+        return carrier, list(carrier.track_batch(tracking_numbers)), None
+    except Exception:
+        return carrier, None, sys.exc_info()
@@ -0,0 +1,174 @@
+"""Caches for tracking results, so repeatedly tracking the same package
+doesn't hit the carrier's API every time.
+
+Results are keyed by the carrier's SHORT_NAME and the tracking number, how
+long they stay fresh depends on whether the package has been delivered:
+
+    >>> from packagetrack.cache import MemoryCache
+    >>> carrier.cache = MemoryCache(in_transit_ttl=300, delivered_ttl=None)
+    >>> carrier.track(tracking_number)   # hits the API
+    >>> carrier.track(tracking_number)   # served from the cache
+    >>> carrier.cache.hits, carrier.cache.misses
+    (1, 1)
+
+A delivered_ttl of None keeps delivered packages until they're evicted.
+"""
+
+import cPickle as pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class TrackingCache(object):
+    """Basic cache interface, other caches should inherit from this and
+    implement _get(), _set() and clear()
+    """
+
+    def __init__(self, in_transit_ttl=300, delivered_ttl=None):
+        self.in_transit_ttl = in_transit_ttl
+        self.delivered_ttl = delivered_ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, carrier_name, tracking_number):
+        """Return the cached TrackingInfo for this tracking number, or None
+        if it isn't cached or has expired
+        """
+        info = self._get((carrier_name, tracking_number), time.time())
+        with self._stats_lock:
+            if info is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return info
+
+    def set(self, carrier_name, tracking_number, info):
+        """Cache a TrackingInfo, it expires after the TTL for its state
+        """
+        ttl = self.ttl_for(info)
+        if ttl is None:
+            expires = None
+        elif ttl <= 0:
+            return
+        else:
+            expires = time.time() + ttl
+        self._set((carrier_name, tracking_number), info, expires)
+
+    def ttl_for(self, info):
+        """Return how many seconds {info} should be cached for, None meaning
+        it never expires
+        """
+        if info.is_delivered:
+            return self.delivered_ttl
+        return self.in_transit_ttl
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def _get(self, key, now):
+        raise NotImplementedError()
+
+    def _set(self, key, info, expires):
+        raise NotImplementedError()
+
+class NullCache(TrackingCache):
+    """Placeholder cache that never stores anything, the default for carriers
+    """
+
+    def clear(self):
+        pass
+
+    def _get(self, key, now):
+        return None
+
+    def _set(self, key, info, expires):
+        pass
+
+class MemoryCache(TrackingCache):
+    """In-process cache holding up to {max_entries} results, evicting the
+    least recently used. Cached TrackingInfo objects are returned as-is, not
+    copied.
+    """
+
+    def __init__(self, max_entries=10000, **kwargs):
+        super(MemoryCache, self).__init__(**kwargs)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, key, now):
+        with self._lock:
+            try:
+                info, expires = self._entries.pop(key)
+            except KeyError:
+                return None
+            if expires is not None and expires <= now:
+                return None
+            # re-insert to mark it as the most recently used
+            self._entries[key] = (info, expires)
+            return info
+
+    def _set(self, key, info, expires):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (info, expires)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class SQLiteCache(TrackingCache):
+    """Cache stored in an SQLite database at {path}, so results survive
+    restarts and can be shared between processes
+    """
+
+    def __init__(self, path, **kwargs):
+        super(SQLiteCache, self).__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS tracking_cache ('
+                'carrier TEXT NOT NULL, '
+                'tracking_number TEXT NOT NULL, '
+                'expires REAL, '
+                'info BLOB NOT NULL, '
+                'PRIMARY KEY (carrier, tracking_number))')
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM tracking_cache').fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM tracking_cache')
+
+    def purge_expired(self):
+        """Delete every expired entry from the database
+        """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM tracking_cache WHERE expires <= ?',
+                (time.time(),))
+
+    def _get(self, key, now):
+        with self._lock:
+            row = self._conn.execute('SELECT expires, info FROM tracking_cache '
+                'WHERE carrier = ? AND tracking_number = ?', key).fetchone()
+        if row is None or (row[0] is not None and row[0] <= now):
+            return None
+        return pickle.loads(str(row[1]))
+
+    def _set(self, key, info, expires):
+        data = sqlite3.Binary(pickle.dumps(info, pickle.HIGHEST_PROTOCOL))
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO tracking_cache '
+                '(carrier, tracking_number, expires, info) VALUES (?, ?, ?, ?)',
+                key + (expires, data))
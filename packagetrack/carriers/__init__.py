@@ -1,50 +1,201 @@
+import hashlib
 import os
+import random
+import threading
+import time
+from datetime import datetime
 from functools import wraps
+from multiprocessing.pool import ThreadPool
 
+import requests
+from requests import ConnectionError
+from requests.adapters import HTTPAdapter
+from urllib2 import URLError
+
+from ..cache import NullCache
 from ..configuration import NullConfig, ConfigKeyError
-from .errors import TrackingFailure, UnsupportedTrackingNumber, InvalidTrackingNumber
+from .errors import TrackingFailure, UnsupportedTrackingNumber, \
+    InvalidTrackingNumber, TrackingNetworkFailure, AmbiguousTrackingNumber, \
+    TrackingApiFailure, TrackingThrottled
+from ..circuit import CircuitBreaker
+from ..hedging import Hedger
+from ..metrics import NullSink, Timer
+from ..ratelimit import RateLimiter, FileRateStore
+from .timezones import location_timezone, localize, pytz
 
 __carriers = {}
+__index = None
+__index_lock = threading.Lock()
+__async_pool = None
+__async_pool_lock = threading.Lock()
+
+# number of worker threads shared by the track_async() methods
+ASYNC_POOL_SIZE = 32
+# identify_many() validates numbers in chunks of this size
+IDENTIFY_CHUNK_SIZE = 10000
 
-def register_carrier(carrier_iface, config):
+def register_carrier(carrier_iface, config, cache=None, metrics=None):
     """Register a carrier class, making it available to new Packages
 
     The new carrier instance will replace an older one with the same string
-    representation
+    representation. If a {cache} is given, tracking results are cached in it,
+    see packagetrack.cache. If a {metrics} sink is given, the carrier reports
+    timings and failures to it, see packagetrack.metrics
     """
 
+    global __index
     carrier = carrier_iface(config)
-    __carriers[str(carrier)] = carrier
+    if cache is not None:
+        carrier.cache = cache
+    if metrics is not None:
+        carrier.metrics = metrics
+    with __index_lock:
+        __carriers[str(carrier)] = carrier
+        __index = None
     return carrier
 
-def identify_tracking_number(tracking_number):
+def get_carrier_index():
+    """Return the CarrierIndex of the registered carriers, rebuilt after a
+    carrier is registered
+    """
+    global __index
+    index = __index
+    if index is None:
+        with __index_lock:
+            if __index is None:
+                __index = CarrierIndex(__carriers.values())
+            index = __index
+    return index
+
+def identify_tracking_number(tracking_number, probe=False):
     """Return the carrier matching the givent tracking number, raises
     UnsupportedTrackingNumber if no match is found
+
+    22 digit numbers that could belong to more than one carrier (like FedEx
+    SmartPost numbers, which are USPS IMpb numbers) are identified offline by
+    the carriers' smart_post_claim() rules. If {probe} is true, numbers the
+    rules can't settle are tracked with each matching carrier until one
+    succeeds, see probe_tracking_number()
     """
 
+    if probe:
+        return probe_tracking_number(tracking_number)[0]
     try:
         return identify_smart_post_number(tracking_number)
     except (InvalidTrackingNumber, UnsupportedTrackingNumber):
-        for carrier in __carriers.values():
-            if carrier.identify(tracking_number):
-                return carrier
-        else:
-            raise UnsupportedTrackingNumber(tracking_number)
+        return _identify_first_match(tracking_number)
 
-def identify_smart_post_number(tracking_number):
-    if len(tracking_number) == 22:
-        for carrier in (carrier for carrier in __carriers.values() \
-                if carrier.identify(tracking_number)):
+def probe_tracking_number(tracking_number):
+    """Identify the carrier for {tracking_number} like
+    identify_tracking_number(), falling back to tracking ambiguous 22 digit
+    numbers with each matching carrier. Returns a (carrier, TrackingInfo)
+    tuple, the TrackingInfo is None unless probing was needed, in which case
+    it's the winning carrier's tracking result so it doesn't have to be
+    tracked again.
+    """
+
+    try:
+        return identify_smart_post_number(tracking_number), None
+    except UnsupportedTrackingNumber:
+        for carrier in get_carrier_index().matches(tracking_number):
             try:
-                carrier.track(tracking_number)
-            except TrackingFailure as err:
+                return carrier, carrier.track(tracking_number)
+            except TrackingFailure:
                 continue
-            else:
-                return carrier
-        else:
-            raise UnsupportedTrackingNumber(tracking_number)
-    else:
+        raise UnsupportedTrackingNumber(tracking_number)
+    except InvalidTrackingNumber:
+        return _identify_first_match(tracking_number), None
+
+def identify_smart_post_number(tracking_number):
+    """Identify a 22 digit number without touching the network, using the
+    smart_post_claim() rules of the carriers that identify() it. Raises
+    InvalidTrackingNumber for numbers of any other length and
+    UnsupportedTrackingNumber if the rules don't single out one carrier.
+    """
+
+    if len(tracking_number) != 22:
         raise InvalidTrackingNumber(tracking_number)
+    carrier = _settle_smart_post_claims(tracking_number,
+        get_carrier_index().matches(tracking_number))
+    if carrier is None:
+        raise UnsupportedTrackingNumber(tracking_number)
+    return carrier
+
+def identify_many(tracking_numbers):
+    """Identify every number in {tracking_numbers} without touching the
+    network, yielding (tracking_number, carrier or TrackingFailure) tuples in
+    order. Unlike identify_tracking_number(), a number that more than one
+    carrier identifies (and the SmartPost rules don't settle) isn't given to
+    the first match, it gets an AmbiguousTrackingNumber listing the carriers.
+
+    Numbers are checked in chunks, each carrier validating its candidates with
+    one identify_batch() call, which is vectorized for UPS and FedEx check
+    digits when NumPy is installed.
+    """
+
+    index = get_carrier_index()
+    for chunk in _chunks(tracking_numbers, IDENTIFY_CHUNK_SIZE):
+        for tracking_number, matches in zip(chunk, index.matches_many(chunk)):
+            yield tracking_number, _resolve_matches(tracking_number, matches)
+
+def _resolve_matches(tracking_number, matches):
+    if len(matches) == 1:
+        return matches[0]
+    elif not matches:
+        return UnsupportedTrackingNumber(tracking_number)
+    carrier = None
+    if len(tracking_number) == 22:
+        carrier = _settle_smart_post_claims(tracking_number, matches)
+    if carrier is None:
+        return AmbiguousTrackingNumber(tracking_number, matches)
+    return carrier
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _settle_smart_post_claims(tracking_number, carriers):
+    claims = [(carrier.smart_post_claim(tracking_number), carrier) \
+        for carrier in carriers]
+    best = max([claim for claim, carrier in claims] or [0])
+    winners = [carrier for claim, carrier in claims if claim == best]
+    if best > 0 and len(winners) == 1:
+        return winners[0]
+    return None
+
+def _identify_first_match(tracking_number):
+    matches = get_carrier_index().matches(tracking_number)
+    if not matches:
+        raise UnsupportedTrackingNumber(tracking_number)
+    return matches[0]
+
+def get_async_pool():
+    """Return the thread pool that runs track_async() calls, it is created on
+    first use with ASYNC_POOL_SIZE workers
+    """
+    global __async_pool
+    if __async_pool is None:
+        with __async_pool_lock:
+            if __async_pool is None:
+                __async_pool = ThreadPool(ASYNC_POOL_SIZE)
+    return __async_pool
+
+def set_async_pool_size(size):
+    """Replace the track_async() thread pool with one of {size} workers, calls
+    already queued on the old pool still complete
+    """
+    global __async_pool, ASYNC_POOL_SIZE
+    with __async_pool_lock:
+        ASYNC_POOL_SIZE = size
+        old_pool, __async_pool = __async_pool, ThreadPool(size)
+    if old_pool is not None:
+        old_pool.close()
 
 def auto_register_carriers(config):
     """Look through the python files in this submodule, registering any classes
@@ -63,18 +214,172 @@ def auto_register_carriers(config):
     # for carrier_iface in carrier_ifaces:
     #     register_carrier(carrier_iface, config)
 
+def _digest(data):
+    if isinstance(data, unicode):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:12]
+
+def _digest_events(info):
+    if not info.events:
+        return _digest('')
+    latest = info.events[-1]
+    return _digest(u'|'.join(unicode(v) for v in \
+        (latest.timestamp, latest.location, latest.detail)))
+
+def _fingerprint_time(timestamp):
+    """Format {timestamp} so that later times sort after earlier ones as
+    strings, aware timestamps are compared in UTC
+    """
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+    return timestamp.strftime('%Y%m%d%H%M%S%f')
+
+def _split_fingerprint(since):
+    """Return the (digest, formatted time) track_since() was given"""
+    if since is None:
+        return None, None
+    if isinstance(since, basestring):
+        digest, _, seen = since.partition('/')
+        return digest, seen or None
+    return None, _fingerprint_time(since)
+
+def _retry_after(response):
+    """Return the seconds of a response's Retry-After header, or None if it
+    doesn't have one in seconds
+    """
+    try:
+        return max(float(response.headers['Retry-After']), 0)
+    except (KeyError, ValueError):
+        return None
+
+class CarrierIndex(object):
+    """Precomputed lookup of which carriers could identify() a tracking number,
+    built from each carrier's identify_index_keys(), so classifying a number
+    only calls identify() on carriers that accept its length and prefix.
+    Carriers are ordered by name, making results independent of registration
+    order.
+    """
+
+    def __init__(self, carriers):
+        self._carriers = sorted(carriers, key=str)
+        self._keys = {}
+        for carrier in self._carriers:
+            for key in carrier.identify_index_keys():
+                self._keys.setdefault(key, []).append(carrier)
+        self._prefix_lengths = sorted(set(len(prefix) \
+            for length, prefix in self._keys if prefix is not None))
+        self._max_prefix_length = max(self._prefix_lengths or [0])
+        self._candidates = {}
+
+    def candidates(self, tracking_number):
+        """Return the carriers whose index keys match {tracking_number}
+        """
+        length = len(tracking_number)
+        memo_key = (length, tracking_number[:self._max_prefix_length])
+        try:
+            return self._candidates[memo_key]
+        except KeyError:
+            pass
+        prefixes = [None] + [tracking_number[:n] \
+            for n in self._prefix_lengths if n <= length]
+        found = set()
+        for prefix in prefixes:
+            found.update(self._keys.get((None, prefix), ()))
+            found.update(self._keys.get((length, prefix), ()))
+        candidates = [carrier for carrier in self._carriers if carrier in found]
+        self._candidates[memo_key] = candidates
+        return candidates
+
+    def matches(self, tracking_number):
+        """Return every carrier that identifies {tracking_number}
+        """
+        return [carrier for carrier in self.candidates(tracking_number) \
+            if carrier.identify(tracking_number)]
+
+    def matches_many(self, tracking_numbers):
+        """Return a list of matches() for each of {tracking_numbers}, asking
+        every carrier to identify its candidate numbers in one identify_batch()
+        """
+        tracking_numbers = list(tracking_numbers)
+        by_carrier = dict((carrier, []) for carrier in self._carriers)
+        for i, tracking_number in enumerate(tracking_numbers):
+            for carrier in self.candidates(tracking_number):
+                by_carrier[carrier].append(i)
+        matches = [[] for _ in tracking_numbers]
+        for carrier in self._carriers:
+            indexes = by_carrier[carrier]
+            if not indexes:
+                continue
+            valid = carrier.identify_batch([tracking_numbers[i] for i in indexes])
+            for i, is_valid in zip(indexes, valid):
+                if is_valid:
+                    matches[i].append(carrier)
+        return matches
+
 class BaseInterface(object):
     """The basic interface for carriers. All registered carriers should inherit
     from this class.
+
+    HTTP requests made through _http_request() share a pooled requests.Session
+    per carrier instance, tuned with these (optional) config values:
+
+        http_pool_size          connections kept alive per host (10)
+        http_max_retries        retries of failed connection attempts (0)
+        http_connect_timeout    seconds to wait for a connection (10)
+        http_read_timeout       seconds to wait for a response (30)
+        http_retries            retries of requests that failed with a
+                                network error or 5xx response (2)
+        http_retry_backoff      seconds the first retry waits at most,
+                                doubling for each one after it (0.5)
+        http_retry_max_backoff  most seconds any retry waits (10)
+
+    Retries wait a random time up to the backoff. Requests are rate limited
+    by rate_limiter, see packagetrack.ratelimit, and fail fast while
+    circuit_breaker is open, see packagetrack.circuit. Slow tracking requests
+    can be hedged, see packagetrack.hedging.
+
+    Values derived from the config are cached with _cfg_cached(), assign a new
+    provider to config or call reload_config() after changing it.
     """
     DEFAULT_CFG = NullConfig()
+    # how many tracking numbers the carrier's API accepts in a single request
+    BATCH_SIZE = 1
+    # zone of the times given for places whose zone can't be told, unless
+    # the default_timezone config value is set
+    DEFAULT_TIMEZONE = 'UTC'
 
     def __init__(self, config):
         self._config = config
+        self._identifiers = self._build_identifiers()
+        self.cache = NullCache()
+        self.metrics = NullSink()
+        self._cfg_cache = {}
+        self._cfg_cache_lock = threading.RLock()
 
     def __str__(self):
         return self.SHORT_NAME
 
+    @property
+    def config(self):
+        """The configuration provider for this carrier
+        """
+        return self._config
+
+    @config.setter
+    def config(self, config):
+        self._config = config
+        self.reload_config()
+
+    def reload_config(self):
+        """Drop everything cached from the config, so it's read again. The
+        old HTTP session's idle connections are closed, requests still using
+        it finish first.
+        """
+        with self._cfg_cache_lock:
+            old, self._cfg_cache = self._cfg_cache, {}
+        if 'http_session' in old:
+            old['http_session'].close()
+
     @staticmethod
     def require_valid_tracking_number(func):
         """Intended for wrapping subclasses' track() methods, ensures track()
@@ -83,23 +388,450 @@ class BaseInterface(object):
         @wraps(func)
         def wrapper(self, tracking_number, skip_check=False, *pargs, **kwargs):
             if not self.identify(tracking_number):
-                raise InvalidTrackingNumber(tracking_number)
+                err = InvalidTrackingNumber(tracking_number)
+                self._record_failure(err)
+                raise err
             else:
                 return func(self, tracking_number, *pargs, **kwargs)
         return wrapper
 
+    @staticmethod
+    def cache_tracking_info(func):
+        """Intended for wrapping subclasses' track() methods, returns the
+        carrier's cached TrackingInfo while it is fresh and caches new results.
+        Tracking that isn't cached is timed and its failures are counted, see
+        packagetrack.metrics.
+        """
+        @wraps(func)
+        def wrapper(self, tracking_number, *pargs, **kwargs):
+            info = self.cache.get(self.SHORT_NAME, tracking_number)
+            if info is None:
+                try:
+                    with self._timer('track'):
+                        info = func(self, tracking_number, *pargs, **kwargs)
+                except TrackingFailure as err:
+                    self._record_failure(err)
+                    raise
+                info.carrier = self.SHORT_NAME
+                self.cache.set(self.SHORT_NAME, tracking_number, info)
+            return info
+        return wrapper
+
     def identify(self, tracking_number):
-        raise NotImplementedError()
+        """Return whether {tracking_number} is one of this carrier's. The
+        default checks it with the validator _build_identifiers() returned for
+        its length.
+        """
+        if self._identifiers is None:
+            raise NotImplementedError()
+        validator = self._identifiers.get(len(tracking_number))
+        return validator is not None and bool(validator(tracking_number))
+
+    def identify_batch(self, tracking_numbers):
+        """Return a list of whether each of {tracking_numbers} is one of this
+        carrier's, carriers with vectorized check digit validation override it.
+        """
+        return map(self.identify, tracking_numbers)
+
+    def identify_index_keys(self):
+        """Return the (length, prefix) pairs of which a tracking number has to
+        match at least one for identify() to accept it, None matching any
+        length or prefix. Used to build the CarrierIndex, the default of
+        (None, None) has every number checked unless the carrier identifies
+        numbers by length with _build_identifiers().
+        """
+        if self._identifiers is None:
+            return [(None, None)]
+        return [(length, None) for length in self._identifiers]
+
+    def smart_post_claim(self, tracking_number):
+        """Return how strongly this carrier claims a 22 digit {tracking_number}
+        that more than one carrier identifies, 0 for not at all. The highest
+        claim wins when identifying the number offline.
+        """
+        return 0
 
     def track(self, tracking_number):
         raise NotImplementedError()
 
+    def track_async(self, tracking_number, callback=None):
+        """Track {tracking_number} without blocking the caller. Returns an
+        AsyncResult, whose get() returns the TrackingInfo or raises the
+        TrackingFailure. {callback} is called with the TrackingInfo from a
+        worker thread if tracking succeeds.
+        """
+        return get_async_pool().apply_async(self.track, (tracking_number,),
+            callback=callback)
+
+    def track_batch(self, tracking_numbers):
+        """Track each of {tracking_numbers}, yielding (tracking_number,
+        TrackingInfo or TrackingFailure) tuples. Carriers whose API can track
+        several numbers per request override this along with BATCH_SIZE.
+        """
+        for tracking_number in tracking_numbers:
+            try:
+                yield tracking_number, self.track(tracking_number)
+            except TrackingFailure as err:
+                yield tracking_number, err
+            except (ConnectionError, URLError) as err:
+                yield tracking_number, TrackingNetworkFailure(err)
+
+    def track_since(self, tracking_number, since=None):
+        """Track {tracking_number} for only what changed since an earlier
+        poll, returns a (events, fingerprint) tuple of the TrackingEvents newer
+        than {since} and a short string to pass as {since} next time.
+
+        {since} is the fingerprint from the previous call, or the timestamp of
+        the latest event already seen, or None for every event. Given a
+        fingerprint, carriers that can find the latest activity in their raw
+        response skip parsing it when that activity hasn't changed. The
+        parsed TrackingInfo is cached like track()'s.
+        """
+        if not self.identify(tracking_number):
+            raise InvalidTrackingNumber(tracking_number)
+        digest, seen = _split_fingerprint(since)
+        info, new_digest = self._track_if_changed(tracking_number, digest)
+        if info is None:
+            return [], since
+        events = info.events
+        if seen is not None:
+            events = [e for e in events if _fingerprint_time(e.timestamp) > seen]
+        if info.events:
+            seen = _fingerprint_time(info.last_update)
+        return events, '%s/%s' % (new_digest, seen or '')
+
     def is_delivered(self, tracking_number, tracking_info=None):
         raise NotImplementedError()
 
+    def _send_request(self, tracking_number):
+        """Request the tracking info for {tracking_number} from the carrier's
+        API, returns the raw response for _parse_response()
+        """
+        raise NotImplementedError()
+
+    def _parse_response(self, raw, tracking_number):
+        """Turn a raw response from _send_request() into a TrackingInfo
+        """
+        raise NotImplementedError()
+
+    def _latest_activity(self, raw):
+        """Return the part of a raw response describing the latest activity,
+        which track_since() compares between polls without parsing, or None
+        if it can't be found cheaply
+        """
+        return None
+
+    def _track_if_changed(self, tracking_number, digest):
+        """Returns (TrackingInfo, digest of the latest activity), or (None,
+        {digest}) if the latest activity still matches {digest}
+        """
+        try:
+            raw = self._send_request(tracking_number)
+        except NotImplementedError:
+            info = self.track(tracking_number)
+            return info, _digest_events(info)
+        activity = self._latest_activity(raw)
+        if activity is not None:
+            new_digest = _digest(activity)
+            if new_digest == digest:
+                return None, digest
+        info = self._parse_response(raw, tracking_number)
+        info.carrier = self.SHORT_NAME
+        self.cache.set(self.SHORT_NAME, tracking_number, info)
+        if activity is None:
+            return info, _digest_events(info)
+        return info, new_digest
+
+    def _track_in_batches(self, tracking_numbers, track_chunk):
+        """Helper for track_batch() implementations, splits the valid numbers
+        in {tracking_numbers} into chunks of at most BATCH_SIZE and passes each
+        to {track_chunk}, which should return (tracking_number, result) tuples.
+        A failure of a whole chunk is reported for every number in it, fresh
+        results in the carrier's cache are used instead of requesting them.
+        """
+        chunk = []
+        for tracking_number in tracking_numbers:
+            if not self.identify(tracking_number):
+                err = InvalidTrackingNumber(tracking_number)
+                self._record_failure(err)
+                yield tracking_number, err
+                continue
+            info = self.cache.get(self.SHORT_NAME, tracking_number)
+            if info is not None:
+                yield tracking_number, info
+                continue
+            chunk.append(tracking_number)
+            if len(chunk) == self.BATCH_SIZE:
+                for result in self._track_chunk_safely(chunk, track_chunk):
+                    yield result
+                chunk = []
+        if chunk:
+            for result in self._track_chunk_safely(chunk, track_chunk):
+                yield result
+
+    def _track_chunk_safely(self, chunk, track_chunk):
+        try:
+            results = list(track_chunk(chunk))
+        except TrackingFailure as err:
+            results = [(tracking_number, err) for tracking_number in chunk]
+        except (ConnectionError, URLError) as err:
+            err = TrackingNetworkFailure(err)
+            results = [(tracking_number, err) for tracking_number in chunk]
+        for tracking_number, result in results:
+            if isinstance(result, TrackingFailure):
+                self._record_failure(result)
+            else:
+                result.carrier = self.SHORT_NAME
+                self.cache.set(self.SHORT_NAME, tracking_number, result)
+        return results
+
     def url(self, tracking_number):
         return self._url_template.format(tracking_number=tracking_number)
 
+    def _identify_batch_by_length(self, tracking_numbers, batch_identifiers):
+        """Helper for identify_batch() implementations, groups {tracking_numbers}
+        by length and checks each group with the function for that length in
+        {batch_identifiers}, which takes and returns a list. Numbers of other
+        lengths aren't identified.
+        """
+        results = [False] * len(tracking_numbers)
+        by_length = {}
+        for i, tracking_number in enumerate(tracking_numbers):
+            by_length.setdefault(len(tracking_number), []).append(i)
+        for length, indexes in by_length.items():
+            if length not in batch_identifiers:
+                continue
+            valid = batch_identifiers[length](
+                [tracking_numbers[i] for i in indexes])
+            for i, is_valid in zip(indexes, valid):
+                results[i] = bool(is_valid)
+        return results
+
+    def _build_identifiers(self):
+        """Return a dict of tracking number length to a function validating
+        numbers of that length, or None if the carrier implements identify()
+        itself. Built once per carrier instance.
+        """
+        return None
+
+    @property
+    def rate_limiter(self):
+        """The RateLimiter this carrier's requests go through, made from the
+        config. Reloading the config makes a new one, whose counters start
+        from zero unless they're kept in a rate_limit_file.
+        """
+        return self._cfg_cached('rate_limiter', self._build_rate_limiter)
+
+    def _build_rate_limiter(self):
+        rate = self._cfg_value_default(None, 'rate_limit')
+        burst = self._cfg_value_default(None, 'rate_burst')
+        quota = self._cfg_value_default(None, 'daily_quota')
+        path = self._cfg_value_default(None, 'rate_limit_file')
+        return RateLimiter(
+            rate=None if rate is None else float(rate),
+            burst=None if burst is None else float(burst),
+            daily_quota=None if quota is None else int(quota),
+            store=None if path is None else FileRateStore(path))
+
+    @property
+    def circuit_breaker(self):
+        """The CircuitBreaker this carrier's requests go through, made from
+        the config
+        """
+        return self._cfg_cached('circuit_breaker', self._build_circuit_breaker)
+
+    def _build_circuit_breaker(self):
+        return CircuitBreaker(
+            error_rate=float(self._cfg_value_default(0.5, 'circuit_error_rate')),
+            min_requests=int(self._cfg_value_default(10, 'circuit_min_requests')),
+            window=float(self._cfg_value_default(60, 'circuit_window')),
+            cooldown=float(self._cfg_value_default(30, 'circuit_cooldown')))
+
+    @property
+    def hedger(self):
+        """The Hedger for this carrier's tracking requests, made from the
+        config, or None if hedging isn't enabled
+        """
+        return self._cfg_cached('hedger', self._build_hedger)
+
+    def _build_hedger(self):
+        percentile = self._cfg_value_default(None, 'hedge_percentile')
+        if percentile is None:
+            return None
+        return Hedger(percentile=float(percentile),
+            budget=float(self._cfg_value_default(0.05, 'hedge_budget')),
+            min_samples=int(self._cfg_value_default(20, 'hedge_min_samples')),
+            min_delay=float(self._cfg_value_default(0.05, 'hedge_min_delay')))
+
+    def _timer(self, name):
+        """Context manager reporting how long its block took to the metrics
+        sink as {name}
+        """
+        return Timer(self.metrics, self.SHORT_NAME, name)
+
+    def _record_failure(self, err):
+        self.metrics.increment(self.SHORT_NAME,
+            'failures.' + type(err).__name__)
+
+    def _get_session(self):
+        """Return this carrier's requests.Session, creating it on first use.
+        The session's connection pool is thread-safe, so it is shared by every
+        thread tracking with this carrier.
+        """
+        return self._cfg_cached('http_session', self._build_session)
+
+    def _build_session(self):
+        pool_size = int(self._cfg_value_default(10, 'http_pool_size'))
+        adapter = HTTPAdapter(pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=int(self._cfg_value_default(0, 'http_max_retries')))
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _build_http_timeout(self):
+        return (float(self._cfg_value_default(10, 'http_connect_timeout')),
+            float(self._cfg_value_default(30, 'http_read_timeout')))
+
+    def _build_http_retry(self):
+        return (int(self._cfg_value_default(2, 'http_retries')),
+            float(self._cfg_value_default(0.5, 'http_retry_backoff')),
+            float(self._cfg_value_default(10, 'http_retry_max_backoff')))
+
+    def _api_endpoint(self, default):
+        """Return the URL to send tracking requests to, the api_url config
+        value if it's set (e.g. to use packagetrack.testing's simulator),
+        otherwise {default}
+        """
+        return self._cfg_cached('api_url',
+            lambda: self._cfg_value_default(None, 'api_url')) or default
+
+    def _localize(self, timestamp, city=None, state=None, country=None):
+        """Make {timestamp}, the naive local time of an event at the given
+        place, timezone-aware in the place's zone. It stays naive if the zone
+        can't be told, for _consistent_timezones() to settle. Timestamps that
+        are already aware, and all of them without pytz, are returned as
+        they are.
+        """
+        if timestamp.tzinfo is not None or pytz is None:
+            return timestamp
+        zone = location_timezone(city, state, country)
+        if zone is None:
+            return timestamp
+        return localize(timestamp, zone)
+
+    def _guess_timezone(self, timestamp):
+        """Make a naive {timestamp} datetime aware in the default_timezone
+        config value, or else the carrier's DEFAULT_TIMEZONE. Dates, None,
+        aware timestamps and everything without pytz are returned as they
+        are.
+        """
+        if not isinstance(timestamp, datetime) or \
+                timestamp.tzinfo is not None or pytz is None:
+            return timestamp
+        return localize(timestamp, self._cfg_cached('default_timezone',
+            self._build_default_timezone))
+
+    def _build_default_timezone(self):
+        return pytz.timezone(self._cfg_value_default(self.DEFAULT_TIMEZONE,
+            'default_timezone'))
+
+    def _consistent_timezones(self, events):
+        """Return {events} as a list with every timestamp timezone-aware,
+        so the package's events can be ordered, and compared with the next
+        poll's by track_since(). Events at places whose zone couldn't be told
+        are put in the default zone by _guess_timezone() and marked
+        timezone_guessed. The guess depends on nothing but the event, so an
+        event keeps the same time from one poll to the next.
+        """
+        events = list(events)
+        if pytz is None:
+            return events
+        for event in events:
+            if event.timestamp.tzinfo is None:
+                event.timestamp = self._guess_timezone(event.timestamp)
+                event.timezone_guessed = True
+        return events
+
+    def _http_request(self, method, url, hedge=False, **kwargs):
+        """Make an HTTP request with this carrier's session, returning the
+        requests.Response. Network errors, 5xx and 429 (throttled) responses
+        are retried, then raised as TrackingNetworkFailure, TrackingApiFailure
+        and TrackingThrottled respectively.
+        Raises CarrierUnavailable while the circuit breaker is open and
+        TrackingQuotaExceeded if the daily quota is used up. Set {hedge} for
+        read-only requests that may be sent twice when hedging is enabled.
+        """
+        kwargs.setdefault('timeout',
+            self._cfg_cached('http_timeout', self._build_http_timeout))
+        hedger = self.hedger if hedge else None
+        session = self._get_session()
+
+        def send():
+            self.rate_limiter.acquire()
+            return session.request(method, url, **kwargs)
+
+        with self._timer('send'):
+            response = self._send_with_retries(send, hedger,
+                self._check_response)
+        self.metrics.histogram(self.SHORT_NAME, 'response_size',
+            len(response.content))
+        return response
+
+    def _check_response(self, response):
+        """Return the (error, retry_after) of a 5xx or 429 HTTP response for
+        _send_with_retries(), or (None, None) for any other response
+        """
+        if response.status_code < 500 and response.status_code != 429:
+            return None, None
+        error = TrackingThrottled if response.status_code == 429 else \
+            TrackingApiFailure
+        return error('%s returned HTTP %d' % (self.SHORT_NAME,
+            response.status_code)), _retry_after(response)
+
+    def _send_with_retries(self, send, hedger=None, check=None):
+        """Call {send}(), with {hedger} if given, through the circuit breaker
+        and return its result, retrying failures with jittered backoff.
+        Failures are requests' exceptions, the TrackingNetworkFailure or
+        TrackingApiFailure {send} raises and results that {check}(result)
+        returns an (error, retry_after seconds or None) pair for. Any other
+        exception is raised straight away. A TrackingThrottled failure means
+        the carrier is up but busy, so it doesn't count against the breaker.
+        """
+        retries, backoff, max_backoff = \
+            self._cfg_cached('http_retry', self._build_http_retry)
+        breaker = self.circuit_breaker
+        attempt = 0
+        while True:
+            breaker.before_request(self.SHORT_NAME)
+            retry_after = None
+            try:
+                result = send() if hedger is None else hedger.call(send)
+            except requests.exceptions.RequestException as err:
+                error = TrackingNetworkFailure(err)
+            except (TrackingNetworkFailure, TrackingApiFailure) as err:
+                error = err
+            else:
+                if check is not None:
+                    error, retry_after = check(result)
+                if check is None or error is None:
+                    breaker.record_success()
+                    return result
+            if not isinstance(error, TrackingThrottled):
+                breaker.record_failure()
+            if attempt >= retries or breaker.is_open:
+                raise error
+            delay = random.uniform(0, min(backoff * 2 ** attempt, max_backoff))
+            if retry_after is not None:
+                # the server knows best when to come back, within reason
+                delay = max(delay, min(retry_after, max_backoff))
+            self._retry_sleep(delay)
+            attempt += 1
+
+    def _retry_sleep(self, seconds):
+        time.sleep(seconds)
+
     def _cfg_value(self, *keys):
         """Return the config value from this carrier, looked up with {keys}.
         If the value is not found, the DEFAULT_CFG is fallen back to, then
@@ -113,3 +845,26 @@ class BaseInterface(object):
             except ConfigKeyError:
                 raise err
         return value
+
+    def _cfg_value_default(self, default, *keys):
+        """Like _cfg_value(), but returns {default} instead of raising
+        ConfigKeyError when the value isn't configured.
+        """
+        try:
+            value = self._cfg_value(*keys)
+        except ConfigKeyError:
+            value = None
+        return default if value is None else value
+
+    def _cfg_cached(self, name, build):
+        """Return the value cached as {name}, calling {build}() to make it the
+        first time and again after the config is reloaded. For values that are
+        derived from the config but costly to make on every request.
+        """
+        try:
+            return self._cfg_cache[name]
+        except KeyError:
+            with self._cfg_cache_lock:
+                if name not in self._cfg_cache:
+                    self._cfg_cache[name] = build()
+                return self._cfg_cache[name]
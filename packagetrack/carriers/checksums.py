@@ -0,0 +1,140 @@
+"""Check digit algorithms for tracking numbers.
+
+Every validator has a scalar form taking one tracking number and a batch
+form (suffixed _many) taking a list of numbers and returning a list of bools.
+When NumPy is installed, batches of same-length numbers are checked in a
+vectorized path, otherwise (or for small batches) the scalar form is used.
+Numbers containing characters a validator doesn't expect are simply invalid.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# batches smaller than this aren't worth converting to arrays
+VECTORIZE_THRESHOLD = 64
+
+def validate_mod10(tracking_number):
+    """Validate the UCC/EAN mod 10 check digit used by USPS IMpb (and so FedEx
+    SmartPost) numbers: digits are weighted 3, 1, 3... from the right, not
+    counting the check digit, which is the last digit.
+    """
+    if not tracking_number.isdigit():
+        return False
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) \
+        for i, d in enumerate(reversed(tracking_number[:-1])))
+    return (10 - total % 10) % 10 == int(tracking_number[-1])
+
+def validate_ups(tracking_code):
+    """Validate a UPS tracking code, the part of a 1Z number after the 1Z.
+    Letters count as (ord - 63) % 10, odd positions are doubled.
+    """
+    if len(tracking_code) < 2 or not tracking_code[-1].isdigit():
+        return False
+    digits = [int(d) if d.isdigit() else ((ord(d) - 63) % 10) \
+        for d in tracking_code[:-1].upper()]
+    total = (sum(digits[1::2]) * 2) + sum(digits[::2])
+    return (10 - total % 10) % 10 == int(tracking_code[-1])
+
+def validate_ground96(tracking_number):
+    """Validate a FedEx Ground "96" number: the 14 digits before the check
+    digit are weighted 3, 1, 3... from the right.
+    """
+    return _validate_fedex_weighted(tracking_number, 14)
+
+def validate_ssc18(tracking_number):
+    """Validate a FedEx SSC18 number: the 18 digits before the check digit
+    are weighted 3, 1, 3... from the right.
+    """
+    return _validate_fedex_weighted(tracking_number, 18)
+
+def validate_express(tracking_number):
+    """Validate a FedEx Express number: the first 10 digits are weighted
+    1, 3, 7... from the right, the sum mod 11 (10 counting as 0) is the last
+    digit.
+    """
+    basenum = tracking_number[0:10]
+    if not basenum.isdigit() or not tracking_number[-1:].isdigit():
+        return False
+    total = sum(int(d) * _EXPRESS_WEIGHTS[i % 3] \
+        for i, d in enumerate(reversed(basenum)))
+    return total % 11 % 10 == int(tracking_number[-1])
+
+_EXPRESS_WEIGHTS = (1, 3, 7)
+
+def _validate_fedex_weighted(tracking_number, count):
+    tail = tracking_number[-(count + 1):]
+    if len(tail) != count + 1 or not tail.isdigit():
+        return False
+    rev = tail[::-1]
+    total = sum(int(rev[i]) * (3 if i % 2 else 1) for i in range(1, count + 1))
+    # a computed check of 10 can never match
+    return 10 - (total % 10) == int(tail[-1])
+
+def validate_mod10_many(tracking_numbers):
+    matrix = _char_matrix(tracking_numbers)
+    if matrix is None:
+        return map(validate_mod10, tracking_numbers)
+    digits, is_digit = _digits(matrix)
+    weights = numpy.resize([3, 1], digits.shape[1] - 1)[::-1]
+    total = digits[:, :-1].dot(weights)
+    return (is_digit.all(axis=1) & \
+        ((10 - total % 10) % 10 == digits[:, -1])).tolist()
+
+def validate_ups_many(tracking_codes):
+    matrix = _char_matrix(tracking_codes)
+    if matrix is None or matrix.shape[1] < 2:
+        return map(validate_ups, tracking_codes)
+    digits, is_digit = _digits(matrix)
+    upper = numpy.where((matrix >= 97) & (matrix <= 122), matrix - 32, matrix)
+    values = numpy.where(is_digit, digits, (upper.astype(numpy.int64) - 63) % 10)
+    weights = numpy.resize([1, 2], values.shape[1] - 1)
+    total = values[:, :-1].dot(weights)
+    return (is_digit[:, -1] & \
+        ((10 - total % 10) % 10 == digits[:, -1])).tolist()
+
+def validate_ground96_many(tracking_numbers):
+    return _validate_fedex_weighted_many(tracking_numbers, 14, validate_ground96)
+
+def validate_ssc18_many(tracking_numbers):
+    return _validate_fedex_weighted_many(tracking_numbers, 18, validate_ssc18)
+
+def validate_express_many(tracking_numbers):
+    matrix = _char_matrix(tracking_numbers)
+    if matrix is None or matrix.shape[1] < 10:
+        return map(validate_express, tracking_numbers)
+    digits, is_digit = _digits(matrix)
+    weights = numpy.resize(_EXPRESS_WEIGHTS, 10)[::-1]
+    total = digits[:, :10].dot(weights)
+    valid = is_digit[:, :10].all(axis=1) & is_digit[:, -1]
+    return (valid & (total % 11 % 10 == digits[:, -1])).tolist()
+
+def _validate_fedex_weighted_many(tracking_numbers, count, validate):
+    matrix = _char_matrix(tracking_numbers)
+    if matrix is None or matrix.shape[1] < count + 1:
+        return map(validate, tracking_numbers)
+    digits, is_digit = _digits(matrix[:, -(count + 1):])
+    weights = numpy.resize([1, 3], count)
+    total = digits[:, :-1].dot(weights)
+    return (is_digit.all(axis=1) & \
+        (10 - (total % 10) == digits[:, -1])).tolist()
+
+def _char_matrix(tracking_numbers):
+    """Return the numbers as a 2D array of character codes, or None if the
+    batch should be validated one number at a time instead
+    """
+    if numpy is None or len(tracking_numbers) < VECTORIZE_THRESHOLD:
+        return None
+    length = len(tracking_numbers[0])
+    if not length or any(len(tn) != length for tn in tracking_numbers):
+        return None
+    try:
+        data = ''.join(tracking_numbers).encode('ascii')
+    except (UnicodeError, TypeError):
+        return None
+    return numpy.frombuffer(data, dtype=numpy.uint8).reshape(-1, length)
+
+def _digits(matrix):
+    is_digit = (matrix >= 48) & (matrix <= 57)
+    return matrix.astype(numpy.int64) - 48, is_digit
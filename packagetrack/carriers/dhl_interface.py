@@ -1,13 +1,13 @@
 import datetime
 import hashlib
-import requests
 from pytz import timezone
 
 from ..carriers import BaseInterface
 from ..configuration import DictConfig
 from ..data import TrackingInfo, TrackingEvent
-from ..xml_dict import xml_to_dict
+from ..xml_dict import xml_to_dict, xml_fragment
 from .errors import *
+from .timestamps import parse_iso_date_time
 
 class DHLInterface(BaseInterface):
     SHORT_NAME = 'DHL'
@@ -29,7 +29,6 @@ class DHLInterface(BaseInterface):
     _url_template = 'http://www.dhl.com/content/g0/en/express/tracking.shtml?' \
         'brand=DHL&AWB={tracking_number}'
 
-    _time_format = '%Y-%m-%dT%H:%M:%S'
     _request_url = 'https://{server}/XMLShippingServlet'
     _request_template = '''<?xml version="1.0" encoding="UTF-8"?>
 <req:KnownTrackingRequest xmlns:req="http://www.dhl.com"
@@ -50,29 +49,45 @@ class DHLInterface(BaseInterface):
     <PiecesEnabled>S</PiecesEnabled>
 </req:KnownTrackingRequest>'''
 
-    def identify(self, tracking_number):
+    def _build_identifiers(self):
         return {
             10: lambda tn: tn.isdigit(),
             11: lambda tn: tn.isdigit(),
-        }.get(len(tracking_number), lambda tn: False)(tracking_number)
+        }
 
     @BaseInterface.require_valid_tracking_number
+    @BaseInterface.cache_tracking_info
     def track(self, tracking_number):
-        req = self._format_request(tracking_number)
-        url = self._request_url.format(
-            server=self._servers[self._cfg_value('server')])
-        return self._parse_response(requests.post(url, req).text)
+        return self._parse_response(self._send_request(tracking_number),
+            tracking_number)
 
     def is_delivered(self, tracking_number, tracking_info=None):
         if tracking_info is None:
             tracking_info = self.track(tracking_number)
         return tracking_info.status.lower().endswith('delivered')
 
-    def _parse_response(self, raw_api_response):
+    def _send_request(self, tracking_number):
+        with self._timer('build'):
+            req = self._format_request(tracking_number)
+            url = self._api_endpoint(self._request_url.format(
+                server=self._servers[self._cfg_value('server')]))
+        return self._http_request('POST', url, hedge=True, data=req).content
+
+    def _latest_activity(self, raw):
+        return xml_fragment(raw, 'ShipmentEvent', last=True)
+
+    def _parse_response(self, raw_api_response, tracking_number):
         try:
-            resp = xml_to_dict(raw_api_response)['req:TrackingResponse']['AWBInfo']
+            with self._timer('parse'):
+                resp = xml_to_dict(raw_api_response)['req:TrackingResponse']['AWBInfo']
         except KeyError as err:
             raise TrackingFailure(err)
+        except ValueError as err:
+            raise TrackingApiFailure(err)
+        with self._timer('construct'):
+            return self._parse_awb_info(resp)
+
+    def _parse_awb_info(self, resp):
         if resp['Status']['ActionStatus'] != u'success':
             try:
                 msg = resp['Status']['Condition']['ConditionData']
@@ -82,8 +97,11 @@ class DHLInterface(BaseInterface):
         info = TrackingInfo(
             tracking_number=resp['AWBNumber'],
         )
-        info.events = info.sort_events(self._parse_events(
-            resp['ShipmentInfo']['ShipmentEvent']))
+        events = resp['ShipmentInfo']['ShipmentEvent']
+        # a single event isn't a list
+        if type(events) != list:
+            events = [events]
+        info.add_events(self._consistent_timezones(self._parse_events(events)))
         info.is_delivered = self.is_delivered(None, info)
         if info.is_delivered:
             info.delivery_date = info.last_update
@@ -91,9 +109,7 @@ class DHLInterface(BaseInterface):
 
     def _parse_events(self, events):
         return (TrackingEvent(
-            timestamp=datetime.datetime.strptime(
-                '{Date}T{Time}'.format(**event),
-                self._time_format),
+            timestamp=self._parse_event_timestamp(event),
             location=','.join(s.strip() \
                 for s in event['ServiceArea']['Description'].split('-') if s.strip()),
             detail=' '.join(s.strip() for s in event['ServiceEvent']['Description'].split('\n')).replace(
@@ -101,8 +117,19 @@ class DHLInterface(BaseInterface):
                 ' in', '').replace(' at', '')) \
             for event in events)
 
+    def _parse_event_timestamp(self, event):
+        # the service area is like "LEIPZIG - GERMANY"
+        city, sep, country = \
+            event['ServiceArea']['Description'].rpartition(' - ')
+        if not sep:
+            city, country = country, None
+        return self._localize(
+            parse_iso_date_time(event['Date'], event['Time']), city, None,
+            country)
+
     def _format_request(self, awb_number):
-        message_time = datetime.datetime.now(timezone(self._cfg_value('timezone'))).replace(microsecond=0).isoformat()
+        message_time = datetime.datetime.now(self._cfg_cached('timezone',
+            lambda: timezone(self._cfg_value('timezone')))).replace(microsecond=0).isoformat()
         message_reference = self._generate_message_reference(awb_number, message_time)
         return self._request_template.format(
             message_time=message_time,
@@ -11,6 +11,12 @@ class TrackingApiFailure(TrackingFailure):
     """
     pass
 
+class TrackingThrottled(TrackingApiFailure):
+    """Raised when the service API kept refusing requests because too many
+    were made (HTTP 429), even after retrying.
+    """
+    pass
+
 class TrackingNetworkFailure(TrackingFailure):
     """Raised for network communication failure when talking to the
     service API. For example, a network timeout or DNS resolution
@@ -18,6 +24,18 @@ class TrackingNetworkFailure(TrackingFailure):
     """
     pass
 
+class CarrierUnavailable(TrackingNetworkFailure):
+    """Raised without contacting the service when too many recent requests
+    to it failed, until it has had time to recover.
+    """
+    pass
+
+class TrackingQuotaExceeded(TrackingFailure):
+    """Raised instead of making a request when the carrier's configured
+    request quota has been used up.
+    """
+    pass
+
 class TrackingNumberFailure(TrackingFailure):
     """Raised when the request to the service API was successful, but
     the service didn't recognize the tracking number. For example the
@@ -31,6 +49,15 @@ class UnsupportedTrackingNumber(TrackingFailure):
     """
     pass
 
+class AmbiguousTrackingNumber(UnsupportedTrackingNumber):
+    """Raised when a tracking number matches more than one service and can't
+    be narrowed down to one, the candidates are in the carriers attribute.
+    """
+    def __init__(self, tracking_number, carriers):
+        UnsupportedTrackingNumber.__init__(self, tracking_number,
+            [str(carrier) for carrier in carriers])
+        self.carriers = carriers
+
 class InvalidTrackingNumber(TrackingFailure):
     """Raised when a service's track() method is called with a TN not for that
     service
@@ -1,46 +1,68 @@
 from datetime import datetime, date, time
+from Queue import Queue, Empty
 
 from fedex.config import FedexConfig
 from fedex.base_service import FedexError
 from fedex.services.track_service import FedexTrackRequest, FedexInvalidTrackingNumber
 
-from ..data import TrackingInfo
+from ..data import TrackingInfo, TrackingEvent
 from ..carriers import BaseInterface
+from .checksums import validate_mod10, validate_ground96, validate_ssc18, \
+    validate_express, validate_ground96_many
 from .errors import *
 
 class FedexInterface(BaseInterface):
     SHORT_NAME = 'FedEx'
     LONG_NAME = 'Federal Express'
     CONFIG_NS = SHORT_NAME
+    DEFAULT_TIMEZONE = 'America/Chicago'
     _url_template = 'http://www.fedex.com/Tracking?tracknumbers={tracking_number}'
+    # IMpb prefixes (application identifier + FedEx mailer ID) of SmartPost
+    # numbers, extra ones can be configured as smart_post_prefixes
+    _smart_post_prefixes = ('92612',)
 
     @BaseInterface.require_valid_tracking_number
+    @BaseInterface.cache_tracking_info
     def track(self, tracking_number):
-        track = FedexTrackRequest(self._get_cfg())
-
-        track.TrackPackageIdentifier.Type = 'TRACKING_NUMBER_OR_DOORTAG'
-        track.TrackPackageIdentifier.Value = tracking_number
-        track.IncludeDetailedScans = True
-
-        # Fires off the request, sets the 'response' attribute on the object.
-        try:
-            track.send_request()
-        except FedexInvalidTrackingNumber as err:
-            raise TrackingNumberFailure(err)
-        except (FedexError, Exception) as err:
-            raise TrackingApiFailure(err)
+        pool = self._get_track_request_pool()
+
+        def send():
+            self.rate_limiter.acquire()
+            with self._timer('build'):
+                track = self._get_track_request(pool)
+                track.TrackPackageIdentifier.Value = tracking_number
+            # Fires off the request, sets the 'response' attribute on the
+            # object. The SOAP client parses the response too, so there's no
+            # separate parse timing for FedEx.
+            try:
+                with self._timer('send'):
+                    track.send_request()
+            except FedexInvalidTrackingNumber as err:
+                pool.put(track)
+                raise TrackingNumberFailure(err)
+            except (FedexError, Exception) as err:
+                # the client may be left in a bad state, let it go
+                raise TrackingApiFailure(err)
+            response = track.response
+            pool.put(track)
+            return response
+
+        # FedEx requests aren't made with _http_request(), but are retried
+        # and go through the circuit breaker the same way
+        response = self._send_with_retries(send)
 
         # TODO: I haven't actually seen an unsuccessful query yet
-        if track.response.HighestSeverity != "SUCCESS":
+        if response.HighestSeverity != "SUCCESS":
             raise TrackingApiFailure("%d: %s" % (
-                    track.response.Notifications[0].Code,
-                    track.response.Notifications[0].LocalizedMessage
+                    response.Notifications[0].Code,
+                    response.Notifications[0].LocalizedMessage
                     ))
 
-        return self._parse_response(track.response.TrackDetails[0], tracking_number)
+        with self._timer('construct'):
+            return self._parse_response(response.TrackDetails[0], tracking_number)
 
-    def identify(self, tracking_number):
-        """Validate the tracking number"""
+    def _build_identifiers(self):
+        """Validators for each tracking number length"""
 
         return {
             12: lambda tn: self._validate_express(tn) or True,
@@ -48,7 +70,27 @@ class FedexInterface(BaseInterface):
             20: lambda tn: tn.startswith('96') and self._validate_ground96(tn),
             22: lambda tn: tn.isdigit() or (tn.startswith('00') and \
                 self._validate_ssc18(tn)),
-        }.get(len(tracking_number), lambda tn: False)(tracking_number)
+        }
+
+    def identify_batch(self, tracking_numbers):
+        return self._identify_batch_by_length(tracking_numbers, {
+            12: lambda tns: [True] * len(tns),
+            15: validate_ground96_many,
+            20: lambda tns: [tn.startswith('96') and valid for tn, valid in \
+                zip(tns, validate_ground96_many(tns))],
+            22: lambda tns: map(self.identify, tns),
+        })
+
+    def smart_post_claim(self, tracking_number):
+        if tracking_number.startswith('96'):
+            return 2 * int(self._validate_ground96(tracking_number))
+        elif tracking_number.startswith('00'):
+            return 2 * int(self._validate_ssc18(tracking_number))
+        prefixes = self._smart_post_prefixes + tuple(p.strip() for p in \
+            self._cfg_value_default('', 'smart_post_prefixes').split(',') \
+                if p.strip())
+        return 2 * int(tracking_number.startswith(prefixes) and \
+            validate_mod10(tracking_number))
 
     def is_delivered(self, tracking_number, tracking_info=None):
         if tracking_info is None:
@@ -82,12 +124,15 @@ class FedexInterface(BaseInterface):
         else:
             delivery_detail = None
             try:
-                delivery_date = datetime.combine(rsp.EstimatedDeliveryTimestamp, time(18))
+                delivery_date = self._localize_address(
+                    datetime.combine(rsp.EstimatedDeliveryTimestamp, time(18)),
+                    getattr(rsp, 'DestinationAddress', None))
             except AttributeError:
                 delivery_date = None
             last_update = rsp.Events[0].Timestamp
             location = self._getTrackingLocation(rsp.Events[0])
-
+        # in the same zone as events from unknown places would be
+        delivery_date = self._guess_timezone(delivery_date)
 
         # a new tracking info object
         trackinfo = TrackingInfo(
@@ -98,12 +143,12 @@ class FedexInterface(BaseInterface):
         )
 
         # now add the events
-        for e in rsp.Events:
-            trackinfo.create_event(
+        trackinfo.add_events(self._consistent_timezones(TrackingEvent(
                 location = self._getTrackingLocation(e),
-                timestamp= e.Timestamp,
+                timestamp= self._localize_address(e.Timestamp,
+                    getattr(e, 'Address', None)),
                 detail   = e.EventDescription,
-            )
+            ) for e in rsp.Events))
 
         trackinfo.is_delivered = self.is_delivered(None, trackinfo)
         if trackinfo.is_delivered:
@@ -112,6 +157,12 @@ class FedexInterface(BaseInterface):
         return trackinfo
 
 
+    def _localize_address(self, timestamp, address):
+        """Localize {timestamp} to {address}, if it's naive"""
+        return self._localize(timestamp, getattr(address, 'City', None),
+            getattr(address, 'StateOrProvinceCode', None),
+            getattr(address, 'CountryCode', None))
+
     def _getTrackingLocation(self, e):
         """Returns a nicely formatted location for a given event"""
         try:
@@ -128,6 +179,9 @@ class FedexInterface(BaseInterface):
         """Makes and returns a FedexConfig object from the packagetrack
            configuration.  Caches it, so it doesn't create each time."""
 
+        return self._cfg_cached('fedex_config', self._build_fedex_cfg)
+
+    def _build_fedex_cfg(self):
         return FedexConfig(
             key = self._cfg_value('key'),
             password = self._cfg_value('password'),
@@ -137,6 +191,32 @@ class FedexInterface(BaseInterface):
             express_region_code = 'US',
         )
 
+    def _get_track_request_pool(self):
+        """Returns the queue of idle FedexTrackRequest clients for the
+           current config, a new one after the config is reloaded."""
+
+        return self._cfg_cached('track_request_pool', Queue)
+
+    def _get_track_request(self, pool):
+        """Takes an idle FedexTrackRequest from {pool}, or makes a new one.
+           Loading the WSDL is the slow part of a FedEx track, so clients
+           are reused and only the tracking number is changed per request.
+           A client is only used by one thread at a time, put it back in
+           {pool} when done."""
+
+        try:
+            return pool.get_nowait()
+        except Empty:
+            track = FedexTrackRequest(self._get_cfg())
+            client = getattr(track, 'client', None)
+            if client is not None:
+                # the suds client has a single timeout for the whole request
+                client.set_options(timeout=sum(self._cfg_cached(
+                    'http_timeout', self._build_http_timeout)))
+            track.TrackPackageIdentifier.Type = 'TRACKING_NUMBER_OR_DOORTAG'
+            track.IncludeDetailedScans = True
+            return track
+
     def _validate_ground96(self, tracking_number):
         """Validates ground code 128 ("96") bar codes
 
@@ -158,62 +238,14 @@ class FedexInterface(BaseInterface):
 
         """
 
-        rev = tracking_number[::-1]
-
-        eventotal = 0
-        oddtotal = 0
-        for i in range(1,15):
-            if i % 2:
-                eventotal += int(rev[i])
-            else:
-                oddtotal += int(rev[i])
-
-        check = 10 - ((eventotal * 3 + oddtotal) % 10)
-
-        # compare with the checksum digit, which is the last digit
-        return check == int(tracking_number[-1:])
+        return validate_ground96(tracking_number)
 
     def _validate_ssc18(self, tracking_number):
         """Validates SSC18 tracking numbers"""
 
-        rev = tracking_number[::-1]
-
-        eventotal = 0
-        oddtotal = 0
-        for i in range(1,19):
-            if i % 2:
-                eventotal += int(rev[i])
-            else:
-                oddtotal += int(rev[i])
-
-        check = 10 - ((eventotal * 3 + oddtotal) % 10)
-
-        # compare with the checksum digit, which is the last digit
-        return check == int(tracking_number[-1:])
-
+        return validate_ssc18(tracking_number)
 
     def _validate_express(self, tracking_number):
         """Validates Express tracking numbers"""
 
-        basenum = tracking_number[0:10]
-        
-        if not basenum.isdigit():
-            return False
-
-        sums = []
-        mult = 1
-        total = 0
-        for digit in basenum[::-1]:
-            sums.append(int(digit) * mult)
-            total = total + (int(digit) * mult)
-
-            if mult == 1: mult = 3
-            if mult == 3: mult = 7
-            if mult == 7: mult = 1
-
-        check = total % 11
-        if check == 10:
-            check = 0
-
-        # compare with the checksum digit, which is the last digit
-        return check == int(tracking_number[-1:])
+        return validate_express(tracking_number)
@@ -1,25 +1,34 @@
 import datetime
-import requests
 import json
 
 from ..configuration import DictConfig
-from ..data import TrackingInfo
+from ..data import TrackingInfo, TrackingEvent
 from ..carriers import BaseInterface
 from .errors import *
+from .timestamps import parse_mdy, parse_clock_time
+from .timezones import utc_from_timestamp
 
 class PrestigeInterface(BaseInterface):
     SHORT_NAME = 'Prestige'
     LONG_NAME = 'Prestige Delivery Systems, Inc'
     CONFIG_NS = 'PS'
+    DEFAULT_TIMEZONE = 'America/New_York'
     DEFAULT_CFG = DictConfig({CONFIG_NS:{}})
+    # trackingNumbers takes a comma separated list
+    BATCH_SIZE = 25
 
     _API_URL = 'http://www.prestigedelivery.com/TrackingHandler.ashx'
     
     _url_template = 'http://www.prestigedelivery.com/trackpackage.aspx?{tracking_number}'
 
     @BaseInterface.require_valid_tracking_number
+    @BaseInterface.cache_tracking_info
     def track(self, tracking_number):
-        return self._parse_response(self._send_request(tracking_number))
+        return self._parse_response(self._send_request(tracking_number),
+            tracking_number)
+
+    def track_batch(self, tracking_numbers):
+        return self._track_in_batches(tracking_numbers, self._track_chunk)
 
     def identify(self, tracking_number):
         return len(tracking_number) == 10 and \
@@ -27,46 +36,87 @@ class PrestigeInterface(BaseInterface):
             tracking_number[1].isalpha() and \
             tracking_number[2:].isdigit()
 
+    def identify_index_keys(self):
+        return [(10, 'P')]
+
     def is_delivered(self, tracking_number, tracking_info=None):
         if tracking_info is None:
             tracking_info = self.track(tracking_number)
         return tracking_info.status.lower() == 'delivered'
 
     def _send_request(self, tracking_number):
-        try:
-            resp = requests.get(self._API_URL,
-                params={'trackingNumbers': tracking_number})
-        except requests.exceptions.RequestException as err:
-            raise TrackingNetworkFailure(err)
-        return resp.content
+        return self._send_batch_request([tracking_number])
 
-    def _parse_response(self, raw_response):
+    def _send_batch_request(self, tracking_numbers):
+        with self._timer('build'):
+            params = {'trackingNumbers': ','.join(tracking_numbers)}
+        return self._http_request('GET', self._api_endpoint(self._API_URL),
+            hedge=True, params=params).content
+
+    def _track_chunk(self, tracking_numbers):
+        resp = self._send_batch_request(tracking_numbers)
+        return self._parse_batch_response(resp, tracking_numbers)
+
+    def _parse_response(self, raw_response, tracking_number):
         try:
-            resp_data = json.loads(raw_response)[0]
+            with self._timer('parse'):
+                resp_data = json.loads(raw_response)[0]
         except ValueError as err:
             raise TrackingApiFailure(err)
+        with self._timer('construct'):
+            return self._parse_tracking_data(resp_data)
+
+    def _parse_batch_response(self, raw_response, tracking_numbers):
+        """Split the JSON array returned for several tracking numbers into
+        (tracking_number, TrackingInfo or TrackingFailure) tuples.
+        """
+        try:
+            with self._timer('parse'):
+                resp_data = dict((data['TrackingNumber'], data) \
+                    for data in json.loads(raw_response))
+        except (ValueError, TypeError, KeyError) as err:
+            raise TrackingApiFailure(err)
+        with self._timer('construct'):
+            return [(tracking_number, self._parse_batch_item(resp_data,
+                tracking_number)) for tracking_number in tracking_numbers]
+
+    def _parse_batch_item(self, resp_data, tracking_number):
+        if tracking_number not in resp_data:
+            return TrackingApiFailure(
+                'No tracking data returned for %s' % tracking_number)
+        try:
+            return self._parse_tracking_data(resp_data[tracking_number])
+        except TrackingFailure as err:
+            return err
+
+    def _parse_event(self, event_data):
+        event_ts = self._parse_event_timestamp(event_data)
+        event_loc = '%s, %s' % (
+            event_data['ELCity'].strip(), event_data['ELState'].strip())
+        event_detail = event_data['EventCodeDesc'].strip()
+        return TrackingEvent(event_ts, event_loc, event_detail)
+
+    def _parse_tracking_data(self, resp_data):
         if resp_data['TrackingEventHistory'][0]['EventCode'].startswith('ERROR_'):
             raise TrackingApiFailure('%s: %s' % (
                 resp_data['TrackingEventHistory'][0]['EventCode'],
                 resp_data['TrackingEventHistory'][0]['EventCodeDesc']))
         info = TrackingInfo(tracking_number=resp_data['TrackingNumber'],
             delivery_date=self._parse_delivery_date(resp_data))
-        for event_data in resp_data['TrackingEventHistory']:
-            event_ts = self._parse_event_timestamp(event_data)
-            event_loc = '%s, %s' % (
-                event_data['ELCity'].strip(), event_data['ELState'].strip())
-            event_detail = event_data['EventCodeDesc'].strip()
-            info.create_event(event_ts, event_loc, event_detail)
+        info.add_events(self._consistent_timezones(
+            self._parse_event(event_data) \
+            for event_data in resp_data['TrackingEventHistory']))
         info.is_delivered = self.is_delivered(None, info)
         if info.is_delivered:
             info.delivery_date = info.last_update
         return info
 
     def _parse_event_timestamp(self, event_data):
-        date = datetime.datetime.strptime(event_data['serverDate'], '%m/%d/%Y').date()
-        time = datetime.datetime.strptime(event_data['serverTime'], '%I:%M %p').time()
-        return datetime.datetime.combine(date, time)
+        return self._localize(datetime.datetime.combine(
+            parse_mdy(event_data['serverDate']),
+            parse_clock_time(event_data['serverTime'])),
+            event_data['ELCity'], event_data['ELState'])
 
     def _parse_delivery_date(self, resp_data):
         ts = int(resp_data['TrackingEventHistory'][0]['SchdDateTime'][6:-5])
-        return datetime.datetime.fromtimestamp(ts)
+        return self._guess_timezone(utc_from_timestamp(ts))
@@ -0,0 +1,101 @@
+"""Fast parsing of the fixed date and time formats in carrier responses.
+
+datetime.strptime() takes a lock, matches a regular expression and builds a
+struct_time for every string, which adds up over responses with hundreds of
+events. These parsers slice the usual form of each format instead, and
+memoize the ones with month names and 12 hour times, as the same few dates
+and times of day repeat across events. Anything unusual (unpadded fields,
+stray spaces) falls back to strptime(), so they accept the same strings and
+raise the same ValueError for bad ones. Month names are English, whatever
+the locale.
+"""
+
+from datetime import datetime, date, time
+
+# entries kept by each memoized parser, beyond which new strings are parsed
+# every time
+MEMO_SIZE = 4096
+
+_MONTHS = dict((name, number) for number, name in enumerate(['january',
+    'february', 'march', 'april', 'may', 'june', 'july', 'august',
+    'september', 'october', 'november', 'december'], 1))
+
+def _memoized(parse):
+    memo = {}
+    def memoized_parse(s):
+        try:
+            return memo[s]
+        except KeyError:
+            value = parse(s)
+            if len(memo) < MEMO_SIZE:
+                memo[s] = value
+            return value
+    memoized_parse.__name__ = parse.__name__
+    memoized_parse.__doc__ = parse.__doc__
+    return memoized_parse
+
+def parse_ymd(s):
+    """'%Y%m%d' (20120601) as a date"""
+    if len(s) == 8 and s.isdigit():
+        return date(int(s[:4]), int(s[4:6]), int(s[6:]))
+    return datetime.strptime(s, '%Y%m%d').date()
+
+def parse_ymd_hms(date_string, time_string):
+    """A '%Y%m%d' date and '%H%M%S' time (20120601, 081500) as a datetime"""
+    if len(date_string) == 8 and len(time_string) == 6 and \
+            date_string.isdigit() and time_string.isdigit():
+        return datetime(int(date_string[:4]), int(date_string[4:6]),
+            int(date_string[6:]), int(time_string[:2]), int(time_string[2:4]),
+            int(time_string[4:]))
+    # parsed apart, joined they could split differently (2012061 081500)
+    return datetime.combine(datetime.strptime(date_string, '%Y%m%d').date(),
+        datetime.strptime(time_string, '%H%M%S').time())
+
+def parse_iso_date_time(date_string, time_string):
+    """A '%Y-%m-%d' date and '%H:%M:%S' time (2012-06-01, 08:15:00) as a
+    datetime
+    """
+    if len(date_string) == 10 and len(time_string) == 8 and \
+            date_string[4] == date_string[7] == '-' and \
+            time_string[2] == time_string[5] == ':':
+        fields = (date_string[:4], date_string[5:7], date_string[8:],
+            time_string[:2], time_string[3:5], time_string[6:])
+        if ''.join(fields).isdigit():
+            return datetime(*map(int, fields))
+    return datetime.strptime(date_string + 'T' + time_string,
+        '%Y-%m-%dT%H:%M:%S')
+
+def parse_mdy(s):
+    """'%m/%d/%Y' (06/01/2012) as a date"""
+    fields = s.split('/')
+    if len(fields) == 3 and len(fields[0]) <= 2 and len(fields[1]) <= 2 and \
+            len(fields[2]) == 4 and ''.join(fields).isdigit():
+        month, day, year = fields
+        return date(int(year), int(month), int(day))
+    return datetime.strptime(s, '%m/%d/%Y').date()
+
+@_memoized
+def parse_month_day_year(s):
+    """'%B %d, %Y' (June 1, 2012) as a date"""
+    fields = s.split(' ')
+    if len(fields) == 3 and 2 <= len(fields[1]) <= 3 and \
+            fields[1].endswith(',') and fields[1][:-1].isdigit() and \
+            len(fields[2]) == 4 and fields[2].isdigit():
+        month = _MONTHS.get(fields[0].lower())
+        if month is not None:
+            return date(int(fields[2]), month, int(fields[1][:-1]))
+    return datetime.strptime(s, '%B %d, %Y').date()
+
+@_memoized
+def parse_clock_time(s):
+    """'%I:%M %p' (8:10 am, 08:10 PM) as a time"""
+    clock, _, meridian = s.partition(' ')
+    hour, _, minute = clock.partition(':')
+    meridian = meridian.lower()
+    if len(hour) <= 2 and hour.isdigit() and 1 <= int(hour) <= 12 and \
+            len(minute) == 2 and minute.isdigit() and meridian in ('am', 'pm'):
+        hour = int(hour) % 12
+        if meridian == 'pm':
+            hour += 12
+        return time(hour, int(minute))
+    return datetime.strptime(s, '%I:%M %p').time()
@@ -0,0 +1,309 @@
+"""Timezones of carrier event locations, so event timestamps can be made
+timezone-aware.
+
+Carriers report events in the local time of where they happened, with a
+city, state and country but no zone. location_timezone() finds the zone
+from offline tables: US states, Canadian provinces and Australian states,
+the cities that differ from the rest of their state, the hub cities of
+countries spanning several zones and the countries with a single zone.
+Lookups are memoized, as are the UTC offsets localize() finds, so
+localizing many events from the same few places and days is cheap.
+
+Timezones need pytz, without it location_timezone() finds nothing and
+timestamps stay naive.
+"""
+
+from datetime import datetime
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+# entries kept by each memo, beyond which new lookups aren't remembered
+MEMO_SIZE = 65536
+
+_US_STATES = {
+    'AL': 'America/Chicago', 'AK': 'America/Anchorage',
+    'AZ': 'America/Phoenix', 'AR': 'America/Chicago',
+    'CA': 'America/Los_Angeles', 'CO': 'America/Denver',
+    'CT': 'America/New_York', 'DE': 'America/New_York',
+    'DC': 'America/New_York', 'FL': 'America/New_York',
+    'GA': 'America/New_York', 'HI': 'Pacific/Honolulu',
+    'ID': 'America/Boise', 'IL': 'America/Chicago',
+    'IN': 'America/Indiana/Indianapolis', 'IA': 'America/Chicago',
+    'KS': 'America/Chicago', 'KY': 'America/Kentucky/Louisville',
+    'LA': 'America/Chicago', 'ME': 'America/New_York',
+    'MD': 'America/New_York', 'MA': 'America/New_York',
+    'MI': 'America/Detroit', 'MN': 'America/Chicago',
+    'MS': 'America/Chicago', 'MO': 'America/Chicago',
+    'MT': 'America/Denver', 'NE': 'America/Chicago',
+    'NV': 'America/Los_Angeles', 'NH': 'America/New_York',
+    'NJ': 'America/New_York', 'NM': 'America/Denver',
+    'NY': 'America/New_York', 'NC': 'America/New_York',
+    'ND': 'America/Chicago', 'OH': 'America/New_York',
+    'OK': 'America/Chicago', 'OR': 'America/Los_Angeles',
+    'PA': 'America/New_York', 'RI': 'America/New_York',
+    'SC': 'America/New_York', 'SD': 'America/Chicago',
+    'TN': 'America/Chicago', 'TX': 'America/Chicago',
+    'UT': 'America/Denver', 'VT': 'America/New_York',
+    'VA': 'America/New_York', 'WA': 'America/Los_Angeles',
+    'WV': 'America/New_York', 'WI': 'America/Chicago',
+    'WY': 'America/Denver', 'PR': 'America/Puerto_Rico',
+    'VI': 'America/St_Thomas', 'GU': 'Pacific/Guam',
+    'AS': 'Pacific/Pago_Pago', 'MP': 'Pacific/Saipan',
+}
+
+_STATES = {
+    'US': _US_STATES,
+    'CA': {
+        'AB': 'America/Edmonton', 'BC': 'America/Vancouver',
+        'MB': 'America/Winnipeg', 'NB': 'America/Moncton',
+        'NL': 'America/St_Johns', 'NS': 'America/Halifax',
+        'NT': 'America/Yellowknife', 'NU': 'America/Iqaluit',
+        'ON': 'America/Toronto', 'PE': 'America/Halifax',
+        'QC': 'America/Toronto', 'SK': 'America/Regina',
+        'YT': 'America/Whitehorse',
+    },
+    'AU': {
+        'NSW': 'Australia/Sydney', 'ACT': 'Australia/Sydney',
+        'VIC': 'Australia/Melbourne', 'QLD': 'Australia/Brisbane',
+        'SA': 'Australia/Adelaide', 'WA': 'Australia/Perth',
+        'TAS': 'Australia/Hobart', 'NT': 'Australia/Darwin',
+    },
+}
+
+# (country, state or None, city): cities in a different zone than the rest
+# of their state, and hubs of countries with several zones for carriers
+# that don't give the state
+_CITIES = {
+    ('US', 'TX', 'EL PASO'): 'America/Denver',
+    ('US', 'FL', 'PENSACOLA'): 'America/Chicago',
+    ('US', 'FL', 'PANAMA CITY'): 'America/Chicago',
+    ('US', 'TN', 'KNOXVILLE'): 'America/New_York',
+    ('US', 'TN', 'CHATTANOOGA'): 'America/New_York',
+    ('US', 'TN', 'JOHNSON CITY'): 'America/New_York',
+    ('US', 'KY', 'PADUCAH'): 'America/Chicago',
+    ('US', 'KY', 'BOWLING GREEN'): 'America/Chicago',
+    ('US', 'IN', 'EVANSVILLE'): 'America/Chicago',
+    ('US', 'IN', 'GARY'): 'America/Chicago',
+    ('US', 'IN', 'HAMMOND'): 'America/Chicago',
+    ('US', 'MI', 'IRONWOOD'): 'America/Menominee',
+    ('US', 'MI', 'MENOMINEE'): 'America/Menominee',
+    ('US', 'ID', "COEUR D'ALENE"): 'America/Los_Angeles',
+    ('US', 'ID', 'LEWISTON'): 'America/Los_Angeles',
+    ('US', 'ID', 'MOSCOW'): 'America/Los_Angeles',
+    ('US', 'OR', 'ONTARIO'): 'America/Boise',
+    ('US', 'SD', 'RAPID CITY'): 'America/Denver',
+    ('US', 'NE', 'SCOTTSBLUFF'): 'America/Denver',
+    ('US', 'NE', 'NORTH PLATTE'): 'America/Chicago',
+    ('US', 'KS', 'GOODLAND'): 'America/Denver',
+    ('US', 'ND', 'DICKINSON'): 'America/Denver',
+    ('US', None, 'ATLANTA'): 'America/New_York',
+    ('US', None, 'BOSTON'): 'America/New_York',
+    ('US', None, 'CINCINNATI'): 'America/New_York',
+    ('US', None, 'NEW YORK'): 'America/New_York',
+    ('US', None, 'NEWARK'): 'America/New_York',
+    ('US', None, 'PHILADELPHIA'): 'America/New_York',
+    ('US', None, 'MIAMI'): 'America/New_York',
+    ('US', None, 'WASHINGTON'): 'America/New_York',
+    ('US', None, 'LOUISVILLE'): 'America/Kentucky/Louisville',
+    ('US', None, 'INDIANAPOLIS'): 'America/Indiana/Indianapolis',
+    ('US', None, 'DETROIT'): 'America/Detroit',
+    ('US', None, 'CHICAGO'): 'America/Chicago',
+    ('US', None, 'DALLAS'): 'America/Chicago',
+    ('US', None, 'HOUSTON'): 'America/Chicago',
+    ('US', None, 'MEMPHIS'): 'America/Chicago',
+    ('US', None, 'MINNEAPOLIS'): 'America/Chicago',
+    ('US', None, 'DENVER'): 'America/Denver',
+    ('US', None, 'SALT LAKE CITY'): 'America/Denver',
+    ('US', None, 'PHOENIX'): 'America/Phoenix',
+    ('US', None, 'LOS ANGELES'): 'America/Los_Angeles',
+    ('US', None, 'SAN FRANCISCO'): 'America/Los_Angeles',
+    ('US', None, 'SEATTLE'): 'America/Los_Angeles',
+    ('US', None, 'ANCHORAGE'): 'America/Anchorage',
+    ('US', None, 'HONOLULU'): 'Pacific/Honolulu',
+    ('CA', None, 'TORONTO'): 'America/Toronto',
+    ('CA', None, 'MONTREAL'): 'America/Toronto',
+    ('CA', None, 'OTTAWA'): 'America/Toronto',
+    ('CA', None, 'HALIFAX'): 'America/Halifax',
+    ('CA', None, 'WINNIPEG'): 'America/Winnipeg',
+    ('CA', None, 'CALGARY'): 'America/Edmonton',
+    ('CA', None, 'EDMONTON'): 'America/Edmonton',
+    ('CA', None, 'VANCOUVER'): 'America/Vancouver',
+    ('AU', None, 'SYDNEY'): 'Australia/Sydney',
+    ('AU', None, 'MELBOURNE'): 'Australia/Melbourne',
+    ('AU', None, 'BRISBANE'): 'Australia/Brisbane',
+    ('AU', None, 'ADELAIDE'): 'Australia/Adelaide',
+    ('AU', None, 'PERTH'): 'Australia/Perth',
+    ('MX', None, 'MEXICO CITY'): 'America/Mexico_City',
+    ('MX', None, 'GUADALAJARA'): 'America/Mexico_City',
+    ('MX', None, 'MONTERREY'): 'America/Monterrey',
+    ('MX', None, 'TIJUANA'): 'America/Tijuana',
+    ('MX', None, 'CANCUN'): 'America/Cancun',
+    ('MX', None, 'HERMOSILLO'): 'America/Hermosillo',
+    ('BR', None, 'SAO PAULO'): 'America/Sao_Paulo',
+    ('BR', None, 'RIO DE JANEIRO'): 'America/Sao_Paulo',
+    ('BR', None, 'CAMPINAS'): 'America/Sao_Paulo',
+    ('BR', None, 'MANAUS'): 'America/Manaus',
+    ('RU', None, 'MOSCOW'): 'Europe/Moscow',
+    ('RU', None, 'SAINT PETERSBURG'): 'Europe/Moscow',
+    ('RU', None, 'ST PETERSBURG'): 'Europe/Moscow',
+    ('RU', None, 'YEKATERINBURG'): 'Asia/Yekaterinburg',
+    ('RU', None, 'NOVOSIBIRSK'): 'Asia/Novosibirsk',
+    ('RU', None, 'VLADIVOSTOK'): 'Asia/Vladivostok',
+}
+
+# countries with a single zone (or one that nearly all shipments see)
+_COUNTRIES = {
+    'GB': 'Europe/London', 'IE': 'Europe/Dublin', 'DE': 'Europe/Berlin',
+    'FR': 'Europe/Paris', 'NL': 'Europe/Amsterdam', 'BE': 'Europe/Brussels',
+    'LU': 'Europe/Luxembourg', 'CH': 'Europe/Zurich', 'AT': 'Europe/Vienna',
+    'IT': 'Europe/Rome', 'ES': 'Europe/Madrid', 'PT': 'Europe/Lisbon',
+    'DK': 'Europe/Copenhagen', 'SE': 'Europe/Stockholm', 'NO': 'Europe/Oslo',
+    'FI': 'Europe/Helsinki', 'IS': 'Atlantic/Reykjavik',
+    'PL': 'Europe/Warsaw', 'CZ': 'Europe/Prague', 'SK': 'Europe/Bratislava',
+    'HU': 'Europe/Budapest', 'RO': 'Europe/Bucharest', 'BG': 'Europe/Sofia',
+    'GR': 'Europe/Athens', 'TR': 'Europe/Istanbul', 'UA': 'Europe/Kiev',
+    'HR': 'Europe/Zagreb', 'SI': 'Europe/Ljubljana', 'RS': 'Europe/Belgrade',
+    'LT': 'Europe/Vilnius', 'LV': 'Europe/Riga', 'EE': 'Europe/Tallinn',
+    'IL': 'Asia/Jerusalem', 'AE': 'Asia/Dubai', 'SA': 'Asia/Riyadh',
+    'QA': 'Asia/Qatar', 'KW': 'Asia/Kuwait', 'BH': 'Asia/Bahrain',
+    'EG': 'Africa/Cairo', 'ZA': 'Africa/Johannesburg', 'NG': 'Africa/Lagos',
+    'KE': 'Africa/Nairobi', 'MA': 'Africa/Casablanca', 'IN': 'Asia/Kolkata',
+    'PK': 'Asia/Karachi', 'BD': 'Asia/Dhaka', 'LK': 'Asia/Colombo',
+    'CN': 'Asia/Shanghai', 'HK': 'Asia/Hong_Kong', 'MO': 'Asia/Macau',
+    'TW': 'Asia/Taipei', 'JP': 'Asia/Tokyo', 'KR': 'Asia/Seoul',
+    'SG': 'Asia/Singapore', 'MY': 'Asia/Kuala_Lumpur', 'TH': 'Asia/Bangkok',
+    'VN': 'Asia/Ho_Chi_Minh', 'PH': 'Asia/Manila', 'NZ': 'Pacific/Auckland',
+    'AR': 'America/Argentina/Buenos_Aires', 'CL': 'America/Santiago',
+    'CO': 'America/Bogota', 'PE': 'America/Lima', 'VE': 'America/Caracas',
+    'EC': 'America/Guayaquil', 'UY': 'America/Montevideo',
+    'PR': 'America/Puerto_Rico', 'JM': 'America/Jamaica',
+    'DO': 'America/Santo_Domingo', 'CR': 'America/Costa_Rica',
+    'PA': 'America/Panama', 'GT': 'America/Guatemala',
+}
+
+# country names carriers use, besides ISO 3166 codes
+_COUNTRY_NAMES = {
+    'USA': 'US', 'UNITED STATES': 'US', 'UNITED STATES OF AMERICA': 'US',
+    'CANADA': 'CA', 'AUSTRALIA': 'AU', 'MEXICO': 'MX', 'BRAZIL': 'BR',
+    'RUSSIA': 'RU', 'RUSSIAN FEDERATION': 'RU', 'UK': 'GB',
+    'UNITED KINGDOM': 'GB', 'GREAT BRITAIN': 'GB', 'ENGLAND': 'GB',
+    'SCOTLAND': 'GB', 'WALES': 'GB', 'NORTHERN IRELAND': 'GB',
+    'IRELAND': 'IE', 'GERMANY': 'DE', 'FRANCE': 'FR', 'NETHERLANDS': 'NL',
+    'THE NETHERLANDS': 'NL', 'HOLLAND': 'NL', 'BELGIUM': 'BE',
+    'LUXEMBOURG': 'LU', 'SWITZERLAND': 'CH', 'AUSTRIA': 'AT', 'ITALY': 'IT',
+    'SPAIN': 'ES', 'PORTUGAL': 'PT', 'DENMARK': 'DK', 'SWEDEN': 'SE',
+    'NORWAY': 'NO', 'FINLAND': 'FI', 'ICELAND': 'IS', 'POLAND': 'PL',
+    'CZECH REPUBLIC': 'CZ', 'CZECHIA': 'CZ', 'SLOVAKIA': 'SK',
+    'HUNGARY': 'HU', 'ROMANIA': 'RO', 'BULGARIA': 'BG', 'GREECE': 'GR',
+    'TURKEY': 'TR', 'UKRAINE': 'UA', 'CROATIA': 'HR', 'SLOVENIA': 'SI',
+    'SERBIA': 'RS', 'LITHUANIA': 'LT', 'LATVIA': 'LV', 'ESTONIA': 'EE',
+    'ISRAEL': 'IL', 'UNITED ARAB EMIRATES': 'AE', 'UAE': 'AE',
+    'SAUDI ARABIA': 'SA', 'QATAR': 'QA', 'KUWAIT': 'KW', 'BAHRAIN': 'BH',
+    'EGYPT': 'EG', 'SOUTH AFRICA': 'ZA', 'NIGERIA': 'NG', 'KENYA': 'KE',
+    'MOROCCO': 'MA', 'INDIA': 'IN', 'PAKISTAN': 'PK', 'BANGLADESH': 'BD',
+    'SRI LANKA': 'LK', 'CHINA': 'CN', 'HONG KONG': 'HK', 'MACAU': 'MO',
+    'MACAO': 'MO', 'TAIWAN': 'TW', 'JAPAN': 'JP', 'KOREA': 'KR',
+    'SOUTH KOREA': 'KR', 'SINGAPORE': 'SG', 'MALAYSIA': 'MY',
+    'THAILAND': 'TH', 'VIETNAM': 'VN', 'VIET NAM': 'VN', 'PHILIPPINES': 'PH',
+    'NEW ZEALAND': 'NZ', 'ARGENTINA': 'AR', 'CHILE': 'CL', 'COLOMBIA': 'CO',
+    'PERU': 'PE', 'VENEZUELA': 'VE', 'ECUADOR': 'EC', 'URUGUAY': 'UY',
+    'PUERTO RICO': 'PR', 'JAMAICA': 'JM', 'DOMINICAN REPUBLIC': 'DO',
+    'COSTA RICA': 'CR', 'PANAMA': 'PA', 'GUATEMALA': 'GT',
+}
+
+# words carriers add to a city's name for their facilities there
+_FACILITY_WORDS = ('HUB', 'GATEWAY', 'FACILITY', 'AIRPORT')
+
+_location_memo = {}
+_tzinfo_memo = {}
+
+def location_timezone(city=None, state=None, country=None):
+    """Return the pytz timezone of a place given its {city}, {state} (or
+    province) and {country} (a code or name), any of which may be missing, or
+    None if the zone can't be told. A state without a country is taken to be
+    a US state or Canadian province.
+    """
+    key = (city, state, country)
+    try:
+        return _location_memo[key]
+    except KeyError:
+        zone = _find_timezone(city, state, country)
+        if len(_location_memo) < MEMO_SIZE:
+            _location_memo[key] = zone
+        return zone
+
+def localize(timestamp, zone):
+    """Return the naive local {timestamp} with {zone}'s tzinfo for that time,
+    like zone.localize(timestamp) but memoized per half hour of local time
+    """
+    key = (zone, timestamp.year, timestamp.month, timestamp.day,
+        timestamp.hour, timestamp.minute >= 30)
+    try:
+        tzinfo = _tzinfo_memo[key]
+    except KeyError:
+        tzinfo = zone.localize(timestamp).tzinfo
+        if len(_tzinfo_memo) < MEMO_SIZE:
+            _tzinfo_memo[key] = tzinfo
+    return timestamp.replace(tzinfo=tzinfo)
+
+def utc_from_timestamp(seconds):
+    """The aware UTC datetime of a POSIX timestamp, naive local time without
+    pytz
+    """
+    if pytz is None:
+        return datetime.fromtimestamp(seconds)
+    return datetime.fromtimestamp(seconds, pytz.utc)
+
+def _find_timezone(city, state, country):
+    if pytz is None:
+        return None
+    city, state, country = map(_normalize, (city, state, country))
+    code = _country_code(country)
+    if code is None and country is None and state is not None:
+        for code in ('US', 'CA'):
+            if state in _STATES[code]:
+                break
+        else:
+            code = None
+    if code is None:
+        return None
+
+    name = None
+    if city is not None:
+        for place in _city_names(city):
+            name = _CITIES.get((code, state, place)) or \
+                _CITIES.get((code, None, place))
+            if name is not None:
+                break
+    if name is None and state is not None:
+        name = _STATES.get(code, {}).get(state)
+    if name is None:
+        name = _COUNTRIES.get(code)
+    return None if name is None else pytz.timezone(name)
+
+def _normalize(value):
+    """Upper case with single spaces and no periods, None if empty"""
+    if not value:
+        return None
+    return ' '.join(value.upper().replace('.', '').split()) or None
+
+def _country_code(country):
+    if country is None:
+        return None
+    if len(country) == 2 and (country in _COUNTRIES or country in _STATES):
+        return country
+    code = _COUNTRY_NAMES.get(country)
+    if code is None and ',' in country:
+        # like "KOREA, REPUBLIC OF"
+        code = _COUNTRY_NAMES.get(country.split(',')[0].strip())
+    return code
+
+def _city_names(city):
+    """{city} and the city without a trailing facility word"""
+    yield city
+    name, _, word = city.rpartition(' ')
+    if name and word in _FACILITY_WORDS:
+        yield name
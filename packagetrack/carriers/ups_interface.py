@@ -1,21 +1,38 @@
-import requests
 from datetime import datetime, date, time, timedelta
+from xml.sax.saxutils import escape, quoteattr
 
 from ..configuration import DictConfig
 from ..carriers import BaseInterface
-from ..xml_dict import dict_to_xml, xml_to_dict
-from ..data import TrackingInfo
+from .checksums import validate_ups, validate_ups_many
+from .timestamps import parse_ymd, parse_ymd_hms
+from ..xml_dict import xml_to_dict, xml_fragment
+from ..data import TrackingInfo, TrackingEvent
 from .errors import *
 
 class UPSInterface(BaseInterface):
     SHORT_NAME = 'UPS'
     LONG_NAME = SHORT_NAME
     CONFIG_NS = SHORT_NAME
+    DEFAULT_TIMEZONE = 'America/Chicago'
     DEFAULT_CFG = DictConfig({CONFIG_NS:{'lang': 'en-US'}})
 
     _api_url = 'https://wwwcie.ups.com/ups.app/xml/Track'
     _url_template = 'http://wwwapps.ups.com/WebTracking/processInputRequest?' \
         'TypeOfInquiryNumber=T&InquiryNumber1={tracking_number}'
+    _access_request_template = '<?xml version="1.0" ?>' \
+        '<AccessRequest xml:lang={lang}>' \
+        '<AccessLicenseNumber>{license_number}</AccessLicenseNumber>' \
+        '<UserId>{user_id}</UserId>' \
+        '<Password>{password}</Password>' \
+        '</AccessRequest>'
+    _track_request_template = '<?xml version="1.0" ?>' \
+        '<TrackRequest><Request>' \
+        '<TransactionReference><RequestAction>Track</RequestAction>' \
+        '</TransactionReference>' \
+        '<RequestOption>1</RequestOption>' \
+        '</Request><TrackingNumber>{tracking_number}</TrackingNumber>' \
+        '{tracking_option}</TrackRequest>'
+    _mi_tracking_option = '<TrackingOption>03</TrackingOption>'
 
     def identify(self, tracking_number):
         return (tracking_number.startswith('1Z') and \
@@ -24,7 +41,24 @@ class UPSInterface(BaseInterface):
             self._check_tracking_code(tracking_number[2:])) or \
             self._is_mi_tracking_number(tracking_number)
 
+    def identify_batch(self, tracking_numbers):
+        results = map(self._is_mi_tracking_number, tracking_numbers)
+        by_length = {}
+        for i, tn in enumerate(tracking_numbers):
+            if not results[i] and tn.startswith('1Z') and tn[-1].isdigit() \
+                    and tn.isalnum():
+                by_length.setdefault(len(tn), []).append(i)
+        for indexes in by_length.values():
+            valid = validate_ups_many([tracking_numbers[i][2:] for i in indexes])
+            for i, is_valid in zip(indexes, valid):
+                results[i] = is_valid
+        return results
+
+    def identify_index_keys(self):
+        return [(None, '1Z'), (18, None)]
+
     @BaseInterface.require_valid_tracking_number
+    @BaseInterface.cache_tracking_info
     def track(self, tracking_number):
         resp = self._send_request(tracking_number)
         return self._parse_response(resp, tracking_number)
@@ -38,51 +72,52 @@ class UPSInterface(BaseInterface):
         return len(tracking_number) == 18 and tracking_number.isdigit()
 
     def _check_tracking_code(self, tracking_code):
-        digits = map(lambda d: int(d) if d.isdigit() else ((ord(d) - 63) % 10),
-            tracking_code[:-1].upper())
-        total = (sum(digits[1::2]) * 2) + sum(digits[::2])
-        check_digit = (10 - (total % 10)) if total % 10 != 0 else 0
-        return check_digit == int(tracking_code[-1])
+        return validate_ups(tracking_code)
 
     def _build_access_request(self):
-        req = {
-            'AccessRequest': {
-                'AccessLicenseNumber': self._cfg_value('license_number'),
-                'UserId': self._cfg_value('user_id'),
-                'Password': self._cfg_value('password'),
-            }
-        }
-        return dict_to_xml(req, {'xml:lang': self._cfg_value('lang')})
+        """The AccessRequest never changes, so it's made once per config
+        """
+        return self._cfg_cached('access_request', self._format_access_request)
+
+    def _format_access_request(self):
+        return self._access_request_template.format(
+            lang=quoteattr(self._cfg_value('lang')),
+            license_number=escape(self._cfg_value('license_number')),
+            user_id=escape(self._cfg_value('user_id')),
+            password=escape(self._cfg_value('password')))
 
     def _build_track_request(self, tracking_number):
-        data = {
-            'TrackRequest': {
-                'Request': {
-                    'TransactionReference': {
-                        'RequestAction': 'Track',
-                    },
-                    'RequestOption': '1',
-                },
-                'TrackingNumber': tracking_number,
-            }
-        }
         if self._is_mi_tracking_number(tracking_number):
-            data['TrackRequest']['TrackingOption'] = '03'
-        return dict_to_xml(data)
+            tracking_option = self._mi_tracking_option
+        else:
+            tracking_option = ''
+        return self._track_request_template.format(
+            tracking_number=escape(tracking_number),
+            tracking_option=tracking_option)
 
     def _build_request(self, tracking_number):
         return (self._build_access_request() +
                 self._build_track_request(tracking_number))
 
     def _send_request(self, tracking_number):
-        return requests.post(self._api_url, self._build_request(tracking_number)).text
+        with self._timer('build'):
+            request = self._build_request(tracking_number)
+        return self._http_request('POST', self._api_endpoint(self._api_url),
+            hedge=True, data=request).content
 
-    def _parse_response(self, raw, tracking_number):
-        try:
-            root = xml_to_dict(raw)['TrackResponse']
-        except ValueError as err:
-            raise TrackingApiFailure(err)
+    def _latest_activity(self, raw):
+        return xml_fragment(raw, 'Activity')
 
+    def _parse_response(self, raw, tracking_number):
+        with self._timer('parse'):
+            try:
+                root = xml_to_dict(raw)['TrackResponse']
+            except ValueError as err:
+                raise TrackingApiFailure(err)
+        with self._timer('construct'):
+            return self._parse_track_response(root, tracking_number)
+
+    def _parse_track_response(self, root, tracking_number):
         response = root['Response']
         status_code = response['ResponseStatusCode']
         status_description = response['ResponseStatusDescription']
@@ -108,23 +143,26 @@ class UPSInterface(BaseInterface):
         status = activity['Status']['StatusType']['Description']
         status_code = activity['Status']['StatusType']['Code']
 
-        last_update_date = datetime.strptime(activity['Date'], "%Y%m%d").date()
-        last_update_time = datetime.strptime(activity['Time'], "%H%M%S").time()
-        last_update = datetime.combine(last_update_date, last_update_time)
+        events = self._consistent_timezones(
+            self._parse_event(e) for e in package['Activity'])
+        last_update = events[0].timestamp
 
         # Delivery date is the last_update if delivered, otherwise
         # the estimated delivery date
         if service_code == '031' or status_code == 'D':
             delivery_date = last_update
         elif 'RescheduledDeliveryDate' in package:
-            delivery_date = datetime.strptime(
-                package['RescheduledDeliveryDate'], "%Y%m%d") + timedelta(hours=18)
+            delivery_date = self._localize_address(datetime.combine(
+                parse_ymd(package['RescheduledDeliveryDate']), time(18)),
+                root['Shipment'].get('ShipTo'))
         elif 'ScheduledDeliveryDate' in root['Shipment']:
-            delivery_date = datetime.strptime(
-                root['Shipment']['ScheduledDeliveryDate'], "%Y%m%d") + timedelta(hours=18)
+            delivery_date = self._localize_address(datetime.combine(
+                parse_ymd(root['Shipment']['ScheduledDeliveryDate']), time(18)),
+                root['Shipment'].get('ShipTo'))
         else:
             delivery_date = None
-
+        # the ShipTo address may be missing or somewhere unknown too
+        delivery_date = self._guess_timezone(delivery_date)
 
         # Delivery detail may not always be available either
         if 'Description' in activity['ActivityLocation']:
@@ -140,16 +178,7 @@ class UPSInterface(BaseInterface):
 
         # add a single event, UPS doesn't seem to support multiple?
 
-        for e in package['Activity']:
-            location = self._get_event_location(e['ActivityLocation'])
-            edate = datetime.strptime(e['Date'], "%Y%m%d").date()
-            etime = datetime.strptime(e['Time'], "%H%M%S").time()
-            timestamp = datetime.combine(edate, etime)
-            trackinfo.create_event(
-                location = location,
-                detail = e['Status']['StatusType']['Description'],
-                timestamp = timestamp,
-            )
+        trackinfo.add_events(events)
 
         trackinfo.is_delivered = self.is_delivered(None, trackinfo)
         if trackinfo.is_delivered:
@@ -157,6 +186,25 @@ class UPSInterface(BaseInterface):
 
         return trackinfo
 
+    def _parse_event(self, e):
+        return TrackingEvent(
+            location = self._get_event_location(e['ActivityLocation']),
+            detail = e['Status']['StatusType']['Description'],
+            timestamp = self._localize_address(
+                parse_ymd_hms(e['Date'], e['Time']), e['ActivityLocation']),
+        )
+
+    def _localize_address(self, timestamp, location_tag):
+        """Localize {timestamp} to the <Address> in {location_tag}, the
+        ActivityLocation or ShipTo element
+        """
+        address = location_tag.get('Address') \
+            if isinstance(location_tag, dict) else None
+        if not isinstance(address, dict):
+            address = {}
+        return self._localize(timestamp, address.get('City'),
+            address.get('StateProvinceCode'), address.get('CountryCode'))
+
     def _get_event_location(self, location_tag):
         if type(location_tag) == str:
             return location_tag or 'UNKNOWN'
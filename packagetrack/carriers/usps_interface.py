@@ -1,17 +1,21 @@
 import datetime
-import requests
 
 from ..configuration import DictConfig
-from ..data import TrackingInfo
+from ..data import TrackingInfo, TrackingEvent
 from ..carriers import BaseInterface
-from ..xml_dict import xml_to_dict
+from .checksums import validate_mod10
+from .timestamps import parse_month_day_year, parse_clock_time
+from ..xml_dict import xml_to_dict, xml_to_element_dicts, xml_fragment
 from .errors import *
 
 class USPSInterface(BaseInterface):
     SHORT_NAME = 'USPS'
     LONG_NAME = 'U.S. Postal Service'
     CONFIG_NS = SHORT_NAME
+    DEFAULT_TIMEZONE = 'America/Chicago'
     DEFAULT_CFG = DictConfig({CONFIG_NS:{'server': 'production'}})
+    # TrackV2 accepts up to 10 TrackIDs per TrackFieldRequest
+    BATCH_SIZE = 10
 
     _api_urls = {
         'secure_test': 'https://secure.shippingapis.com/ShippingAPITest.dll?' \
@@ -31,24 +35,37 @@ class USPSInterface(BaseInterface):
         'RF': 'Registered Mail Foreign',
         # 'EJ': 'something?',
     }
+    # IMpb application identifiers that start 22 digit USPS numbers
+    _impb_prefixes = ('91', '92', '93', '94', '95')
     _url_template = 'http://trkcnfrm1.smi.usps.com/PTSInternetWeb/' \
         'InterLabelInquiry.do?origTrackNum={tracking_number}'
     _request_xml = '<TrackFieldRequest USERID="{userid}">' \
-        '<TrackID ID="{tracking_number}"/></TrackFieldRequest>'
+        '{track_ids}</TrackFieldRequest>'
+    _track_id_xml = '<TrackID ID="{tracking_number}"/>'
 
     @BaseInterface.require_valid_tracking_number
+    @BaseInterface.cache_tracking_info
     def track(self, tracking_number):
         resp = self._send_request(tracking_number)
         return self._parse_response(resp, tracking_number)
 
-    def identify(self, tracking_number):
+    def track_batch(self, tracking_numbers):
+        return self._track_in_batches(tracking_numbers, self._track_chunk)
+
+    def _build_identifiers(self):
         return {
             13: lambda tn: \
                 tn[0:2].isalpha() and tn[2:9].isdigit() and tn[11:13].isalpha(),
             20: lambda tn: tn.isdigit() and tn.startswith('0'),
             22: lambda tn: tn.isdigit(),
             30: lambda tn: tn.isdigit(),
-        }.get(len(tracking_number), lambda tn: False)(tracking_number)
+        }
+
+    def smart_post_claim(self, tracking_number):
+        # any valid IMpb number could be ours, but other carriers that hand
+        # packages to USPS (FedEx SmartPost) claim their own more strongly
+        return int(tracking_number.startswith(self._impb_prefixes) and \
+            validate_mod10(tracking_number))
 
     def is_delivered(self, tracking_number, tracking_info=None):
         if tracking_info is None:
@@ -56,34 +73,86 @@ class USPSInterface(BaseInterface):
         return tracking_info.status.lower() == 'delivered'
 
     def _build_request(self, tracking_number):
+        return self._build_batch_request([tracking_number])
+
+    def _build_batch_request(self, tracking_numbers):
         return self._request_xml.format(
             userid=self._cfg_value('userid'),
-            tracking_number=tracking_number)
+            track_ids=''.join(self._track_id_xml.format(tracking_number=tn) \
+                for tn in tracking_numbers))
+
+    def _track_chunk(self, tracking_numbers):
+        resp = self._send_batch_request(tracking_numbers)
+        return self._parse_batch_response(resp, tracking_numbers)
+
+    def _latest_activity(self, raw):
+        return xml_fragment(raw, 'TrackSummary')
 
     def _parse_response(self, raw, tracking_number):
-        rsp = xml_to_dict(raw)
+        with self._timer('parse'):
+            try:
+                rsp = xml_to_dict(raw)
+            except ValueError as err:
+                raise TrackingApiFailure(err)
         # this is a system error
         if 'Error' in rsp:
             error = rsp['Error']['Description']
             raise TrackingApiFailure(error)
 
-        # this is a result with an error, like "no such package"
         try:
-            if 'Error' in rsp['TrackResponse']['TrackInfo']:
-                error = rsp['TrackResponse']['TrackInfo']['Error']['Description']
-                raise TrackingNumberFailure(error)
+            track_info = rsp['TrackResponse']['TrackInfo']
         except KeyError:
             raise TrackingApiFailure(rsp)
+        with self._timer('construct'):
+            return self._parse_track_info(track_info, tracking_number)
+
+    def _parse_batch_response(self, raw, tracking_numbers):
+        """Split a response to a multi-TrackID request into (tracking_number,
+        TrackingInfo or TrackingFailure) tuples, matched up by the TrackInfo
+        element's ID attribute.
+        """
+        try:
+            with self._timer('parse'):
+                track_infos = dict((attrs.get('ID'), track_info) for attrs, \
+                    track_info in xml_to_element_dicts(raw, 'TrackInfo'))
+        except ValueError as err:
+            raise TrackingApiFailure(err)
+        if not track_infos:
+            # no TrackInfo elements at all, most likely a system error
+            rsp = xml_to_dict(raw)
+            if 'Error' in rsp:
+                raise TrackingApiFailure(rsp['Error']['Description'])
+            raise TrackingApiFailure(rsp)
+
+        with self._timer('construct'):
+            return [(tracking_number, self._parse_batch_item(track_infos,
+                tracking_number)) for tracking_number in tracking_numbers]
+
+    def _parse_batch_item(self, track_infos, tracking_number):
+        try:
+            track_info = track_infos[tracking_number]
+        except KeyError:
+            return TrackingApiFailure(
+                'No TrackInfo returned for %s' % tracking_number)
+        try:
+            return self._parse_track_info(track_info, tracking_number)
+        except TrackingFailure as err:
+            return err
+
+    def _parse_track_info(self, track_info, tracking_number):
+        # this is a result with an error, like "no such package"
+        if 'Error' in track_info:
+            raise TrackingNumberFailure(track_info['Error']['Description'])
 
         # make sure the events list is a list
         try:
-            events = rsp['TrackResponse']['TrackInfo']['TrackDetail']
+            events = track_info['TrackDetail']
         except KeyError:
             events = []
         else:
             if type(events) != list:
                 events = [events]
-        summary = rsp['TrackResponse']['TrackInfo']['TrackSummary']
+        summary = track_info['TrackSummary']
 
         # USPS doesn't return this, so we work it out from the tracking number
         service_description = self._service_types.get(tracking_number[0:2], 'USPS')
@@ -95,17 +164,11 @@ class USPSInterface(BaseInterface):
 
         # add the summary event, USPS doesn't duplicate it in the event log,
         # but we want it there
-        trackinfo.create_event(
-            location=self._getTrackingLocation(summary),
-            timestamp=self._getTrackingDate(summary),
-            detail=summary['Event'])
-
-        for e in events:
-            trackinfo.create_event(
+        trackinfo.add_events(self._consistent_timezones(TrackingEvent(
                 location = self._getTrackingLocation(e),
                 timestamp= self._getTrackingDate(e),
                 detail   = e['Event'],
-            )
+            ) for e in [summary] + events))
 
         trackinfo.is_delivered = self.is_delivered(None, trackinfo)
         if trackinfo.is_delivered:
@@ -114,20 +177,28 @@ class USPSInterface(BaseInterface):
         return trackinfo
 
     def _send_request(self, tracking_number):
-        url = self._api_urls[self._cfg_value('server')] + \
-            self._build_request(tracking_number)
-        return requests.get(url).text
+        return self._send_batch_request([tracking_number])
+
+    def _send_batch_request(self, tracking_numbers):
+        with self._timer('build'):
+            url = self._api_endpoint(
+                self._api_urls[self._cfg_value('server')]) + \
+                self._build_batch_request(tracking_numbers)
+        return self._http_request('GET', url, hedge=True).content
 
     def _getTrackingDate(self, node):
         """Returns a datetime object for the given node's
-        <EventTime> and <EventDate> elements"""
+        <EventTime> and <EventDate> elements, in the timezone of its
+        <EventCity>, <EventState> and <EventCountry>"""
         try:
-            date = datetime.datetime.strptime(node['EventDate'], '%B %d, %Y').date()
+            date = parse_month_day_year(node['EventDate'])
         except ValueError:
             date = datetime.datetime.now() - datetime.timedelta(7)
-        time = datetime.datetime.strptime(node['EventTime'], '%I:%M %p').time() \
+        time = parse_clock_time(node['EventTime']) \
             if node['EventTime'] else datetime.time(0, 0, 0)
-        return datetime.datetime.combine(date, time)
+        return self._localize(datetime.datetime.combine(date, time),
+            node.get('EventCity'), node.get('EventState'),
+            node.get('EventCountry'))
 
     def _getTrackingLocation(self, node):
         """Returns a location given a node that has
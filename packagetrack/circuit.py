@@ -0,0 +1,102 @@
+"""Circuit breaker for carrier APIs, so that when a carrier is down its
+requests fail fast instead of tying up workers until they time out.
+
+Each carrier has a CircuitBreaker that its HTTP requests pass through, set up
+from these (optional) config values in the carrier's section:
+
+    circuit_error_rate      failed fraction of recent requests that opens
+                            the circuit (0.5)
+    circuit_min_requests    requests needed before it can open (10)
+    circuit_window          seconds of requests counted (60)
+    circuit_cooldown        seconds it stays open before a trial request (30)
+
+While the circuit is open requests raise CarrierUnavailable. After the
+cooldown one trial request is let through, closing the circuit again if it
+succeeds and reopening it if it fails.
+"""
+
+import threading
+import time
+from collections import deque
+
+from .carriers.errors import CarrierUnavailable
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+class CircuitBreaker(object):
+    """Opens once at least {min_requests} requests were made in the last
+    {window} seconds and {error_rate} of them failed, then allows a trial
+    request every {cooldown} seconds until one succeeds
+    """
+
+    def __init__(self, error_rate=0.5, min_requests=10, window=60,
+            cooldown=30, clock=time.time):
+        self.error_rate = error_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started = None
+
+    @property
+    def is_open(self):
+        return self.state != CLOSED
+
+    def before_request(self, name='carrier'):
+        """Raise CarrierUnavailable if a request shouldn't be made now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = self._clock()
+            if self.state == OPEN and now - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            # a trial that never reported back doesn't block the next one
+            if self.state == HALF_OPEN and (self._trial_started is None or \
+                    now - self._trial_started >= self.cooldown):
+                self._trial_started = now
+                return
+        raise CarrierUnavailable('%s circuit is open after repeated failures'
+            % name)
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self._trial_started = None
+                self._outcomes.clear()
+                self._failures = 0
+                return
+            self._record(True)
+
+    def record_failure(self):
+        with self._lock:
+            if self.state != CLOSED:
+                self._open()
+                return
+            self._record(False)
+            if len(self._outcomes) >= self.min_requests and \
+                    self._failures >= self.error_rate * len(self._outcomes):
+                self._open()
+
+    def _record(self, ok):
+        now = self._clock()
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        while self._outcomes and self._outcomes[0][0] <= now - self.window:
+            if not self._outcomes.popleft()[1]:
+                self._failures -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = self._clock()
+        self._trial_started = None
+        self._outcomes.clear()
+        self._failures = 0
@@ -54,7 +54,7 @@ class DictConfig(ConfigurationProvider, dict):
         node = self
         for key in keys:
             try:
-                node = node.get(key)
-            except KeyError as err:
+                node = node[key]
+            except (KeyError, TypeError) as err:
                 raise ConfigKeyError(err)
         return node
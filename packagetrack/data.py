@@ -1,18 +1,28 @@
+import copy
+from collections import MutableMapping
 from operator import attrgetter
 from requests import ConnectionError
 from urllib2 import URLError
 
-from .carriers import identify_tracking_number
+from .carriers import identify_tracking_number, probe_tracking_number, \
+    get_async_pool
 from .carriers.errors import TrackingNetworkFailure
 
 class Package(object):
-    """A package to be tracked."""
+    """A package to be tracked.
+
+    Set {probe} to identify ambiguous 22 digit numbers by tracking them with
+    each possible carrier when the offline rules can't tell, the winning
+    result is then returned by the next track() instead of tracking again.
+    """
 
     _carrier = None
+    _probed_info = None
     _repr_template = '<Package(carrier={p.carrier!s}, tracking_number={p.tracking_number!r})>'
 
-    def __init__(self, tracking_number, carrier=None):
+    def __init__(self, tracking_number, carrier=None, probe=False):
         self.tracking_number = tracking_number
+        self.probe = probe
         if carrier is not None:
             self._carrier = carrier
 
@@ -25,18 +35,43 @@ class Package(object):
         """
 
         if self._carrier is None:
-            self._carrier = identify_tracking_number(self.tracking_number)
+            if self.probe:
+                self._carrier, self._probed_info = \
+                    probe_tracking_number(self.tracking_number)
+            else:
+                self._carrier = identify_tracking_number(self.tracking_number)
         return self._carrier
 
     def track(self):
         """Get the tracking info for this package, returns a TrackingInfo object
         """
 
+        carrier = self.carrier
+        if self._probed_info is not None:
+            info, self._probed_info = self._probed_info, None
+            return info
         try:
-            return self.carrier.track(self.tracking_number)
+            return carrier.track(self.tracking_number)
         except (ConnectionError, URLError) as err:
             raise TrackingNetworkFailure(err)
 
+    def track_since(self, since=None):
+        """Get only the events that are new since an earlier poll, returns
+        an (events, fingerprint) tuple, see BaseInterface.track_since()
+        """
+
+        try:
+            return self.carrier.track_since(self.tracking_number, since)
+        except (ConnectionError, URLError) as err:
+            raise TrackingNetworkFailure(err)
+
+    def track_async(self, callback=None):
+        """Track this package without blocking the caller, returns an
+        AsyncResult whose get() returns the TrackingInfo. See
+        BaseInterface.track_async()
+        """
+        return get_async_pool().apply_async(self.track, callback=callback)
+
     @property
     def url(self):
         """Returns a URL that can be used to go to the carrier's
@@ -45,7 +80,163 @@ class Package(object):
 
         return self.carrier.url(self.tracking_number)
 
-class TrackingInfo(dict):
+class _Record(object):
+    """Base for the tracking data classes, which hold tens of millions of
+    events in some uses, so they keep their attributes in __slots__ rather
+    than a dict per object.
+
+    The attributes named in _fields are slots, any other attribute a carrier
+    sets lands in the extras dict, which is only made when first needed. For
+    compatibility with when these classes were dicts, every attribute can
+    also be read and set by key, and the usual dict methods work on the
+    combined view. The _fields are required, so deleting, popping or
+    clearing only ever removes extras.
+    """
+
+    __slots__ = ('_extras',)
+    _fields = ()
+
+    def __init__(self, **kwargs):
+        self._extras = None
+        if kwargs:
+            self.update(kwargs)
+
+    @property
+    def extras(self):
+        """The dict of carrier-specific attributes"""
+        if self._extras is None:
+            self._extras = {}
+        return self._extras
+
+    def __getattr__(self, name):
+        # only called when there's no such slot or class attribute
+        try:
+            return self._extras[name]
+        except (KeyError, TypeError):
+            raise AttributeError(name)
+
+    def __setattr__(self, name, val):
+        if name in self._fields or name == '_extras':
+            object.__setattr__(self, name, val)
+        else:
+            self.extras[name] = val
+
+    def __delattr__(self, name):
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        if self._extras is None:
+            raise KeyError(key)
+        return self._extras[key]
+
+    def __setitem__(self, key, val):
+        setattr(self, key, val)
+
+    def __delitem__(self, key):
+        if key in self._fields:
+            raise KeyError('%s is required' % key)
+        if self._extras is None:
+            raise KeyError(key)
+        del self._extras[key]
+
+    def __contains__(self, key):
+        return key in self._fields or \
+            (self._extras is not None and key in self._extras)
+
+    def __iter__(self):
+        for key in self._fields:
+            yield key
+        if self._extras:
+            for key in self._extras:
+                yield key
+
+    def __len__(self):
+        return len(self._fields) + len(self._extras or ())
+
+    def __eq__(self, other):
+        if not isinstance(other, (_Record, dict)):
+            return NotImplemented
+        return dict(self.iteritems()) == dict(other.iteritems())
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    # mutable, like the dicts these used to be
+    __hash__ = None
+
+    def keys(self):
+        return list(self)
+
+    def iterkeys(self):
+        return iter(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def itervalues(self):
+        return (self[key] for key in self)
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def iteritems(self):
+        return ((key, self[key]) for key in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, *pargs, **kwargs):
+        for key, val in dict(*pargs, **kwargs).iteritems():
+            self[key] = val
+
+    def pop(self, key, *default):
+        try:
+            val = self[key]
+            del self[key]
+        except KeyError:
+            if default and key not in self._fields:
+                return default[0]
+            raise
+        return val
+
+    def popitem(self):
+        if not self._extras:
+            raise KeyError('popitem(): no extras')
+        return self._extras.popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        self._extras = None
+
+    def copy(self):
+        """A shallow copy, like dict.copy()"""
+        other = copy.copy(self)
+        if self._extras is not None:
+            other._extras = dict(self._extras)
+        return other
+
+    def _get_fields(self):
+        return tuple(object.__getattribute__(self, name) for name in self._fields)
+
+    def __setstate__(self, extras):
+        self._extras = extras
+
+MutableMapping.register(_Record)
+
+class TrackingInfo(_Record):
     """Generic tracking information object returned by a tracking request
 
     Only the tracking_number, delivery_date, location, last_update and status
@@ -53,26 +244,33 @@ class TrackingInfo(dict):
 
     timestamp and last_update will always be datetime objects, the delivery_date
     will be as well, unless it wasn't provided in which case it will be None
+
+    carrier is the SHORT_NAME of the carrier that returned the info
     """
 
+    __slots__ = _fields = ('tracking_number', 'delivery_date', 'is_delivered',
+        'events', 'carrier')
     _repr_template = '<TrackingInfo(tracking_number={i.tracking_number!r}, timestamp={ts})>'
 
-    def __init__(self, tracking_number, delivery_date=None, is_delivered=False, **kwargs):
+    def __init__(self, tracking_number, delivery_date=None, is_delivered=False,
+            carrier=None, **kwargs):
         self.tracking_number = tracking_number
         self.delivery_date = delivery_date
         self.is_delivered = is_delivered
         self.events = []
-        self.update(kwargs)
-
-    def __getattr__(self, name):
-        return self[name]
-
-    def __setattr__(self, name, val):
-        self[name] = val
+        self.carrier = carrier
+        super(TrackingInfo, self).__init__(**kwargs)
 
     def __repr__(self):
         return self._repr_template.format(i=self, ts=self.last_update.isoformat())
 
+    def __reduce__(self):
+        return (TrackingInfo, self._get_fields()[:3],
+            (self.events, self.carrier, self._extras))
+
+    def __setstate__(self, state):
+        self.events, self.carrier, self._extras = state
+
     @property
     def location(self):
         """A shortcut to the location of the latest event for this package
@@ -95,17 +293,36 @@ class TrackingInfo(dict):
         """Create a new event with these attributes, events do not need to be added
         in order
         """
-        event = TrackingEvent(timestamp, location, detail)
-        event.update(kwargs)
-        return self.add_event(event)
+        return self.add_event(TrackingEvent(timestamp, location, detail, **kwargs))
 
     def add_event(self, event):
         """Add a new TrackingEvent object to this package, events do not need to
         be added in order
         """
-        self.events = self.sort_events(self.events + [event])
+        events = self.events
+        timestamp = event.timestamp
+        if not events or events[-1].timestamp <= timestamp:
+            events.append(event)
+            return event
+        # binary search for the position after any events with the same
+        # timestamp, so those keep the order they were added in
+        lo, hi = 0, len(events)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if timestamp < events[mid].timestamp:
+                hi = mid
+            else:
+                lo = mid + 1
+        events.insert(lo, event)
         return event
 
+    def add_events(self, events):
+        """Add several TrackingEvent objects to this package at once, sorting
+        only once, events do not need to be in order
+        """
+        self.events.extend(events)
+        self.events.sort(key=attrgetter('timestamp'))
+
     def sort_events(self, events=None):
         """Sort a list of events by timestamp, defaults to this package's events
         """
@@ -113,26 +330,25 @@ class TrackingInfo(dict):
             events = self.events
         return sorted(events, key=attrgetter('timestamp'))
 
-class TrackingEvent(dict):
+class TrackingEvent(_Record):
     """An individual tracking event, like a status change
 
     Only the timestamp, location, and detail attributes are required, but a
     carrier may add other information if available. timestamp is always a
     datetime object.
     """
+
+    __slots__ = _fields = ('timestamp', 'location', 'detail')
     _repr_template = '<TrackingEvent(timestamp={ts}, location={e.location!r}, detail={e.detail!r})>'
 
     def __init__(self, timestamp, location, detail, **kwargs):
         self.timestamp = timestamp
         self.location = location
         self.detail = detail
-        self.update(kwargs)
-
-    def __getattr__(self, name):
-        return self[name]
-
-    def __setattr__(self, name, val):
-        self[name] = val
+        super(TrackingEvent, self).__init__(**kwargs)
 
     def __repr__(self):
         return self._repr_template.format(e=self, ts=self.timestamp.isoformat())
+
+    def __reduce__(self):
+        return (TrackingEvent, self._get_fields(), self._extras)
@@ -0,0 +1,135 @@
+"""Export tracking results as columns, one row per tracking event, for
+loading into dataframes or analytics storage.
+
+    >>> from packagetrack.export import to_columns, to_arrow, write_parquet
+    >>> columns = to_columns(infos)
+    >>> columns['detail'][0]
+    'Delivered'
+    >>> table = to_arrow(infos)
+    >>> write_parquet(infos, 'sweep.parquet')
+
+to_arrow() and write_parquet() need pyarrow installed. write_parquet() takes
+any iterable, including a generator, and writes it in row groups of
+{batch_size} packages, so a large sweep never has to be held in memory:
+
+    >>> results = track_many(numbers)
+    >>> write_parquet((info for tn, info in results \\
+    ...     if isinstance(info, TrackingInfo)), 'sweep.parquet')
+
+Packages without any events have no rows. The timestamp column holds the
+events' datetimes as they are. utc_offset is the seconds each one is ahead
+of UTC, and timezone_guessed is whether the zone is the carrier's default
+because the event's place was unknown, see BaseInterface.DEFAULT_TIMEZONE.
+Arrow has no per-row zone, so in to_arrow()'s tables the timestamp is:
+
+    UTC, where utc_offset isn't null: the local time is timestamp +
+        utc_offset
+    the carrier's local time, where utc_offset is null: the timestamp was
+        naive, which only happens without pytz
+"""
+
+from itertools import islice
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+COLUMNS = ('tracking_number', 'carrier', 'timestamp', 'utc_offset',
+    'timezone_guessed', 'location', 'detail', 'is_delivered')
+
+# packages per Parquet row group
+PARQUET_BATCH_SIZE = 10000
+
+def to_columns(infos):
+    """Convert TrackingInfo objects to a dict of column name to list of
+    values, with a row per event
+    """
+    tracking_numbers = []
+    carriers = []
+    timestamps = []
+    offsets = []
+    guessed = []
+    locations = []
+    details = []
+    delivered = []
+    for info in infos:
+        events = info.events
+        count = len(events)
+        tracking_numbers.extend([info.tracking_number] * count)
+        carriers.extend([info.carrier] * count)
+        delivered.extend([info.is_delivered] * count)
+        for event in events:
+            timestamps.append(event.timestamp)
+            offsets.append(_utc_offset(event.timestamp))
+            guessed.append(bool(event.get('timezone_guessed')))
+            locations.append(event.location)
+            details.append(event.detail)
+    return dict(zip(COLUMNS, (tracking_numbers, carriers, timestamps,
+        offsets, guessed, locations, details, delivered)))
+
+def arrow_schema():
+    """The pyarrow schema of to_arrow()'s tables
+    """
+    _require_pyarrow()
+    return pyarrow.schema([
+        ('tracking_number', pyarrow.string()),
+        ('carrier', pyarrow.string()),
+        ('timestamp', pyarrow.timestamp('us')),
+        ('utc_offset', pyarrow.int32()),
+        ('timezone_guessed', pyarrow.bool_()),
+        ('location', pyarrow.string()),
+        ('detail', pyarrow.string()),
+        ('is_delivered', pyarrow.bool_()),
+    ])
+
+def to_arrow(infos):
+    """Convert TrackingInfo objects to a pyarrow Table with a row per event
+    """
+    schema = arrow_schema()
+    columns = to_columns(infos)
+    columns['timestamp'] = [_utc(t) for t in columns['timestamp']]
+    return pyarrow.Table.from_arrays(
+        [pyarrow.array(columns[field.name], type=field.type) \
+            for field in schema],
+        schema=schema)
+
+def write_parquet(infos, path, batch_size=PARQUET_BATCH_SIZE, **kwargs):
+    """Stream TrackingInfo objects to a Parquet file at {path}, extra keyword
+    arguments are passed on to pyarrow.parquet.ParquetWriter. Returns the
+    number of rows written.
+    """
+    schema = arrow_schema()
+    writer = pyarrow.parquet.ParquetWriter(path, schema, **kwargs)
+    rows = 0
+    try:
+        infos = iter(infos)
+        while True:
+            batch = list(islice(infos, batch_size))
+            if not batch:
+                break
+            table = to_arrow(batch)
+            if table.num_rows:
+                writer.write_table(table)
+                rows += table.num_rows
+    finally:
+        writer.close()
+    return rows
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError('pyarrow is needed for Arrow and Parquet export')
+
+def _utc(timestamp):
+    """An aware {timestamp} as naive UTC, a naive one as it is"""
+    if timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.replace(tzinfo=None) - timestamp.utcoffset()
+
+def _utc_offset(timestamp):
+    """The seconds an aware {timestamp} is ahead of UTC, None if it's naive"""
+    offset = timestamp.utcoffset()
+    if offset is None:
+        return None
+    return offset.days * 86400 + offset.seconds
@@ -0,0 +1,149 @@
+"""Hedged requests, to cut the tail latency caused by the occasional slow
+backend host.
+
+When a carrier's tracking request hasn't been answered within the usual
+response time, a duplicate request is sent and whichever answers first is
+used. Hedging is off unless these config values are set in the carrier's
+section:
+
+    hedge_percentile        percentile of recent response times to wait
+                            before hedging, e.g. 95 (off when not set)
+    hedge_budget            most extra requests hedging may add, as a
+                            fraction of all requests (0.05)
+    hedge_min_samples       responses timed before hedging starts (20)
+    hedge_min_delay         fewest seconds to wait before hedging (0.05)
+
+The slower request can't be interrupted once it has been sent, its response
+is discarded and closed when it arrives, so its connection goes back to the
+pool. Only read-only requests (the carriers' tracking calls) are hedged.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from Queue import Queue, Empty
+
+class Hedger(object):
+    """Runs request attempts, sending a second one when the first is slower
+    than the {percentile}th percentile of the last {window} response times,
+    while hedges stay within {budget} of all requests
+    """
+
+    def __init__(self, percentile=95, budget=0.05, min_samples=20,
+            min_delay=0.05, window=200):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        """Seconds to wait for the first attempt before hedging, or None if
+        it shouldn't be hedged
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.percentile / 100.0),
+            len(latencies) - 1)
+        return max(latencies[index], self.min_delay)
+
+    def call(self, attempt):
+        """Call {attempt}, which makes one request and returns its response,
+        hedging it with a second call if it's slow. Returns the first
+        response, or raises the first attempt's error if both fail.
+        """
+        with self._lock:
+            self.requests += 1
+        delay = self.delay()
+        if delay is None:
+            return self._timed(attempt)
+
+        outcomes = Queue()
+        state = {'done': False}
+        self._start(attempt, outcomes, state, False)
+        pending = 1
+        try:
+            outcome = outcomes.get(timeout=delay)
+        except Empty:
+            if self._take_budget():
+                self._start(attempt, outcomes, state, True)
+                pending += 1
+            outcome = outcomes.get()
+        errors = []
+        while True:
+            hedge, response, exc_info = outcome
+            pending -= 1
+            if exc_info is None:
+                self._won(state, outcomes, hedge)
+                return response
+            errors.append(outcome)
+            if not pending:
+                break
+            outcome = outcomes.get()
+        # the first attempt's error, it's the one that would have been seen
+        # without hedging
+        exc_info = min(errors, key=lambda o: o[0])[2]
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+    def _timed(self, attempt):
+        start = time.time()
+        response = attempt()
+        self._record(time.time() - start)
+        return response
+
+    def _record(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _take_budget(self):
+        with self._lock:
+            if self.hedged + 1 > self.budget * self.requests:
+                return False
+            self.hedged += 1
+            return True
+
+    def _start(self, attempt, outcomes, state, hedge):
+        thread = threading.Thread(target=self._run,
+            args=(attempt, outcomes, state, hedge))
+        thread.daemon = True
+        thread.start()
+
+    def _run(self, attempt, outcomes, state, hedge):
+        start = time.time()
+        try:
+            outcome = (hedge, attempt(), None)
+        except Exception:
+            outcome = (hedge, None, sys.exc_info())
+        else:
+            if not hedge:
+                self._record(time.time() - start)
+        with self._lock:
+            if not state['done']:
+                outcomes.put(outcome)
+            elif outcome[2] is None:
+                _close(outcome[1])
+
+    def _won(self, state, outcomes, hedge):
+        """Stop waiting for the other attempt, closing its response if it
+        already arrived
+        """
+        with self._lock:
+            state['done'] = True
+            if hedge:
+                self.hedge_wins += 1
+            while not outcomes.empty():
+                _, response, exc_info = outcomes.get_nowait()
+                if exc_info is None:
+                    _close(response)
+
+def _close(response):
+    close = getattr(response, 'close', None)
+    if close is not None:
+        close()
@@ -0,0 +1,230 @@
+"""Timings and counts from the carriers, to see where the time in a track()
+goes.
+
+Every carrier reports to its metrics sink, a NullSink that drops everything
+unless another is set:
+
+    >>> from packagetrack.metrics import HistogramSink
+    >>> sink = HistogramSink()
+    >>> carrier.metrics = sink
+    >>> carrier.track(tracking_number)
+    >>> sink.snapshot()[('UPS', 'send')]
+    {'count': 1, 'sum': 0.41, 'min': 0.41, 'max': 0.41, 'p50': 0.41, ...}
+
+These are reported for each carrier, timings are in seconds:
+
+    track           a whole track() call, not counting cached results
+    build           building a request
+    send            sending a request and reading the response, retries
+                    included
+    response_size   bytes in a response
+    parse           parsing a response's XML or JSON
+    construct       making the TrackingInfo from the parsed response
+    failures.<Name> count of each TrackingFailure subclass raised or
+                    reported, by class name
+
+Besides HistogramSink, StatsdSink hands every metric to a callback, for any
+statsd client, and PrometheusSink keeps histograms to dump in the Prometheus
+text format. Sinks are called from every thread tracking with the carrier.
+"""
+
+import threading
+import time
+from collections import deque
+
+class MetricsSink(object):
+    """Basic sink interface, sinks should inherit from this and implement
+    histogram() and increment()
+    """
+
+    def timing(self, carrier, name, seconds):
+        self.histogram(carrier, name, seconds)
+
+    def histogram(self, carrier, name, value):
+        raise NotImplementedError()
+
+    def increment(self, carrier, name, count=1):
+        raise NotImplementedError()
+
+class NullSink(MetricsSink):
+    """Drops every metric, the default for carriers"""
+
+    def timing(self, carrier, name, seconds):
+        pass
+
+    def histogram(self, carrier, name, value):
+        pass
+
+    def increment(self, carrier, name, count=1):
+        pass
+
+class HistogramSink(MetricsSink):
+    """Keeps metrics in memory, snapshot() summarizes them. Percentiles are
+    of the last {reservoir_size} values of each metric.
+    """
+
+    PERCENTILES = (50, 90, 95, 99)
+
+    def __init__(self, reservoir_size=1024):
+        self.reservoir_size = reservoir_size
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, carrier, name, value):
+        key = (str(carrier), name)
+        with self._lock:
+            try:
+                stats = self._histograms[key]
+            except KeyError:
+                stats = self._histograms[key] = \
+                    [0, 0.0, value, value, deque(maxlen=self.reservoir_size)]
+            stats[0] += 1
+            stats[1] += value
+            stats[2] = min(stats[2], value)
+            stats[3] = max(stats[3], value)
+            stats[4].append(value)
+
+    def increment(self, carrier, name, count=1):
+        key = (str(carrier), name)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + count
+
+    def snapshot(self):
+        """Return a dict keyed by (carrier, name) tuples, of a dict of count,
+        sum, min, max and percentiles for histograms and of the count for
+        counters
+        """
+        with self._lock:
+            histograms = [(key, stats[:4], sorted(stats[4])) \
+                for key, stats in self._histograms.iteritems()]
+            snapshot = dict(self._counters)
+        for key, (count, total, low, high), values in histograms:
+            summary = {'count': count, 'sum': total, 'min': low, 'max': high}
+            for percentile in self.PERCENTILES:
+                summary['p%d' % percentile] = values[min(
+                    int(len(values) * percentile / 100.0), len(values) - 1)]
+            snapshot[key] = summary
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+class StatsdSink(MetricsSink):
+    """Calls {callback} with (metric, value, type) for every metric, where
+    metric is like '{prefix}.UPS.send' and type is one of the statsd types
+    'ms' (timings, in milliseconds), 'h' (histograms) or 'c' (counters)
+    """
+
+    def __init__(self, callback, prefix='packagetrack'):
+        self.callback = callback
+        self.prefix = prefix
+
+    def timing(self, carrier, name, seconds):
+        self.callback(self._metric(carrier, name), seconds * 1000.0, 'ms')
+
+    def histogram(self, carrier, name, value):
+        self.callback(self._metric(carrier, name), value, 'h')
+
+    def increment(self, carrier, name, count=1):
+        self.callback(self._metric(carrier, name), count, 'c')
+
+    def _metric(self, carrier, name):
+        return '%s.%s.%s' % (self.prefix, carrier, name)
+
+class PrometheusSink(MetricsSink):
+    """Keeps cumulative histograms and counters, dump() returns them in the
+    Prometheus text exposition format, e.g. for a /metrics handler
+    """
+
+    SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+        0.25, 0.5, 1, 2.5, 5, 10)
+    BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+    def __init__(self, namespace='packagetrack'):
+        self.namespace = namespace
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def timing(self, carrier, name, seconds):
+        self._observe('%s_seconds' % name, str(carrier), seconds,
+            self.SECONDS_BUCKETS)
+
+    def histogram(self, carrier, name, value):
+        if name.endswith('_size'):
+            self._observe(name + '_bytes', str(carrier), value,
+                self.BYTES_BUCKETS)
+        else:
+            self._observe(name, str(carrier), value, self.SECONDS_BUCKETS)
+
+    def increment(self, carrier, name, count=1):
+        metric, _, kind = name.partition('.')
+        key = ('%s_total' % metric, str(carrier), kind)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + count
+
+    def dump(self):
+        lines = []
+        with self._lock:
+            histograms = sorted((key, list(counts), total) for key, \
+                (counts, total) in self._histograms.iteritems())
+            counters = sorted(self._counters.iteritems())
+        typed = set()
+        for (metric, carrier, buckets), counts, total in histograms:
+            name = '%s_%s' % (self.namespace, metric)
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE %s histogram' % name)
+            cumulative = 0
+            for bound, count in zip(buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append('%s_bucket{carrier="%s",le="%s"} %d' % (
+                    name, carrier, bound, cumulative))
+            lines.append('%s_sum{carrier="%s"} %r' % (name, carrier, total))
+            lines.append('%s_count{carrier="%s"} %d' % (name, carrier,
+                cumulative))
+        for (metric, carrier, kind), count in counters:
+            name = '%s_%s' % (self.namespace, metric)
+            if name not in typed:
+                typed.add(name)
+                lines.append('# TYPE %s counter' % name)
+            labels = 'carrier="%s"' % carrier
+            if kind:
+                labels += ',type="%s"' % kind
+            lines.append('%s{%s} %d' % (name, labels, count))
+        return '\n'.join(lines) + '\n'
+
+    def _observe(self, metric, carrier, value, buckets):
+        key = (metric, carrier, buckets)
+        index = len(buckets)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            try:
+                counts, total = self._histograms[key]
+            except KeyError:
+                counts, total = [0] * (len(buckets) + 1), 0
+            counts[index] += 1
+            self._histograms[key] = (counts, total + value)
+
+class Timer(object):
+    """Context manager reporting the time its block took to {sink}"""
+
+    __slots__ = ('sink', 'carrier', 'name', 'start')
+
+    def __init__(self, sink, carrier, name):
+        self.sink = sink
+        self.carrier = carrier
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sink.timing(self.carrier, self.name, time.time() - self.start)
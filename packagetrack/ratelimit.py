@@ -0,0 +1,196 @@
+"""Rate limiting and quota accounting for carrier API requests.
+
+Every carrier has a RateLimiter that its HTTP requests pass through, set up
+from these (optional) config values in the carrier's section:
+
+    rate_limit          requests per second, unlimited if not set
+    rate_burst          requests allowed at once after idling (rate_limit)
+    daily_quota         requests per UTC day, unlimited if not set
+    rate_limit_file     file to keep the limiter's state in, shared by every
+                        process using the same file
+
+Requests over the rate wait for their turn, once the daily quota is used up
+TrackingQuotaExceeded is raised instead of making the request. The counters
+are available whether or not any limits are set:
+
+    >>> carrier.rate_limiter.used_today
+    1042
+    >>> carrier.rate_limiter.remaining_today
+    8958
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .carriers.errors import TrackingQuotaExceeded
+
+class RateLimiter(object):
+    """Token bucket allowing {rate} requests per second with bursts of up to
+    {burst}, plus a {daily_quota} of requests per UTC day. A None rate or
+    quota is unlimited. State is kept in {store}, a MemoryRateStore unless
+    given, which is safe to share between threads.
+    """
+
+    def __init__(self, rate=None, burst=None, daily_quota=None, store=None,
+            clock=time.time, sleep=time.sleep):
+        self.rate = rate
+        self.burst = max(burst or rate or 1, 1)
+        self.daily_quota = daily_quota
+        self.store = store if store is not None else MemoryRateStore()
+        self._clock = clock
+        self._sleep = sleep
+
+    def acquire(self):
+        """Take one request from the limiter, waiting until the rate allows
+        it. Raises TrackingQuotaExceeded if the daily quota is used up.
+        """
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            self._sleep(wait)
+
+    def try_acquire(self):
+        """Take one request from the limiter if the rate allows it now,
+        returns 0 if it did, otherwise the seconds to wait before trying
+        again. Raises TrackingQuotaExceeded if the daily quota is used up.
+        """
+        wait = self.store.update(self._take)
+        if wait is None:
+            raise TrackingQuotaExceeded('daily quota of %d requests used up' %
+                self.daily_quota)
+        return wait
+
+    @property
+    def used_today(self):
+        """Requests made so far today (UTC)"""
+        return self._today(self.store.read()).get('used', 0)
+
+    @property
+    def remaining_today(self):
+        """Requests left in today's quota, None if there isn't a quota"""
+        if self.daily_quota is None:
+            return None
+        return max(self.daily_quota - self.used_today, 0)
+
+    @property
+    def total(self):
+        """Requests made since the store was created"""
+        return self.store.read().get('total', 0)
+
+    def _today(self, state):
+        day = time.strftime('%Y-%m-%d', time.gmtime(self._clock()))
+        if state.get('day') != day:
+            state = dict(state, day=day, used=0)
+        return state
+
+    def _take(self, state):
+        """Runs with the store locked, returns the new state and either 0 if
+        the request can go ahead, the seconds to wait before trying again or
+        None if the quota is used up
+        """
+        now = self._clock()
+        state = self._today(state)
+        if self.daily_quota is not None and state['used'] >= self.daily_quota:
+            return state, None
+        if self.rate is not None:
+            tokens = min(self.burst, state.get('tokens', self.burst) +
+                (now - state.get('updated', now)) * self.rate)
+            state['updated'] = now
+            if tokens < 1:
+                state['tokens'] = tokens
+                return state, (1 - tokens) / self.rate
+            state['tokens'] = tokens - 1
+        state['used'] += 1
+        state['total'] = state.get('total', 0) + 1
+        return state, 0
+
+class MemoryRateStore(object):
+    """Keeps a limiter's state in memory, shared by the threads of one
+    process
+    """
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def read(self):
+        with self._lock:
+            return dict(self._state)
+
+    def update(self, func):
+        """Call {func} with the current state, which returns the new state
+        and a result to return, while no other update can run
+        """
+        with self._lock:
+            self._state, result = func(dict(self._state))
+            return result
+
+class FileRateStore(object):
+    """Keeps a limiter's state in a JSON file at {path}, locked with flock()
+    while it's updated, so several processes can share a limiter
+    """
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise NotImplementedError('FileRateStore needs fcntl')
+        self.path = path
+        self._lock = threading.Lock()
+
+    def read(self):
+        with self._locked() as handle:
+            return self._load(handle)
+
+    def update(self, func):
+        with self._locked() as handle:
+            state, result = func(self._load(handle))
+            handle.seek(0)
+            handle.truncate()
+            json.dump(state, handle)
+            handle.flush()
+            return result
+
+    def _load(self, handle):
+        handle.seek(0)
+        data = handle.read()
+        if not data:
+            return {}
+        try:
+            return json.loads(data)
+        except ValueError:
+            return {}
+
+    def _locked(self):
+        return _FileLock(self.path, self._lock)
+
+class _FileLock(object):
+    """Holds the thread lock and an exclusive flock() on the open file"""
+
+    def __init__(self, path, lock):
+        self.path = path
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0644)
+            self.handle = os.fdopen(fd, 'r+')
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        except:
+            self.lock.release()
+            raise
+        return self.handle
+
+    def __exit__(self, *exc_info):
+        try:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+        finally:
+            self.lock.release()
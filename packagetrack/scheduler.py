@@ -0,0 +1,321 @@
+"""Keep polling a large set of packages until they're delivered.
+
+Tracking numbers are kept in a ShipmentStore, an SQLite database so the set
+survives restarts. Each run of the Scheduler tracks the packages that are due
+with track_many() and asks its PollingPolicy when each should be polled next:
+soon after its status changes or near its estimated delivery, less and less
+often while it sits unchanged in transit, and never again once delivered.
+
+    >>> from packagetrack.scheduler import Scheduler, ShipmentStore
+    >>> store = ShipmentStore('/var/lib/packagetrack/shipments.db')
+    >>> store.add(numbers)
+    >>> scheduler = Scheduler(store, max_workers=16,
+    ...     carrier_budgets={'UPS': 2000, 'USPS': 500})
+    >>> for tracking_number, result in scheduler.run_once():
+    ...     print tracking_number, result
+
+carrier_budgets caps the polls of each carrier per hour, when a carrier's
+budget runs out its most overdue packages are polled first once it refills.
+Scheduler.run() repeats run_once() until every package is done.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+from .batch import track_many, DEFAULT_MAX_WORKERS
+from .carriers import identify_tracking_number
+from .carriers.errors import TrackingFailure, UnsupportedTrackingNumber, \
+    InvalidTrackingNumber
+
+ACTIVE = 'active'
+DELIVERED = 'delivered'
+FAILED = 'failed'
+
+Shipment = namedtuple('Shipment', ['tracking_number', 'carrier', 'state',
+    'next_poll', 'interval', 'last_status', 'polls', 'failures'])
+
+class PollingPolicy(object):
+    """Decides how long to wait before polling a package again, all times
+    are in seconds.
+
+    A package whose status changed is polled again after {interval}, or the
+    carrier's entry in {carrier_intervals}. Each poll that finds nothing new
+    multiplies the wait by {backoff}, up to {max_interval}. Within
+    {near_delivery_window} either side of the estimated delivery date it's
+    polled every {near_delivery_interval} instead, while the estimate is
+    further away there's no point polling much before it, and once it's
+    that long past due the package is stuck and backs off as usual. Failed
+    polls are retried after {failure_interval}, backing off the same way,
+    until {max_failures} in a row. Delivered packages and numbers no carrier
+    accepts are never polled again.
+    """
+
+    def __init__(self, interval=3600, max_interval=12 * 3600, backoff=2.0,
+            near_delivery_window=24 * 3600, near_delivery_interval=1800,
+            failure_interval=900, max_failures=10, carrier_intervals=None):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.near_delivery_window = near_delivery_window
+        self.near_delivery_interval = near_delivery_interval
+        self.failure_interval = failure_interval
+        self.max_failures = max_failures
+        self.carrier_intervals = carrier_intervals or {}
+
+    def next_interval(self, shipment, result, changed, now):
+        """Return the seconds until {shipment} should next be polled, given
+        the {result} of polling it at {now}, or None to stop polling it.
+        {changed} is whether the status differs from the last poll.
+        """
+        if isinstance(result, TrackingFailure):
+            if isinstance(result, (InvalidTrackingNumber,
+                    UnsupportedTrackingNumber)) or \
+                    shipment.failures + 1 >= self.max_failures:
+                return None
+            return min(self.failure_interval * \
+                self.backoff ** shipment.failures, self.max_interval)
+        if result.is_delivered:
+            return None
+
+        base = self.carrier_intervals.get(shipment.carrier, self.interval)
+        if changed or not shipment.interval:
+            interval = base
+        else:
+            interval = min(shipment.interval * self.backoff, self.max_interval)
+
+        until_delivery = self._until_delivery(result.delivery_date, now)
+        if until_delivery is not None:
+            if abs(until_delivery) <= self.near_delivery_window:
+                interval = min(interval, self.near_delivery_interval)
+            elif until_delivery > 0:
+                # wake up when the delivery window opens, but not later
+                # than the interval would
+                interval = min(max(interval,
+                    until_delivery - self.near_delivery_window),
+                    self.max_interval)
+        return interval
+
+    def _until_delivery(self, delivery_date, now):
+        if delivery_date is None:
+            return None
+        if not isinstance(delivery_date, datetime):
+            delivery_date = datetime.combine(delivery_date,
+                datetime.min.time())
+        if delivery_date.tzinfo is not None:
+            delivery_date = delivery_date.replace(tzinfo=None) - \
+                delivery_date.utcoffset()
+            now = datetime.utcfromtimestamp(now)
+        else:
+            now = datetime.fromtimestamp(now)
+        delta = delivery_date - now
+        return delta.days * 86400 + delta.seconds
+
+class ShipmentStore(object):
+    """The tracking numbers being polled and their schedule, stored in an
+    SQLite database at {path} (in memory by default)
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS shipments ('
+                'tracking_number TEXT PRIMARY KEY, '
+                'carrier TEXT, '
+                'state TEXT NOT NULL, '
+                'next_poll REAL NOT NULL, '
+                'interval REAL, '
+                'last_status TEXT, '
+                'polls INTEGER NOT NULL DEFAULT 0, '
+                'failures INTEGER NOT NULL DEFAULT 0)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS shipments_due '
+                'ON shipments (state, next_poll)')
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM shipments').fetchone()[0]
+
+    def add(self, tracking_numbers, now=None):
+        """Start polling {tracking_numbers}, they're due immediately. Numbers
+        already in the store are left alone.
+        """
+        if now is None:
+            now = time.time()
+        rows = []
+        for tracking_number in tracking_numbers:
+            try:
+                carrier = str(identify_tracking_number(tracking_number))
+                state = ACTIVE
+            except TrackingFailure:
+                carrier, state = None, FAILED
+            rows.append((tracking_number, carrier, state, now))
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR IGNORE INTO shipments '
+                '(tracking_number, carrier, state, next_poll) '
+                'VALUES (?, ?, ?, ?)', rows)
+
+    def remove(self, tracking_numbers):
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM shipments '
+                'WHERE tracking_number = ?',
+                ((tn,) for tn in tracking_numbers))
+
+    def get(self, tracking_number):
+        """Return the Shipment for {tracking_number}, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM shipments '
+                'WHERE tracking_number = ?', (tracking_number,)).fetchone()
+        return None if row is None else Shipment(*row)
+
+    def due(self, now=None, limit=None):
+        """Return the active Shipments due to be polled by {now}, the most
+        overdue first
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM shipments '
+                'WHERE state = ? AND next_poll <= ? ORDER BY next_poll '
+                'LIMIT ?', (ACTIVE, now, -1 if limit is None else limit))
+            return [Shipment(*row) for row in rows]
+
+    def next_due(self, exclude=()):
+        """Return when the next active shipment is due, or None if there are
+        none left, ignoring the carriers in {exclude}
+        """
+        exclude = list(exclude)
+        with self._lock:
+            return self._conn.execute('SELECT MIN(next_poll) FROM shipments '
+                'WHERE state = ? AND carrier NOT IN (%s)' % \
+                ', '.join('?' * len(exclude)),
+                [ACTIVE] + exclude).fetchone()[0]
+
+    def update(self, shipment):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE shipments SET state = ?, '
+                'next_poll = ?, interval = ?, last_status = ?, polls = ?, '
+                'failures = ? WHERE tracking_number = ?', (shipment.state,
+                    shipment.next_poll, shipment.interval,
+                    shipment.last_status, shipment.polls, shipment.failures,
+                    shipment.tracking_number))
+
+class Scheduler(object):
+    """Polls the due shipments in {store} on a pool of {max_workers} threads,
+    following {policy} (a default PollingPolicy if not given).
+
+    {carrier_budgets} is a dict of the most polls per hour for each
+    carrier's SHORT_NAME, carriers missing from it are unlimited.
+    {per_carrier_concurrency} is passed on to track_many().
+    """
+
+    BUDGET_PERIOD = 3600
+
+    def __init__(self, store, policy=None, max_workers=DEFAULT_MAX_WORKERS,
+            carrier_budgets=None, per_carrier_concurrency=None):
+        self.store = store
+        self.policy = policy or PollingPolicy()
+        self.max_workers = max_workers
+        self.carrier_budgets = carrier_budgets or {}
+        self.per_carrier_concurrency = per_carrier_concurrency
+        self._spent = {}
+
+    def run_once(self, now=None):
+        """Poll every shipment that is due and within its carrier's budget,
+        returns the list of (tracking_number, result) tuples
+        """
+        if now is None:
+            now = time.time()
+        shipments = dict((s.tracking_number, s) for s in \
+            self._within_budget(self.store.due(now), now))
+        if not shipments:
+            return []
+        results = list(track_many(shipments, self.max_workers,
+            self.per_carrier_concurrency))
+        for tracking_number, result in results:
+            self.store.update(self._reschedule(shipments[tracking_number],
+                result, now))
+        return results
+
+    def run(self, idle_sleep=60, sleep=time.sleep, clock=time.time):
+        """Keep polling until every shipment is done, sleeping between runs
+        until the next one is due, but no longer than {idle_sleep} seconds so
+        newly added shipments are picked up. Shipments of a carrier that has
+        used up its budget wait for the budget to refill.
+        """
+        while True:
+            self.run_once(clock())
+            if self.store.next_due() is None:
+                return
+            now = clock()
+            refills = self._refills(now)
+            wake = [refill for refill in refills.itervalues() \
+                if refill is not None]
+            next_due = self.store.next_due(exclude=refills)
+            if next_due is not None:
+                wake.append(next_due)
+            delay = min(wake) - now if wake else idle_sleep
+            sleep(min(max(delay, 0), idle_sleep))
+
+    def _within_budget(self, shipments, now):
+        for shipment in shipments:
+            budget = self.carrier_budgets.get(shipment.carrier)
+            if budget is None:
+                yield shipment
+                continue
+            spent = self._spent_since(shipment.carrier, now)
+            if len(spent) < budget:
+                spent.append(now)
+                yield shipment
+
+    def _spent_since(self, carrier, now):
+        """Return the deque of times {carrier} was polled within the budget
+        period before {now}
+        """
+        spent = self._spent.setdefault(carrier, deque())
+        while spent and spent[0] <= now - self.BUDGET_PERIOD:
+            spent.popleft()
+        return spent
+
+    def _refills(self, now):
+        """Return a dict of the carriers whose budget is used up, and when
+        each can poll again (None if never)
+        """
+        refills = {}
+        for carrier, budget in self.carrier_budgets.iteritems():
+            spent = self._spent_since(carrier, now)
+            if len(spent) >= budget:
+                refills[carrier] = spent[0] + self.BUDGET_PERIOD \
+                    if spent else None
+        return refills
+
+    def _reschedule(self, shipment, result, now):
+        if isinstance(result, TrackingFailure):
+            status, changed = shipment.last_status, False
+        else:
+            status = self._status_of(result)
+            changed = status != shipment.last_status
+        interval = self.policy.next_interval(shipment, result, changed, now)
+        if interval is None:
+            state = FAILED if isinstance(result, TrackingFailure) \
+                else DELIVERED
+            next_poll = now
+        else:
+            state = ACTIVE
+            next_poll = now + interval
+        failures = shipment.failures + 1 \
+            if isinstance(result, TrackingFailure) else 0
+        return shipment._replace(state=state, next_poll=next_poll,
+            interval=interval, last_status=status, polls=shipment.polls + 1,
+            failures=failures)
+
+    def _status_of(self, info):
+        if not info.events:
+            return None
+        latest = info.events[-1]
+        return u'%s|%s|%s' % (latest.timestamp.isoformat(), latest.location,
+            latest.detail)
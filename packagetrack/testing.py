@@ -0,0 +1,625 @@
+"""A local simulator of the UPS, USPS, DHL and Prestige tracking APIs, for
+load testing without touching (or being billed by) the real ones.
+
+The simulator answers tracking requests with responses shaped like the
+carriers' own, after a configurable latency, and can fail a share of them
+with server errors or dropped connections and throttle them with 429
+responses:
+
+    >>> from packagetrack.testing import CarrierSimulator, CarrierProfile, \\
+    ...     lognormal_latency
+    >>> simulator = CarrierSimulator(CarrierProfile(
+    ...     latency=lognormal_latency(0.3, 2.0), error_rate=0.02),
+    ...     profiles={'USPS': CarrierProfile(rate_limit=5)})
+    >>> simulator.start()
+    >>> for iface in (UPSInterface, USPSInterface):
+    ...     register_carrier(iface, simulator.config(credentials))
+    >>> results = list(track_many(numbers, max_workers=32))
+    >>> simulator.stats()
+    {'UPS': {'ok': 9731, 'error': 198}, 'USPS': {'ok': 2950, ...}}
+    >>> simulator.stop()
+
+config() points the carriers at the simulator with the api_url config value,
+which can also be set by hand to run the simulator as its own process:
+
+    $ python -m packagetrack.testing --port 8000 --latency 0.3 --latency-p99 2
+
+Whether a tracking number is delivered, in transit or unknown to the carrier
+depends only on the number, so it's the same every time it's tracked.
+"""
+
+import json
+import math
+import optparse
+import random
+import re
+import threading
+import time
+import zlib
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from datetime import datetime, timedelta
+from urlparse import urlparse, parse_qs
+
+from .configuration import DictConfig
+from .ratelimit import RateLimiter
+
+DELIVERED = 'delivered'
+IN_TRANSIT = 'in transit'
+NOT_FOUND = 'not found'
+
+# a valid tracking number of each carrier
+SAMPLE_TRACKING_NUMBERS = {
+    'UPS': '1Z58R4770350889570',
+    'USPS': 'EJ958083578US',
+    'DHL': '1234567890',
+    'Prestige': 'PS12345678',
+}
+
+# (city, state, country) the events move through
+_PLACES = [
+    ('LOUISVILLE', 'KY', 'US'),
+    ('INDIANAPOLIS', 'IN', 'US'),
+    ('CHICAGO', 'IL', 'US'),
+    ('DES MOINES', 'IA', 'US'),
+    ('OMAHA', 'NE', 'US'),
+    ('DENVER', 'CO', 'US'),
+    ('PHOENIX', 'AZ', 'US'),
+]
+_FIRST_EVENT = datetime(2012, 5, 1, 8, 5)
+_EVENT_SPACING = timedelta(minutes=47)
+
+def event_times(count):
+    """The timestamps of {count} simulated events, oldest first"""
+    return [_FIRST_EVENT + _EVENT_SPACING * i for i in range(count)]
+
+def _history(count, state):
+    """(timestamp, place, is_delivery) for each event, newest first"""
+    times = event_times(count)
+    return [(times[i], _PLACES[i % len(_PLACES)],
+        state == DELIVERED and i == count - 1) for i in reversed(range(count))]
+
+_UPS_ACTIVITY = '''
+      <Activity>
+        <ActivityLocation>
+          <Address>
+            <City>{city}</City>
+            <StateProvinceCode>{state}</StateProvinceCode>
+            <PostalCode>40213</PostalCode>
+            <CountryCode>{country}</CountryCode>
+          </Address>
+          <Code>{location_code}</Code>
+          <Description>{location_description}</Description>
+        </ActivityLocation>
+        <Status>
+          <StatusType>
+            <Code>{status_code}</Code>
+            <Description>{status}</Description>
+          </StatusType>
+          <StatusCode>
+            <Code>{status_code}F</Code>
+          </StatusCode>
+        </Status>
+        <Date>{timestamp:%Y%m%d}</Date>
+        <Time>{timestamp:%H%M%S}</Time>
+      </Activity>'''
+
+_UPS_RESPONSE = '''<?xml version="1.0"?>
+<TrackResponse>
+  <Response>
+    <TransactionReference><XpciVersion>1.0</XpciVersion></TransactionReference>
+    <ResponseStatusCode>1</ResponseStatusCode>
+    <ResponseStatusDescription>Success</ResponseStatusDescription>
+  </Response>
+  <Shipment>
+    <Shipper>
+      <ShipperNumber>58R477</ShipperNumber>
+      <Address>
+        <AddressLine1>1 MAIN ST</AddressLine1>
+        <City>LOUISVILLE</City>
+        <StateProvinceCode>KY</StateProvinceCode>
+        <PostalCode>40213</PostalCode>
+        <CountryCode>US</CountryCode>
+      </Address>
+    </Shipper>
+    <ShipTo>
+      <Address>
+        <City>PHOENIX</City>
+        <StateProvinceCode>AZ</StateProvinceCode>
+        <PostalCode>85001</PostalCode>
+        <CountryCode>US</CountryCode>
+      </Address>
+    </ShipTo>
+    <ShipmentWeight>
+      <UnitOfMeasurement><Code>LBS</Code></UnitOfMeasurement>
+      <Weight>2.00</Weight>
+    </ShipmentWeight>
+    <Service>
+      <Code>003</Code>
+      <Description>GROUND</Description>
+    </Service>
+    <ShipmentIdentificationNumber>{tracking_number}</ShipmentIdentificationNumber>
+    <PickupDate>20120501</PickupDate>
+    <ScheduledDeliveryDate>20120605</ScheduledDeliveryDate>
+    <Package>
+      <TrackingNumber>{tracking_number}</TrackingNumber>{activities}
+      <PackageWeight>
+        <UnitOfMeasurement><Code>LBS</Code></UnitOfMeasurement>
+        <Weight>2.00</Weight>
+      </PackageWeight>
+    </Package>
+  </Shipment>
+</TrackResponse>'''
+
+_UPS_NOT_FOUND = '''<?xml version="1.0"?>
+<TrackResponse>
+  <Response>
+    <TransactionReference><XpciVersion>1.0</XpciVersion></TransactionReference>
+    <ResponseStatusCode>0</ResponseStatusCode>
+    <ResponseStatusDescription>Failure</ResponseStatusDescription>
+    <Error>
+      <ErrorSeverity>Hard</ErrorSeverity>
+      <ErrorCode>151018</ErrorCode>
+      <ErrorDescription>Invalid tracking number</ErrorDescription>
+    </Error>
+  </Response>
+</TrackResponse>'''
+
+def ups_response(tracking_number, events=12, state=DELIVERED):
+    """A TrackResponse for {tracking_number} with {events} activities"""
+    if state == NOT_FOUND:
+        return _UPS_NOT_FOUND
+    activities = []
+    for timestamp, (city, province, country), delivery in \
+            _history(events, state):
+        activities.append(_UPS_ACTIVITY.format(city=city, state=province,
+            country=country, timestamp=timestamp,
+            location_code='ML' if delivery else 'M1',
+            location_description='FRONT DOOR' if delivery else 'HUB',
+            status_code='D' if delivery else 'I',
+            status='DELIVERED' if delivery else 'ARRIVAL SCAN'))
+    return _UPS_RESPONSE.format(tracking_number=tracking_number,
+        activities=''.join(activities))
+
+_USPS_EVENT = '''
+    <{tag}>
+      <EventTime>{time}</EventTime>
+      <EventDate>{timestamp:%B} {timestamp.day}, {timestamp:%Y}</EventDate>
+      <Event>{event}</Event>
+      <EventCity>{city}</EventCity>
+      <EventState>{state}</EventState>
+      <EventZIPCode>50208</EventZIPCode>
+      <EventCountry/>
+      <FirmName/>
+      <Name/>
+      <AuthorizedAgent/>
+    </{tag}>'''
+
+_USPS_NOT_FOUND = '''
+    <Error>
+      <Number>-2147219302</Number>
+      <Description>No record of that item</Description>
+      <HelpFile/>
+      <HelpContext/>
+    </Error>'''
+
+def usps_response(tracking_numbers, events=12, states=None):
+    """A TrackResponse with a TrackInfo for each of {tracking_numbers}, of
+    {events} events (the TrackSummary and TrackDetails). {states} is a dict
+    of the numbers that aren't DELIVERED.
+    """
+    track_infos = []
+    for tracking_number in tracking_numbers:
+        state = (states or {}).get(tracking_number, DELIVERED)
+        if state == NOT_FOUND:
+            details = _USPS_NOT_FOUND
+        else:
+            details = ''.join(_USPS_EVENT.format(
+                tag='TrackSummary' if i == 0 else 'TrackDetail',
+                time=timestamp.strftime('%I:%M %p').lstrip('0').lower(),
+                timestamp=timestamp, city=city, state=province,
+                event='Delivered' if delivery else 'Arrival at Post Office') \
+                    for i, (timestamp, (city, province, _), delivery) in \
+                        enumerate(_history(events, state)))
+        track_infos.append('\n  <TrackInfo ID="%s">%s\n  </TrackInfo>' % (
+            tracking_number, details))
+    return '<?xml version="1.0"?>\n<TrackResponse>%s\n</TrackResponse>' % \
+        ''.join(track_infos)
+
+_DHL_EVENT = '''
+      <ShipmentEvent>
+        <Date>{timestamp:%Y-%m-%d}</Date>
+        <Time>{timestamp:%H:%M:%S}</Time>
+        <ServiceEvent>
+          <EventCode>{code}</EventCode>
+          <Description>{description}</Description>
+        </ServiceEvent>
+        <Signatory>{signatory}</Signatory>
+        <ServiceArea>
+          <ServiceAreaCode>{area_code}</ServiceAreaCode>
+          <Description>{city} - {country}</Description>
+        </ServiceArea>
+      </ShipmentEvent>'''
+
+_DHL_RESPONSE = '''<?xml version="1.0" encoding="UTF-8"?>
+<req:TrackingResponse xmlns:req="http://www.dhl.com" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://www.dhl.com TrackingResponse.xsd">
+  <Response>
+    <ServiceHeader>
+      <MessageTime>2012-06-01T10:15:00-04:00</MessageTime>
+      <MessageReference>0123456789abcdef0123456789abcdef</MessageReference>
+      <SiteID>DServiceVal</SiteID>
+    </ServiceHeader>
+  </Response>
+  <AWBInfo>
+    <AWBNumber>{tracking_number}</AWBNumber>
+    <Status>
+      <ActionStatus>{action_status}</ActionStatus>{condition}
+    </Status>{shipment_info}
+  </AWBInfo>
+  <LanguageCode>en</LanguageCode>
+</req:TrackingResponse>'''
+
+_DHL_SHIPMENT_INFO = '''
+    <ShipmentInfo>
+      <OriginServiceArea>
+        <ServiceAreaCode>LOU</ServiceAreaCode>
+        <Description>LOUISVILLE - US</Description>
+      </OriginServiceArea>
+      <DestinationServiceArea>
+        <ServiceAreaCode>PHX</ServiceAreaCode>
+        <Description>PHOENIX - US</Description>
+      </DestinationServiceArea>
+      <ShipperName>SHIPPER</ShipperName>
+      <ConsigneeName>CONSIGNEE</ConsigneeName>
+      <ShipmentDate>2012-05-01T08:05:00</ShipmentDate>
+      <Pieces>1</Pieces>
+      <Weight>2.0</Weight>
+      <WeightUnit>L</WeightUnit>
+      <GlobalProductCode>P</GlobalProductCode>
+      <ShipmentDesc>DOCUMENTS</ShipmentDesc>{events}
+    </ShipmentInfo>'''
+
+_DHL_NOT_FOUND = '''
+      <Condition>
+        <ConditionCode>101</ConditionCode>
+        <ConditionData>No Shipments Found for AWBNumber</ConditionData>
+      </Condition>'''
+
+def dhl_response(tracking_number, events=12, state=DELIVERED):
+    """A TrackingResponse for {tracking_number} with {events}
+    ShipmentEvents
+    """
+    if state == NOT_FOUND:
+        return _DHL_RESPONSE.format(tracking_number=tracking_number,
+            action_status='No Shipments Found', condition=_DHL_NOT_FOUND,
+            shipment_info='')
+    shipment_events = []
+    # DHL lists the oldest event first
+    for timestamp, (city, _, country), delivery in \
+            reversed(_history(events, state)):
+        shipment_events.append(_DHL_EVENT.format(timestamp=timestamp,
+            city=city, country=country, area_code=city[:3],
+            code='OK' if delivery else 'AR',
+            description='Delivered' if delivery else \
+                'Arrived at Sort Facility %s - %s' % (city, country),
+            signatory='SMITH' if delivery else ''))
+    return _DHL_RESPONSE.format(tracking_number=tracking_number,
+        action_status='success', condition='',
+        shipment_info=_DHL_SHIPMENT_INFO.format(
+            events=''.join(shipment_events)))
+
+def prestige_response(tracking_numbers, events=12, states=None):
+    """The JSON array of tracking data for each of {tracking_numbers}, of
+    {events} events. {states} is a dict of the numbers that aren't DELIVERED.
+    """
+    data = []
+    for tracking_number in tracking_numbers:
+        state = (states or {}).get(tracking_number, DELIVERED)
+        if state == NOT_FOUND:
+            history = [_prestige_event('ERROR_NOTFOUND',
+                'Tracking number not found', datetime.now(), ('', '', ''))]
+        else:
+            history = [_prestige_event('DL' if delivery else 'AR',
+                'Delivered' if delivery else 'Arrived at facility',
+                timestamp, place) for timestamp, place, delivery in \
+                    _history(events, state)]
+        data.append({'TrackingNumber': tracking_number,
+            'TrackingEventHistory': history})
+    return json.dumps(data)
+
+def _prestige_event(code, description, timestamp, place):
+    return {
+        'EventCode': code,
+        'EventCodeDesc': description,
+        'serverDate': timestamp.strftime('%m/%d/%Y'),
+        'serverTime': timestamp.strftime('%I:%M %p'),
+        'ELCity': place[0] + ' ',
+        'ELState': place[1],
+        'ELZip': '85001',
+        'SchdDateTime': '/Date(1338508800000)/',
+    }
+
+def carrier_response(carrier, tracking_numbers, events=12, states=None):
+    """The response body of the carrier named {carrier} to a request for
+    {tracking_numbers}, which must be a single number for UPS and DHL
+    """
+    if carrier in ('UPS', 'DHL'):
+        tracking_number, = tracking_numbers
+        build = ups_response if carrier == 'UPS' else dhl_response
+        return build(tracking_number, events,
+            (states or {}).get(tracking_number, DELIVERED))
+    build = {'USPS': usps_response, 'Prestige': prestige_response}[carrier]
+    return build(tracking_numbers, events, states)
+
+def constant_latency(seconds):
+    return lambda rng: seconds
+
+def uniform_latency(low, high):
+    return lambda rng: rng.uniform(low, high)
+
+def lognormal_latency(median, p99):
+    """Latencies with a long tail, like real APIs: half of them under
+    {median} seconds and 99% under {p99}
+    """
+    mu = math.log(median)
+    sigma = math.log(float(p99) / median) / 2.326
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+class CarrierProfile(object):
+    """How the simulator answers one carrier's requests.
+
+    Every response takes {latency} seconds, a number or a function of a
+    random.Random returning one (see lognormal_latency()). {error_rate} of
+    requests are answered with one of {error_statuses} and {drop_rate} have
+    their connection closed without an answer. Requests over {rate_limit} per
+    second (with bursts of {rate_burst}) get a 429 with a Retry-After header.
+
+    Responses have {events} events, {not_found_rate} of tracking numbers are
+    unknown to the carrier and {delivered_rate} of the rest are delivered.
+    """
+
+    def __init__(self, latency=0, error_rate=0, error_statuses=(500, 503),
+            drop_rate=0, rate_limit=None, rate_burst=None, events=12,
+            not_found_rate=0, delivered_rate=1):
+        if not callable(latency):
+            latency = constant_latency(latency)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.drop_rate = drop_rate
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.events = events
+        self.not_found_rate = not_found_rate
+        self.delivered_rate = delivered_rate
+
+    def state(self, tracking_number):
+        """Whether {tracking_number} is DELIVERED, IN_TRANSIT or NOT_FOUND"""
+        if _fraction('found', tracking_number) < self.not_found_rate:
+            return NOT_FOUND
+        if _fraction('delivered', tracking_number) < self.delivered_rate:
+            return DELIVERED
+        return IN_TRANSIT
+
+def _fraction(salt, tracking_number):
+    """A number in [0, 1) that's the same every time for {tracking_number}"""
+    return (zlib.crc32(salt + tracking_number) & 0xffffffff) / 4294967296.0
+
+# the path each carrier's API is served at, and the api_url pointing to it
+_ENDPOINTS = [
+    ('UPS', 'UPS', '/ups.app/xml/Track', ''),
+    ('USPS', 'USPS', '/ShippingAPI.dll', '?API=TrackV2&XML='),
+    ('DHL', 'DHL', '/XMLShippingServlet', ''),
+    ('Prestige', 'PS', '/TrackingHandler.ashx', ''),
+]
+_UPS_NUMBER = re.compile(r'<TrackingNumber>([^<]*)</TrackingNumber>')
+_USPS_NUMBER = re.compile(r'<TrackID ID="([^"]*)"')
+_DHL_NUMBER = re.compile(r'<AWBNumber>([^<]*)</AWBNumber>')
+
+def simulator_config(base_url, config=None):
+    """Like CarrierSimulator.config(), for a simulator at {base_url} that
+    may be running in another process
+    """
+    config = DictConfig((section, dict(values)) for section, values in \
+        (config or {}).iteritems())
+    for _, section, path, query in _ENDPOINTS:
+        config.setdefault(section, {})['api_url'] = base_url + path + query
+    return config
+
+class CarrierSimulator(ThreadingMixIn, HTTPServer):
+    """Serves the carriers' tracking APIs on {host}:{port} (a free port by
+    default), following {profiles}, a dict of CarrierProfiles by carrier
+    SHORT_NAME, and {default} for carriers missing from it. {seed} makes the
+    random latencies and failures repeatable.
+    """
+
+    daemon_threads = True
+    # hundreds of clients connect at once in load tests
+    request_queue_size = 1024
+
+    def __init__(self, default=None, profiles=None, host='127.0.0.1', port=0,
+            seed=None):
+        HTTPServer.__init__(self, (host, port), _Handler)
+        self.default = default or CarrierProfile()
+        self.profiles = profiles or {}
+        self._random = random.Random(seed)
+        self._limiters = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return 'http://%s:%d' % self.server_address
+
+    def start(self):
+        """Start serving on a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def config(self, config=None):
+        """Return a DictConfig of {config} (a dict of carrier sections, like
+        a DictConfig) with each carrier's api_url set to the simulator
+        """
+        return simulator_config(self.base_url, config)
+
+    def profile(self, carrier):
+        return self.profiles.get(carrier, self.default)
+
+    def stats(self):
+        """Return a dict of each carrier's dict of requests by outcome: ok,
+        error, dropped or throttled
+        """
+        with self._lock:
+            stats = {}
+            for (carrier, outcome), count in self._stats.iteritems():
+                stats.setdefault(carrier, {})[outcome] = count
+            return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def answer(self, path, query, body):
+        """Decide the answer to a request, returns a (carrier, status,
+        headers, body) tuple, with a None status for a dropped connection
+        """
+        for carrier, _, carrier_path, _ in _ENDPOINTS:
+            if path == carrier_path:
+                break
+        else:
+            return None, 404, {}, 'Not Found'
+        profile = self.profile(carrier)
+
+        wait = self._limiter(carrier, profile).try_acquire()
+        if wait:
+            self._count(carrier, 'throttled')
+            return carrier, 429, {'Retry-After': str(int(math.ceil(wait)))}, \
+                'Too Many Requests'
+
+        with self._lock:
+            latency = profile.latency(self._random)
+            failure = self._random.random()
+            status = self._random.choice(profile.error_statuses)
+        time.sleep(max(latency, 0))
+        if failure < profile.drop_rate:
+            self._count(carrier, 'dropped')
+            return carrier, None, {}, ''
+        if failure < profile.drop_rate + profile.error_rate:
+            self._count(carrier, 'error')
+            return carrier, status, {}, 'Server Error'
+
+        tracking_numbers = self._tracking_numbers(carrier, query, body)
+        if not tracking_numbers:
+            return carrier, 400, {}, 'Bad Request'
+        states = dict((tn, profile.state(tn)) for tn in tracking_numbers)
+        self._count(carrier, 'ok')
+        return carrier, 200, {'Content-Type': 'application/json' \
+                if carrier == 'Prestige' else 'text/xml'}, \
+            carrier_response(carrier, tracking_numbers, profile.events, states)
+
+    def _tracking_numbers(self, carrier, query, body):
+        if carrier == 'UPS':
+            return _UPS_NUMBER.findall(body)[:1]
+        elif carrier == 'USPS':
+            return _USPS_NUMBER.findall(query.get('XML', [''])[0])
+        elif carrier == 'DHL':
+            return _DHL_NUMBER.findall(body)[:1]
+        numbers = query.get('trackingNumbers', [''])[0]
+        return numbers.split(',') if numbers else []
+
+    def _limiter(self, carrier, profile):
+        with self._lock:
+            try:
+                return self._limiters[carrier]
+            except KeyError:
+                limiter = self._limiters[carrier] = RateLimiter(
+                    rate=profile.rate_limit, burst=profile.rate_burst)
+                return limiter
+
+    def _count(self, carrier, outcome):
+        with self._lock:
+            key = (carrier, outcome)
+            self._stats[key] = self._stats.get(key, 0) + 1
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep connections alive, like the carriers' pooled sessions expect
+    protocol_version = 'HTTP/1.1'
+    # otherwise small responses wait on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._respond('')
+
+    def do_POST(self):
+        self._respond(self.rfile.read(
+            int(self.headers.getheader('Content-Length') or 0)))
+
+    def _respond(self, body):
+        url = urlparse(self.path)
+        _, status, headers, content = self.server.answer(url.path,
+            parse_qs(url.query), body)
+        if status is None:
+            self.close_connection = True
+            return
+        self.send_response(status)
+        for name, value in headers.iteritems():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='%prog [options]',
+        description='Serve simulated UPS, USPS, DHL and Prestige tracking '
+            'APIs, every carrier behaving the same.')
+    parser.add_option('--host', default='127.0.0.1')
+    parser.add_option('--port', type='int', default=8000)
+    parser.add_option('--latency', type='float', default=0,
+        help='median response time in seconds [%default]')
+    parser.add_option('--latency-p99', type='float',
+        help='99th percentile response time, for long tailed latencies')
+    parser.add_option('--error-rate', type='float', default=0,
+        help='share of requests answered with a 5xx [%default]')
+    parser.add_option('--drop-rate', type='float', default=0,
+        help='share of connections closed without an answer [%default]')
+    parser.add_option('--rate-limit', type='float',
+        help='requests per second per carrier before throttling')
+    parser.add_option('--events', type='int', default=12,
+        help='events in each tracking history [%default]')
+    parser.add_option('--not-found-rate', type='float', default=0,
+        help='share of tracking numbers the carriers don\'t know [%default]')
+    parser.add_option('--delivered-rate', type='float', default=1,
+        help='share of tracking numbers that are delivered [%default]')
+    options, _ = parser.parse_args(argv)
+
+    if options.latency_p99 and options.latency:
+        latency = lognormal_latency(options.latency, options.latency_p99)
+    else:
+        latency = options.latency
+    simulator = CarrierSimulator(CarrierProfile(latency=latency,
+        error_rate=options.error_rate, drop_rate=options.drop_rate,
+        rate_limit=options.rate_limit, events=options.events,
+        not_found_rate=options.not_found_rate,
+        delivered_rate=options.delivered_rate),
+        host=options.host, port=options.port)
+    print 'Serving on %s, point the carriers at it with:' % simulator.base_url
+    for section, values in sorted(simulator.config().iteritems()):
+        print '\n[%s]\napi_url = %s' % (section, values['api_url'])
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import threading
+from unittest import TestCase
+
+from packagetrack import Package, track_many, track_many_async
+from packagetrack.carriers import BaseInterface, register_carrier
+from packagetrack.carriers.errors import TrackingNumberFailure, \
+    UnsupportedTrackingNumber
+from packagetrack.configuration import NullConfig
+from packagetrack.data import TrackingInfo
+
+
+class FakeInterface(BaseInterface):
+    SHORT_NAME = 'Fake'
+    CONFIG_NS = SHORT_NAME
+
+    def __init__(self, config):
+        super(FakeInterface, self).__init__(config)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def identify(self, tracking_number):
+        return tracking_number.startswith('FAKE')
+
+    @BaseInterface.require_valid_tracking_number
+    def track(self, tracking_number):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            if tracking_number.endswith('X'):
+                raise TrackingNumberFailure(tracking_number)
+            return TrackingInfo(tracking_number)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class TestTrackMany(TestCase):
+
+    def setUp(self):
+        self.carrier = register_carrier(FakeInterface, NullConfig())
+
+    def test_results(self):
+        numbers = ['FAKE%d' % i for i in range(20)] + ['FAKEX', 'NOPE']
+        results = dict(track_many(numbers, max_workers=4))
+        assert set(results) == set(numbers)
+        assert isinstance(results['FAKE0'], TrackingInfo)
+        assert isinstance(results['FAKEX'], TrackingNumberFailure)
+        assert isinstance(results['NOPE'], UnsupportedTrackingNumber)
+
+    def test_per_carrier_concurrency(self):
+        numbers = ['FAKE%d' % i for i in range(50)]
+        list(track_many(numbers, max_workers=8,
+            per_carrier_concurrency={'Fake': 2}))
+        assert self.carrier.peak <= 2
+
+    def test_zero_concurrency(self):
+        numbers = ['FAKE%d' % i for i in range(5)]
+        for limit in (0, {'Fake': 0}):
+            self.assertRaises(ValueError, list, track_many(numbers,
+                per_carrier_concurrency=limit))
+        self.assertRaises(ValueError, list, track_many(numbers, max_workers=0))
+
+    def test_abandoned(self):
+        numbers = ['FAKE%d' % i for i in range(50)]
+        results = track_many(numbers, max_workers=4)
+        next(results)
+        results.close()
+        assert len(dict(track_many(numbers[:3]))) == 3
+
+
+class TestTrackAsync(TestCase):
+
+    def setUp(self):
+        self.carrier = register_carrier(FakeInterface, NullConfig())
+
+    def test_track_async(self):
+        info = self.carrier.track_async('FAKE1').get(5)
+        assert info.tracking_number == 'FAKE1'
+        self.assertRaises(TrackingNumberFailure,
+            Package('FAKEX').track_async().get, 5)
+
+    def test_track_many_async(self):
+        seen = []
+        numbers = ['FAKE%d' % i for i in range(10)]
+        results = track_many_async(numbers,
+            callback=lambda tn, result: seen.append(tn)).get(5)
+        assert sorted(seen) == sorted(numbers)
+        assert len(results) == len(numbers)
@@ -0,0 +1,80 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase
+
+from packagetrack.cache import MemoryCache, SQLiteCache
+from packagetrack.carriers import BaseInterface
+from packagetrack.configuration import NullConfig
+from packagetrack.data import TrackingInfo
+
+
+def make_info(tracking_number, is_delivered=False):
+    info = TrackingInfo(tracking_number, is_delivered=is_delivered)
+    info.create_event(datetime(2012, 6, 1, 10, 15), 'NEWTON,IA', 'Delivered')
+    return info
+
+
+class CountingInterface(BaseInterface):
+    SHORT_NAME = 'Counting'
+    CONFIG_NS = SHORT_NAME
+
+    def __init__(self, config):
+        super(CountingInterface, self).__init__(config)
+        self.calls = 0
+
+    def identify(self, tracking_number):
+        return True
+
+    @BaseInterface.require_valid_tracking_number
+    @BaseInterface.cache_tracking_info
+    def track(self, tracking_number):
+        self.calls += 1
+        return make_info(tracking_number)
+
+
+class TestMemoryCache(TestCase):
+
+    def test_ttl(self):
+        cache = MemoryCache(in_transit_ttl=0, delivered_ttl=None)
+        cache.set('UPS', '1', make_info('1'))
+        cache.set('UPS', '2', make_info('2', is_delivered=True))
+        assert cache.get('UPS', '1') is None
+        assert cache.get('UPS', '2').tracking_number == '2'
+        assert cache.get('USPS', '2') is None
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_lru_eviction(self):
+        cache = MemoryCache(max_entries=2)
+        for tracking_number in ('1', '2'):
+            cache.set('UPS', tracking_number, make_info(tracking_number))
+        cache.get('UPS', '1')
+        cache.set('UPS', '3', make_info('3'))
+        assert len(cache) == 2
+        assert cache.get('UPS', '2') is None
+        assert cache.get('UPS', '1') is not None
+
+    def test_carrier_track(self):
+        carrier = CountingInterface(NullConfig())
+        carrier.cache = MemoryCache()
+        carrier.track('1')
+        carrier.track('1')
+        assert carrier.calls == 1
+        assert carrier.cache.hits == 1
+
+
+class TestSQLiteCache(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_persistence(self):
+        SQLiteCache(self.path).set('UPS', '1', make_info('1', True))
+        info = SQLiteCache(self.path).get('UPS', '1')
+        assert info.is_delivered
+        assert info.status == 'Delivered'
@@ -0,0 +1,38 @@
+import random
+import string
+from unittest import TestCase
+
+from packagetrack.carriers import checksums
+
+
+def random_numbers(count, length, alphabet=string.digits):
+    rand = random.Random(length)
+    return [''.join(rand.choice(alphabet) for _ in range(length)) \
+        for _ in range(count)]
+
+
+class TestChecksums(TestCase):
+
+    def test_known_numbers(self):
+        assert checksums.validate_ups('58R4770350889570')
+        assert not checksums.validate_ups('58R4770350889572')
+        assert checksums.validate_ground96('019343586678996')
+        assert checksums.validate_ground96('9611020019343586678996')
+        assert checksums.validate_mod10('9400100000000000000006')
+        assert not checksums.validate_ground96('01934358667899X')
+
+    def test_batch_matches_scalar(self):
+        cases = [
+            (checksums.validate_ups, checksums.validate_ups_many,
+                random_numbers(500, 16, string.digits + string.ascii_uppercase)),
+            (checksums.validate_ground96, checksums.validate_ground96_many,
+                random_numbers(500, 15)),
+            (checksums.validate_ssc18, checksums.validate_ssc18_many,
+                random_numbers(500, 22)),
+            (checksums.validate_express, checksums.validate_express_many,
+                random_numbers(500, 12)),
+            (checksums.validate_mod10, checksums.validate_mod10_many,
+                random_numbers(500, 22)),
+        ]
+        for validate, validate_many, numbers in cases:
+            assert validate_many(numbers) == map(validate, numbers)
@@ -0,0 +1,108 @@
+from unittest import TestCase
+
+import requests
+
+from packagetrack.carriers.errors import CarrierUnavailable, \
+    TrackingApiFailure, TrackingNetworkFailure, TrackingThrottled
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.circuit import CircuitBreaker, CLOSED, OPEN
+from packagetrack.configuration import DictConfig
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.content = ''
+        self.headers = {}
+
+
+class FakeSession(object):
+    """Fails with each of {outcomes} in turn, an int is a response status"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, FakeResponse):
+            return outcome
+        return FakeResponse(outcome)
+
+
+class TestCircuitBreaker(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.breaker = CircuitBreaker(error_rate=0.5, min_requests=4,
+            window=60, cooldown=30, clock=lambda: self.now)
+
+    def test_opens_and_recovers(self):
+        for _ in range(2):
+            self.breaker.record_success()
+        for _ in range(2):
+            self.breaker.record_failure()
+        assert self.breaker.state == OPEN
+        self.assertRaises(CarrierUnavailable, self.breaker.before_request)
+
+        self.now = 30
+        self.breaker.before_request()
+        # only one trial request at a time
+        self.assertRaises(CarrierUnavailable, self.breaker.before_request)
+        self.breaker.record_success()
+        assert self.breaker.state == CLOSED
+
+    def test_old_failures_expire(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.now = 61
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        assert self.breaker.state == CLOSED
+
+
+class TestHTTPRetries(TestCase):
+
+    def setUp(self):
+        self.usps = USPSInterface(DictConfig({'USPS': {'userid': 'USER',
+            'http_retries': '2', 'circuit_min_requests': '4'}}))
+        self.slept = []
+        self.usps._retry_sleep = self.slept.append
+
+    def request(self, outcomes):
+        session = self.usps._cfg_cache['http_session'] = FakeSession(outcomes)
+        try:
+            return self.usps._http_request('GET', 'http://example.com/')
+        finally:
+            self.calls = session.calls
+
+    def test_retries(self):
+        response = self.request([requests.ConnectionError(), 503, 200])
+        assert response.status_code == 200
+        assert self.calls == 3 and len(self.slept) == 2
+        assert 0 <= self.slept[1] <= 1.0
+
+    def test_throttled(self):
+        throttled = FakeResponse(429)
+        throttled.headers['Retry-After'] = '3'
+        response = self.request([throttled, 200])
+        assert response.status_code == 200
+        assert self.slept == [3.0]
+
+    def test_throttling_not_an_outage(self):
+        for _ in range(3):
+            self.assertRaises(TrackingThrottled, self.request, [429] * 3)
+        assert self.usps.circuit_breaker.state == CLOSED
+        assert self.request([200]).status_code == 200
+
+    def test_gives_up(self):
+        self.assertRaises(TrackingApiFailure, self.request, [500, 502, 503])
+        self.assertRaises(TrackingNetworkFailure, self.request,
+            [requests.Timeout()] * 3)
+        # the breaker has opened, so no request is made
+        self.assertRaises(CarrierUnavailable, self.request, [200])
+        assert self.calls == 0
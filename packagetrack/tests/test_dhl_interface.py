@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from packagetrack.carriers.dhl_interface import DHLInterface
+from packagetrack.carriers.errors import TrackingApiFailure
+from packagetrack.configuration import NullConfig
+
+response = '''<?xml version="1.0" encoding="UTF-8"?>
+<req:TrackingResponse xmlns:req="http://www.dhl.com">
+  <AWBInfo>
+    <AWBNumber>1234567890</AWBNumber>
+    <Status><ActionStatus>success</ActionStatus></Status>
+    <ShipmentInfo>
+      <ShipmentEvent>
+        <Date>2012-05-31</Date>
+        <Time>08:15:00</Time>
+        <ServiceEvent>
+          <EventCode>PU</EventCode>
+          <Description>Shipment picked up</Description>
+        </ServiceEvent>
+        <ServiceArea>
+          <ServiceAreaCode>CVG</ServiceAreaCode>
+          <Description>CINCINNATI HUB - USA</Description>
+        </ServiceArea>
+      </ShipmentEvent>
+    </ShipmentInfo>
+  </AWBInfo>
+</req:TrackingResponse>'''
+
+
+class TestDHLInterface(TestCase):
+
+    def setUp(self):
+        self.dhl = DHLInterface(NullConfig())
+
+    def test_parse_single_event(self):
+        info = self.dhl._parse_response(response, '1234567890')
+        assert len(info.events) == 1
+        assert info.events[0].location == 'CINCINNATI HUB,USA'
+        assert info.status == 'Shipment picked up'
+        assert not info.is_delivered
+
+    def test_not_xml(self):
+        # an HTML error page served with a 200
+        self.assertRaises(TrackingApiFailure, self.dhl._parse_response,
+            '<html><body><h1>Service Unavailable</h1></body>', '1234567890')
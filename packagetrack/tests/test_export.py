@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import TestCase, skipIf
+
+from packagetrack import export
+from packagetrack.carriers.timezones import pytz
+from packagetrack.data import TrackingInfo
+
+
+def make_infos():
+    first = TrackingInfo('1Z1', carrier='UPS', is_delivered=True)
+    first.create_event(datetime(2012, 6, 2), 'NEWTON,IA', 'Delivered')
+    first.create_event(datetime(2012, 6, 1), 'DES MOINES,IA', 'Out for delivery')
+    second = TrackingInfo('9400', carrier='USPS')
+    second.create_event(datetime(2012, 6, 1), 'BOSTON,MA', 'Accepted')
+    return [first, second, TrackingInfo('EMPTY', carrier='USPS')]
+
+
+class TestToColumns(TestCase):
+
+    def test_columns(self):
+        columns = export.to_columns(make_infos())
+        assert sorted(columns) == sorted(export.COLUMNS)
+        assert columns['tracking_number'] == ['1Z1', '1Z1', '9400']
+        assert columns['carrier'] == ['UPS', 'UPS', 'USPS']
+        assert columns['detail'] == ['Out for delivery', 'Delivered', 'Accepted']
+        assert columns['is_delivered'] == [True, True, False]
+        assert columns['timestamp'][0] == datetime(2012, 6, 1)
+        assert columns['utc_offset'] == [None, None, None]
+        assert columns['timezone_guessed'] == [False, False, False]
+
+    @skipIf(pytz is None, 'pytz is not installed')
+    def test_timezones(self):
+        info = TrackingInfo('1Z1', carrier='UPS')
+        zone = pytz.timezone('America/Chicago')
+        info.create_event(zone.localize(datetime(2012, 6, 1, 8)),
+            'NEWTON,IA', 'Arrived')
+        info.create_event(zone.localize(datetime(2012, 6, 1, 9)),
+            'SOMEWHERE', 'Departed', timezone_guessed=True)
+        columns = export.to_columns([info])
+        assert columns['utc_offset'] == [-5 * 3600, -5 * 3600]
+        assert columns['timezone_guessed'] == [False, True]
+
+
+@skipIf(export.pyarrow is None, 'pyarrow is not installed')
+class TestArrow(TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_to_arrow(self):
+        table = export.to_arrow(make_infos())
+        assert table.num_rows == 3
+        assert table.column_names == list(export.COLUMNS)
+
+    @skipIf(pytz is None, 'pytz is not installed')
+    def test_to_arrow_utc(self):
+        info = TrackingInfo('1Z1', carrier='UPS')
+        info.create_event(pytz.timezone('America/Chicago').localize(
+            datetime(2012, 6, 1, 8)), 'NEWTON,IA', 'Arrived')
+        table = export.to_arrow([info])
+        assert table.column('timestamp').to_pylist() == \
+            [datetime(2012, 6, 1, 13)]
+        assert table.column('utc_offset').to_pylist() == [-5 * 3600]
+
+    def test_write_parquet(self):
+        import pyarrow.parquet
+        path = os.path.join(self.tmpdir, 'sweep.parquet')
+        rows = export.write_parquet(iter(make_infos() * 3), path, batch_size=2)
+        assert rows == 9
+        table = pyarrow.parquet.read_table(path)
+        assert table.column('tracking_number').to_pylist()[:3] == \
+            ['1Z1', '1Z1', '9400']
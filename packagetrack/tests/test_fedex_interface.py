@@ -0,0 +1,97 @@
+import threading
+from unittest import TestCase
+
+from packagetrack.carriers import fedex_interface
+from packagetrack.carriers.fedex_interface import FedexInterface
+from packagetrack.carriers.errors import TrackingNumberFailure, \
+    TrackingQuotaExceeded, TrackingApiFailure, CarrierUnavailable
+from packagetrack.configuration import DictConfig
+from packagetrack.data import TrackingInfo
+
+
+class Obj(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeTrackRequest(object):
+    created = 0
+    failures = 0
+    lock = threading.Lock()
+
+    def __init__(self, config):
+        with self.lock:
+            FakeTrackRequest.created += 1
+        self.config = config
+        self.TrackPackageIdentifier = Obj()
+
+    def send_request(self):
+        if FakeTrackRequest.failures:
+            FakeTrackRequest.failures -= 1
+            raise Exception('FedEx is down')
+        tracking_number = self.TrackPackageIdentifier.Value
+        if tracking_number == '999999999999':
+            raise fedex_interface.FedexInvalidTrackingNumber(6035, 'invalid')
+        self.response = Obj(HighestSeverity='SUCCESS', TrackDetails=[Obj(
+            tracking_number=tracking_number)])
+
+
+class TestFedexInterface(TestCase):
+
+    def setUp(self):
+        self.real_request = fedex_interface.FedexTrackRequest
+        fedex_interface.FedexTrackRequest = FakeTrackRequest
+        FakeTrackRequest.created = 0
+        FakeTrackRequest.failures = 0
+        self.fedex = FedexInterface(DictConfig({'FedEx': {
+            'key': 'key', 'password': 'password',
+            'account_number': '1', 'meter_number': '2'}}))
+        self.fedex._parse_response = lambda rsp, tn: TrackingInfo(tn)
+
+    def tearDown(self):
+        fedex_interface.FedexTrackRequest = self.real_request
+
+    def test_config_cached(self):
+        assert self.fedex._get_cfg() is self.fedex._get_cfg()
+
+    def test_track_requests_reused(self):
+        for tn in ('123456789012', '123456789013'):
+            assert self.fedex.track(tn).tracking_number == tn
+        self.assertRaises(TrackingNumberFailure,
+            self.fedex.track, '999999999999')
+        self.fedex.track('123456789014')
+        assert FakeTrackRequest.created == 1
+
+    def test_reload_config(self):
+        self.fedex.track('123456789012')
+        old_cfg = self.fedex._get_cfg()
+        self.fedex.reload_config()
+        self.fedex.track('123456789012')
+        assert self.fedex._get_cfg() is not old_cfg
+        assert FakeTrackRequest.created == 2
+
+    def test_rate_limited(self):
+        fedex = FedexInterface(DictConfig({'FedEx': {
+            'key': 'key', 'password': 'password',
+            'account_number': '1', 'meter_number': '2', 'daily_quota': '1'}}))
+        fedex._parse_response = lambda rsp, tn: TrackingInfo(tn)
+        fedex.track('123456789012')
+        self.assertRaises(TrackingQuotaExceeded, fedex.track, '123456789013')
+        assert fedex.rate_limiter.used_today == 1
+
+    def test_retries(self):
+        fedex = FedexInterface(DictConfig({'FedEx': {
+            'key': 'key', 'password': 'password',
+            'account_number': '1', 'meter_number': '2',
+            'http_retries': '1', 'circuit_min_requests': '2'}}))
+        fedex._parse_response = lambda rsp, tn: TrackingInfo(tn)
+        fedex._retry_sleep = lambda seconds: None
+        FakeTrackRequest.failures = 1
+        assert fedex.track('123456789012').tracking_number == '123456789012'
+        # the failed client was dropped
+        assert FakeTrackRequest.created == 2
+        # two failures in three requests opens the circuit, without a retry
+        FakeTrackRequest.failures = 2
+        self.assertRaises(TrackingApiFailure, fedex.track, '123456789012')
+        self.assertRaises(CarrierUnavailable, fedex.track, '123456789012')
+        assert fedex.rate_limiter.used_today == 3
@@ -0,0 +1,79 @@
+import threading
+import time
+from unittest import TestCase
+
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.hedging import Hedger
+
+
+class FakeResponse(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class SlowThenFast(object):
+    """The first call takes {slow} seconds, any later ones are fast"""
+
+    def __init__(self, slow):
+        self.slow = slow
+        self.calls = 0
+        self.responses = {}
+        self.lock = threading.Lock()
+        self.slow_done = threading.Event()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        if call == 1:
+            time.sleep(self.slow)
+        response = self.responses[call] = FakeResponse(call)
+        if call == 1:
+            self.slow_done.set()
+        return response
+
+
+class TestHedger(TestCase):
+
+    def make_hedger(self, **kwargs):
+        hedger = Hedger(percentile=50, min_samples=4, min_delay=0.01, **kwargs)
+        for _ in range(4):
+            hedger.call(lambda: FakeResponse(0))
+        return hedger
+
+    def test_hedges_slow_request(self):
+        hedger = self.make_hedger(budget=1.0)
+        attempt = SlowThenFast(0.5)
+        response = hedger.call(attempt)
+        assert response.name == 2
+        assert hedger.hedged == hedger.hedge_wins == 1
+        # the slow response is closed once it arrives
+        assert attempt.slow_done.wait(2)
+        assert attempt.responses[1].closed.wait(2)
+        assert not attempt.responses[2].closed.is_set()
+
+    def test_budget(self):
+        hedger = self.make_hedger(budget=0.0)
+        response = hedger.call(SlowThenFast(0.05))
+        assert response.name == 1
+        assert hedger.hedged == 0
+
+    def test_errors(self):
+        hedger = self.make_hedger(budget=1.0)
+
+        def fail():
+            raise ValueError()
+        self.assertRaises(ValueError, hedger.call, fail)
+
+    def test_carrier_config(self):
+        usps = USPSInterface(DictConfig({'USPS': {'userid': 'USER'}}))
+        assert usps.hedger is None
+        usps.config = DictConfig({'USPS': {'userid': 'USER',
+            'hedge_percentile': '99', 'hedge_budget': '0.1'}})
+        assert usps.hedger.percentile == 99.0 and usps.hedger.budget == 0.1
@@ -0,0 +1,79 @@
+import threading
+from unittest import TestCase
+
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.testing import CarrierSimulator, CarrierProfile
+
+
+class RecordingSession(object):
+
+    def __init__(self):
+        self.kwargs = None
+        self.closed = False
+
+    def request(self, method, url, **kwargs):
+        self.kwargs = kwargs
+        raise ValueError('not sent')
+
+    def close(self):
+        self.closed = True
+
+
+class TestSession(TestCase):
+
+    def setUp(self):
+        self.usps = USPSInterface(DictConfig({'USPS': {'userid': 'USER',
+            'http_pool_size': '3', 'http_connect_timeout': '2',
+            'http_read_timeout': '5'}}))
+
+    def test_pool_size(self):
+        adapter = self.usps._get_session().get_adapter('https://example.com/')
+        assert adapter._pool_connections == adapter._pool_maxsize == 3
+        assert adapter.max_retries.total == 0
+
+    def test_timeouts(self):
+        session = self.usps._cfg_cache['http_session'] = RecordingSession()
+        self.assertRaises(ValueError, self.usps._http_request, 'GET',
+            'http://example.com/')
+        assert session.kwargs['timeout'] == (2.0, 5.0)
+
+    def test_shared_between_threads(self):
+        sessions = []
+        threads = [threading.Thread(
+            target=lambda: sessions.append(self.usps._get_session())) \
+            for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(sessions) == 8 and len(set(map(id, sessions))) == 1
+
+    def test_reload_config(self):
+        old = self.usps._cfg_cache['http_session'] = RecordingSession()
+        self.usps.reload_config()
+        assert old.closed
+        assert self.usps._get_session() is not old
+
+
+class TestKeepAlive(TestCase):
+
+    def setUp(self):
+        self.simulator = CarrierSimulator(CarrierProfile(events=2))
+        self.simulator.start()
+        self.usps = USPSInterface(self.simulator.config({
+            'USPS': {'userid': 'USER'}}))
+
+    def tearDown(self):
+        # closes the kept alive connection
+        self.usps.reload_config()
+        self.simulator.stop()
+
+    def test_connection_reused(self):
+        for i in range(3):
+            self.usps.track('EJ9580835%02dUS' % i)
+        adapter = self.usps._get_session().get_adapter(self.simulator.base_url)
+        pools = adapter.poolmanager.pools
+        assert len(pools) == 1
+        pool = pools[pools.keys()[0]]
+        assert pool.num_connections == 1 and pool.num_requests == 3
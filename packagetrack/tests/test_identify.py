@@ -0,0 +1,105 @@
+from unittest import TestCase
+
+from packagetrack import Package
+from packagetrack.carriers import BaseInterface, register_carrier, \
+    identify_tracking_number, identify_many, CarrierIndex
+from packagetrack.carriers.checksums import validate_mod10
+from packagetrack.carriers.errors import TrackingNumberFailure, \
+    AmbiguousTrackingNumber, UnsupportedTrackingNumber
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import NullConfig
+from packagetrack.data import TrackingInfo
+
+
+def with_check_digit(digits):
+    for check in '0123456789':
+        if validate_mod10(digits + check):
+            return digits + check
+
+
+class SmartPostInterface(BaseInterface):
+    SHORT_NAME = 'SmartPost'
+    CONFIG_NS = SHORT_NAME
+
+    def __init__(self, config):
+        super(SmartPostInterface, self).__init__(config)
+        self.tracked = []
+
+    def identify(self, tracking_number):
+        return len(tracking_number) == 22 and tracking_number.isdigit()
+
+    def smart_post_claim(self, tracking_number):
+        return 2 * int(tracking_number.startswith('92612'))
+
+    @BaseInterface.require_valid_tracking_number
+    def track(self, tracking_number):
+        self.tracked.append(tracking_number)
+        return TrackingInfo(tracking_number)
+
+
+class LengthInterface(BaseInterface):
+    SHORT_NAME = 'Length'
+    CONFIG_NS = SHORT_NAME
+
+    def _build_identifiers(self):
+        return {7: lambda tn: tn.startswith('AMB')}
+
+
+class PrefixInterface(BaseInterface):
+    SHORT_NAME = 'Prefix'
+    CONFIG_NS = SHORT_NAME
+
+    def identify(self, tracking_number):
+        return tracking_number.startswith('AMB')
+
+    def identify_index_keys(self):
+        return [(None, 'AMB')]
+
+
+class TestSmartPostIdentification(TestCase):
+
+    def setUp(self):
+        self.usps = register_carrier(USPSInterface, NullConfig())
+        self.smart_post = register_carrier(SmartPostInterface, NullConfig())
+        self.usps.track = self.usps_track
+
+    def usps_track(self, tracking_number):
+        raise TrackingNumberFailure(tracking_number)
+
+    def test_offline(self):
+        usps_number = with_check_digit('940010000000000000000')
+        smart_post_number = with_check_digit('926129000000000000000')
+        assert identify_tracking_number(usps_number) is self.usps
+        assert identify_tracking_number(smart_post_number) is self.smart_post
+        assert self.smart_post.tracked == []
+
+    def test_probe_result_reused(self):
+        # not a valid IMpb number, so only probing can tell
+        package = Package('1234567890123456789012', probe=True)
+        assert package.carrier is self.smart_post
+        info = package.track()
+        assert info.tracking_number == package.tracking_number
+        assert len(self.smart_post.tracked) == 1
+
+
+class TestIdentifyMany(TestCase):
+
+    def setUp(self):
+        self.length = register_carrier(LengthInterface, NullConfig())
+        self.prefix = register_carrier(PrefixInterface, NullConfig())
+
+    def test_index_candidates(self):
+        index = CarrierIndex([self.prefix, self.length])
+        assert index.candidates('AMB1234') == [self.length, self.prefix]
+        assert index.candidates('AMB12345') == [self.prefix]
+        assert index.candidates('XYZ1234') == [self.length]
+
+    def test_identify_many(self):
+        results = dict(identify_many(['AMB1234', 'AMB12345', 'ZZZZ']))
+        assert isinstance(results['AMB1234'], AmbiguousTrackingNumber)
+        assert results['AMB1234'].carriers == [self.length, self.prefix]
+        assert results['AMB12345'] is self.prefix
+        assert isinstance(results['ZZZZ'], UnsupportedTrackingNumber)
+
+    def test_deterministic_first_match(self):
+        assert identify_tracking_number('AMB1234') is self.length
@@ -0,0 +1,99 @@
+from unittest import TestCase
+
+from packagetrack.carriers.errors import InvalidTrackingNumber
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.metrics import HistogramSink, StatsdSink, PrometheusSink
+
+response = '''<?xml version="1.0"?>
+<TrackResponse>
+  <TrackInfo ID="EJ958083578US">
+    <TrackSummary>
+      <EventTime>8:10 am</EventTime>
+      <EventDate>June 1, 2012</EventDate>
+      <Event>Delivered</Event>
+      <EventCity>NEWTON</EventCity>
+      <EventState>IA</EventState>
+      <EventZIPCode>50208</EventZIPCode>
+      <EventCountry/>
+    </TrackSummary>
+  </TrackInfo>
+</TrackResponse>'''
+
+
+class FakeResponse(object):
+    status_code = 200
+    content = response
+
+
+class FakeSession(object):
+
+    def request(self, method, url, **kwargs):
+        return FakeResponse()
+
+
+class TestSinks(TestCase):
+
+    def test_histogram(self):
+        sink = HistogramSink()
+        for value in range(1, 101):
+            sink.timing('UPS', 'send', value)
+        sink.increment('UPS', 'failures.TrackingApiFailure')
+        snapshot = sink.snapshot()
+        send = snapshot[('UPS', 'send')]
+        assert send['count'] == 100 and send['sum'] == 5050
+        assert send['min'] == 1 and send['max'] == 100
+        assert send['p50'] == 51 and send['p99'] == 100
+        assert snapshot[('UPS', 'failures.TrackingApiFailure')] == 1
+
+    def test_statsd(self):
+        sent = []
+        sink = StatsdSink(lambda *args: sent.append(args))
+        sink.timing('UPS', 'send', 0.25)
+        sink.histogram('UPS', 'response_size', 512)
+        sink.increment('UPS', 'failures.TrackingApiFailure')
+        assert sent == [('packagetrack.UPS.send', 250.0, 'ms'),
+            ('packagetrack.UPS.response_size', 512, 'h'),
+            ('packagetrack.UPS.failures.TrackingApiFailure', 1, 'c')]
+
+    def test_prometheus(self):
+        sink = PrometheusSink()
+        sink.timing('UPS', 'send', 0.2)
+        sink.timing('UPS', 'send', 20)
+        sink.histogram('UPS', 'response_size', 2000)
+        sink.increment('UPS', 'failures.TrackingApiFailure', 2)
+        dump = sink.dump()
+        assert '# TYPE packagetrack_send_seconds histogram' in dump
+        assert 'packagetrack_send_seconds_bucket{carrier="UPS",le="0.25"} 1' \
+            in dump
+        assert 'packagetrack_send_seconds_bucket{carrier="UPS",le="+Inf"} 2' \
+            in dump
+        assert 'packagetrack_send_seconds_count{carrier="UPS"} 2' in dump
+        assert 'packagetrack_response_size_bytes_bucket{carrier="UPS",' \
+            'le="4096"} 1' in dump
+        assert 'packagetrack_failures_total{carrier="UPS",' \
+            'type="TrackingApiFailure"} 2' in dump
+
+
+class TestCarrierMetrics(TestCase):
+
+    def setUp(self):
+        self.usps = USPSInterface(DictConfig({'USPS': {'userid': 'USER'}}))
+        self.usps._cfg_cache['http_session'] = FakeSession()
+        self.sink = self.usps.metrics = HistogramSink()
+
+    def test_track(self):
+        self.usps.track('EJ958083578US')
+        snapshot = self.sink.snapshot()
+        for name in ('track', 'build', 'send', 'parse', 'construct'):
+            assert snapshot[('USPS', name)]['count'] == 1
+        assert snapshot[('USPS', 'response_size')]['max'] == len(response)
+
+    def test_failures(self):
+        self.assertRaises(InvalidTrackingNumber, self.usps.track, 'nope')
+        results = dict(self.usps.track_batch(['EJ958083578US',
+            '9400100000000000000001']))
+        assert isinstance(results['9400100000000000000001'], Exception)
+        snapshot = self.sink.snapshot()
+        assert snapshot[('USPS', 'failures.InvalidTrackingNumber')] == 1
+        assert snapshot[('USPS', 'failures.TrackingApiFailure')] == 1
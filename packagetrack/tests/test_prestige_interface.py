@@ -0,0 +1,45 @@
+import json
+from unittest import TestCase
+
+from packagetrack.carriers.errors import TrackingApiFailure
+from packagetrack.carriers.prestige_interface import PrestigeInterface
+from packagetrack.configuration import NullConfig
+from packagetrack.data import TrackingInfo
+
+
+def make_event(code, desc, date, time):
+    return {
+        'EventCode': code,
+        'EventCodeDesc': desc,
+        'serverDate': date,
+        'serverTime': time,
+        'ELCity': 'PHOENIX ',
+        'ELState': 'AZ',
+        'SchdDateTime': '/Date(1338508800000)/',
+    }
+
+batch_response = json.dumps([
+    {'TrackingNumber': 'PS12345678', 'TrackingEventHistory': [
+        make_event('DL', 'Delivered', '06/01/2012', '10:15 AM'),
+        make_event('OD', 'Out for delivery', '06/01/2012', '07:15 AM'),
+    ]},
+    {'TrackingNumber': 'PS00000001', 'TrackingEventHistory': [
+        make_event('ERROR_NOTFOUND', 'Not found', '06/01/2012', '10:15 AM'),
+    ]},
+])
+
+
+class TestPrestigeInterface(TestCase):
+
+    def setUp(self):
+        self.prestige = PrestigeInterface(NullConfig())
+
+    def test_parse_batch_response(self):
+        results = dict(self.prestige._parse_batch_response(batch_response,
+            ['PS12345678', 'PS00000001', 'PS00000002']))
+        info = results['PS12345678']
+        assert isinstance(info, TrackingInfo)
+        assert info.is_delivered
+        assert len(info.events) == 2
+        assert isinstance(results['PS00000001'], TrackingApiFailure)
+        assert isinstance(results['PS00000002'], TrackingApiFailure)
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from packagetrack.carriers.errors import TrackingQuotaExceeded
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.ratelimit import RateLimiter, FileRateStore
+
+
+class FakeClock(object):
+
+    def __init__(self, now=1338508800.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiter(TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_limiter(self, **kwargs):
+        return RateLimiter(clock=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_rate(self):
+        limiter = self.make_limiter(rate=2, burst=2)
+        for _ in range(3):
+            limiter.acquire()
+        assert self.clock.slept == [0.5]
+        assert limiter.used_today == limiter.total == 3
+        assert limiter.remaining_today is None
+
+    def test_daily_quota(self):
+        limiter = self.make_limiter(daily_quota=2)
+        limiter.acquire()
+        limiter.acquire()
+        assert limiter.remaining_today == 0
+        self.assertRaises(TrackingQuotaExceeded, limiter.acquire)
+        self.clock.now += 86400
+        assert limiter.remaining_today == 2
+        limiter.acquire()
+        assert limiter.total == 3
+
+    def test_file_store(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'limits.json')
+            first = self.make_limiter(daily_quota=3, store=FileRateStore(path))
+            second = self.make_limiter(daily_quota=3, store=FileRateStore(path))
+            first.acquire()
+            second.acquire()
+            assert first.used_today == 2
+            assert second.remaining_today == 1
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_carrier_config(self):
+        usps = USPSInterface(DictConfig({'USPS': {'userid': 'USER',
+            'rate_limit': '5', 'daily_quota': '100'}}))
+        assert usps.rate_limiter.rate == 5.0
+        assert usps.rate_limiter.daily_quota == 100
+        assert usps.rate_limiter is usps.rate_limiter
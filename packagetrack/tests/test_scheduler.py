@@ -0,0 +1,111 @@
+from datetime import datetime
+from unittest import TestCase
+
+from packagetrack.carriers import BaseInterface, register_carrier
+from packagetrack.carriers.errors import TrackingNumberFailure
+from packagetrack.configuration import NullConfig
+from packagetrack.data import TrackingInfo
+from packagetrack.scheduler import Scheduler, ShipmentStore, PollingPolicy, \
+    ACTIVE, DELIVERED, FAILED
+
+
+class SchedInterface(BaseInterface):
+    SHORT_NAME = 'Sched'
+    CONFIG_NS = SHORT_NAME
+
+    def identify(self, tracking_number):
+        return tracking_number.startswith('SCHED')
+
+    @BaseInterface.require_valid_tracking_number
+    def track(self, tracking_number):
+        if tracking_number.endswith('X'):
+            raise TrackingNumberFailure(tracking_number)
+        info = TrackingInfo(tracking_number,
+            is_delivered=tracking_number.endswith('D'))
+        info.create_event(datetime(2012, 6, 1), 'NEWTON,IA', 'In transit')
+        return info
+
+
+class TestPollingPolicy(TestCase):
+
+    def setUp(self):
+        self.policy = PollingPolicy(interval=100, max_interval=1000,
+            near_delivery_window=86400, near_delivery_interval=10)
+        self.store = ShipmentStore()
+        self.store.add(['SCHED1'], now=0)
+        self.shipment = self.store.get('SCHED1')
+        self.now = 1338508800
+
+    def test_backoff(self):
+        info = TrackingInfo('SCHED1')
+        shipment = self.shipment._replace(interval=600)
+        assert self.policy.next_interval(shipment, info, True, self.now) == 100
+        assert self.policy.next_interval(shipment, info, False,
+            self.now) == 1000
+
+    def test_near_delivery(self):
+        soon = datetime.fromtimestamp(self.now + 3600)
+        info = TrackingInfo('SCHED1', delivery_date=soon)
+        assert self.policy.next_interval(self.shipment, info, True,
+            self.now) == 10
+
+    def test_past_due(self):
+        shipment = self.shipment._replace(interval=600)
+        late = datetime.fromtimestamp(self.now - 3600)
+        info = TrackingInfo('SCHED1', delivery_date=late)
+        assert self.policy.next_interval(shipment, info, False, self.now) == 10
+        # stuck long past the estimate, back off again
+        stuck = datetime.fromtimestamp(self.now - 3 * 86400)
+        info = TrackingInfo('SCHED1', delivery_date=stuck)
+        assert self.policy.next_interval(shipment, info, False,
+            self.now) == 1000
+
+    def test_stop(self):
+        assert self.policy.next_interval(self.shipment,
+            TrackingInfo('SCHED1', is_delivered=True), True, self.now) is None
+
+
+class TestScheduler(TestCase):
+
+    def setUp(self):
+        register_carrier(SchedInterface, NullConfig())
+        self.store = ShipmentStore()
+
+    def test_run_once(self):
+        self.store.add(['SCHED1', 'SCHED2D', 'SCHED3X', 'NOPE'], now=0)
+        scheduler = Scheduler(self.store,
+            PollingPolicy(interval=100, failure_interval=10))
+        assert len(scheduler.run_once(now=1000)) == 3
+        assert self.store.get('SCHED1').next_poll == 1100
+        assert self.store.get('SCHED2D').state == DELIVERED
+        assert self.store.get('SCHED3X').next_poll == 1010
+        assert self.store.get('NOPE').state == FAILED
+        assert scheduler.run_once(now=1001) == []
+
+        # nothing changed, so it backs off
+        scheduler.run_once(now=1100)
+        shipment = self.store.get('SCHED1')
+        assert shipment.state == ACTIVE and shipment.next_poll == 1300
+        assert shipment.polls == 2
+
+    def test_budget(self):
+        self.store.add(['SCHED%d' % i for i in range(5)], now=0)
+        scheduler = Scheduler(self.store, carrier_budgets={'Sched': 2})
+        assert len(scheduler.run_once(now=1000)) == 2
+        assert len(scheduler.run_once(now=1001)) == 0
+        assert len(scheduler.run_once(now=1000 + 3600)) == 2
+
+    def test_run_waits_for_budget(self):
+        self.store.add(['SCHED%dD' % i for i in range(5)], now=0)
+        scheduler = Scheduler(self.store, carrier_budgets={'Sched': 2})
+        clock = [1000.0]
+        sleeps = []
+        def sleep(seconds):
+            sleeps.append(seconds)
+            assert len(sleeps) < 10, sleeps
+            clock[0] += seconds
+        scheduler.run(idle_sleep=86400, sleep=sleep, clock=lambda: clock[0])
+        # the last three wait for the budget instead of spinning
+        assert sleeps == [3600, 3600], sleeps
+        assert all(self.store.get('SCHED%dD' % i).state == DELIVERED \
+            for i in range(5))
@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+from packagetrack.carriers.errors import TrackingApiFailure, \
+    TrackingNumberFailure
+from packagetrack.carriers.dhl_interface import DHLInterface
+from packagetrack.carriers.ups_interface import UPSInterface
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.data import TrackingInfo
+from packagetrack.testing import CarrierSimulator, CarrierProfile, \
+    NOT_FOUND, SAMPLE_TRACKING_NUMBERS
+
+
+class TestCarrierSimulator(TestCase):
+
+    def setUp(self):
+        self.simulator = CarrierSimulator(CarrierProfile(events=3),
+            profiles={
+                'USPS': CarrierProfile(events=5, not_found_rate=0.5),
+                'DHL': CarrierProfile(error_rate=1, error_statuses=(503,)),
+                'UPS': CarrierProfile(events=3, rate_limit=0.001, rate_burst=1),
+            }, seed=1)
+        self.simulator.start()
+        self.config = self.simulator.config({
+            'USPS': {'userid': 'USER'},
+            'DHL': {'http_retries': '0'},
+            'UPS': {'license_number': 'X', 'user_id': 'X', 'password': 'X',
+                'http_retries': '0'},
+        })
+
+    def tearDown(self):
+        self.simulator.stop()
+
+    def test_track(self):
+        usps = USPSInterface(self.config)
+        profile = self.simulator.profile('USPS')
+        numbers = ['EJ9580835%02dUS' % i for i in range(10)]
+        results = dict(usps.track_batch(numbers))
+        for tracking_number in numbers:
+            result = results[tracking_number]
+            if profile.state(tracking_number) == NOT_FOUND:
+                assert isinstance(result, TrackingNumberFailure)
+            else:
+                assert isinstance(result, TrackingInfo)
+                assert len(result.events) == 5
+                assert result.is_delivered
+        assert self.simulator.stats() == {'USPS': {'ok': 1}}
+
+    def test_errors(self):
+        dhl = DHLInterface(self.config)
+        self.assertRaises(TrackingApiFailure, dhl.track,
+            SAMPLE_TRACKING_NUMBERS['DHL'])
+        assert self.simulator.stats() == {'DHL': {'error': 1}}
+
+    def test_throttled(self):
+        ups = UPSInterface(self.config)
+        tracking_number = SAMPLE_TRACKING_NUMBERS['UPS']
+        assert len(ups.track(tracking_number).events) == 3
+        self.assertRaises(TrackingApiFailure, ups.track, tracking_number)
+        assert self.simulator.stats() == {'UPS': {'ok': 1, 'throttled': 1}}
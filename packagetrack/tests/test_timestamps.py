@@ -0,0 +1,61 @@
+from datetime import datetime
+from unittest import TestCase
+
+from packagetrack.carriers.timestamps import parse_ymd, parse_ymd_hms, \
+    parse_iso_date_time, parse_mdy, parse_month_day_year, parse_clock_time
+
+
+class TestTimestamps(TestCase):
+
+    def assertParsesLike(self, parse, fmt, strings, result=lambda d: d):
+        """{parse} agrees with strptime({fmt}) on {strings}, bad ones too"""
+        for s in strings:
+            try:
+                expected = result(datetime.strptime(s, fmt))
+            except ValueError:
+                self.assertRaises(ValueError, parse, s)
+            else:
+                self.assertEqual(parse(s), expected)
+
+    def test_dates(self):
+        self.assertParsesLike(parse_ymd, '%Y%m%d',
+            ['20120601', '20121231', '20121301', '2012061', 'x0120601', ''],
+            lambda d: d.date())
+        self.assertParsesLike(parse_mdy, '%m/%d/%Y',
+            ['06/01/2012', '6/1/2012', '13/01/2012', '06/01/12', '006/1/2012'],
+            lambda d: d.date())
+        self.assertParsesLike(parse_month_day_year, '%B %d, %Y',
+            ['June 1, 2012', 'june 01, 2012', 'DECEMBER 31, 2012',
+                'June  1, 2012', 'Juno 1, 2012', 'June 31, 2012', ''],
+            lambda d: d.date())
+
+    def test_clock_times(self):
+        self.assertParsesLike(parse_clock_time, '%I:%M %p',
+            ['8:10 am', '08:10 AM', '12:00 am', '12:30 pm', '11:59 PM',
+                '13:00 pm', '0:10 am', '8:1 am', '8:10', '012:00 pm'],
+            lambda d: d.time())
+        # memoized
+        assert parse_clock_time('8:10 am') is parse_clock_time('8:10 am')
+
+    def test_date_times(self):
+        # UPS parsed the date and the time separately
+        for date_string, time_string in [('20120601', '081500'),
+                ('20120601', '235960'), ('2012061', '081500'),
+                ('20120601', '81500'), ('201206011', '1500')]:
+            try:
+                expected = datetime.combine(
+                    datetime.strptime(date_string, '%Y%m%d').date(),
+                    datetime.strptime(time_string, '%H%M%S').time())
+            except ValueError:
+                self.assertRaises(ValueError, parse_ymd_hms, date_string,
+                    time_string)
+            else:
+                self.assertEqual(parse_ymd_hms(date_string, time_string),
+                    expected)
+        self.assertEqual(parse_ymd_hms('2012061', '081500'),
+            datetime(2012, 6, 1, 8, 15))
+        for date_string, time_string in [('2012-06-01', '08:15:00'),
+                ('2012-6-1', '8:15:00'), ('2012-06-01', '08:15')]:
+            self.assertParsesLike(lambda s: parse_iso_date_time(date_string,
+                time_string), '%Y-%m-%dT%H:%M:%S',
+                [date_string + 'T' + time_string])
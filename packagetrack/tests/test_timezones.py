@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from unittest import TestCase, skipIf
+
+from packagetrack.carriers import timezones
+from packagetrack.carriers.timezones import location_timezone, localize
+from packagetrack.carriers.dhl_interface import DHLInterface
+from packagetrack.carriers.ups_interface import UPSInterface
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.testing import ups_response, IN_TRANSIT
+
+dhl_response = '''<?xml version="1.0" encoding="UTF-8"?>
+<req:TrackingResponse xmlns:req="http://www.dhl.com">
+  <AWBInfo>
+    <AWBNumber>1234567890</AWBNumber>
+    <Status><ActionStatus>success</ActionStatus></Status>
+    <ShipmentInfo>
+      <ShipmentEvent>
+        <Date>2012-05-31</Date>
+        <Time>08:15:00</Time>
+        <ServiceEvent><Description>Shipment picked up</Description></ServiceEvent>
+        <ServiceArea><Description>CINCINNATI HUB - USA</Description></ServiceArea>
+      </ShipmentEvent>
+    </ShipmentInfo>
+  </AWBInfo>
+</req:TrackingResponse>'''
+
+usps_event = '''
+      <EventTime>%s</EventTime>
+      <EventDate>June 1, 2012</EventDate>
+      <Event>%s</Event>
+      <EventCity>%s</EventCity>
+      <EventState>%s</EventState>
+      <EventCountry/>'''
+
+def usps_response(*events):
+    # the latest event is the TrackSummary, the rest are TrackDetails
+    summary, details = events[-1], events[-2::-1]
+    return '<TrackResponse><TrackInfo ID="EJ958083578US">' + \
+        '<TrackSummary>%s</TrackSummary>' % (usps_event % summary) + \
+        ''.join('<TrackDetail>%s</TrackDetail>' % (usps_event % detail) \
+            for detail in details) + '</TrackInfo></TrackResponse>'
+
+
+@skipIf(timezones.pytz is None, 'pytz is not installed')
+class TestLocationTimezone(TestCase):
+
+    def assertZone(self, name, *location):
+        zone = location_timezone(*location)
+        assert zone is not None and zone.zone == name, (location, zone)
+
+    def test_states(self):
+        self.assertZone('America/Chicago', 'NEWTON', 'IA', 'US')
+        self.assertZone('America/Phoenix', 'PHOENIX ', 'AZ')
+        self.assertZone('America/Regina', 'REGINA', 'SK', 'CA')
+        self.assertZone('Australia/Perth', None, 'WA', 'AU')
+
+    def test_cities(self):
+        # in a different zone than the rest of the state
+        self.assertZone('America/Denver', 'El Paso', 'TX', 'US')
+        self.assertZone('America/New_York', 'KNOXVILLE', 'TN')
+        # hubs of countries with several zones, without a state
+        self.assertZone('America/New_York', 'CINCINNATI HUB', None, 'USA')
+        self.assertZone('America/Los_Angeles', 'LOS ANGELES', None, 'U.S.A.')
+
+    def test_countries(self):
+        self.assertZone('Europe/Berlin', 'LEIPZIG', None, 'GERMANY')
+        self.assertZone('Asia/Seoul', 'SEOUL', None, 'KOREA, REPUBLIC OF')
+        self.assertZone('Europe/London', None, None, 'GB')
+
+    def test_unknown(self):
+        assert location_timezone() is None
+        assert location_timezone('SOMEWHERE', None, 'USA') is None
+        assert location_timezone('SOMEWHERE', 'ZZ') is None
+        assert location_timezone(None, None, 'ATLANTIS') is None
+
+    def test_localize(self):
+        zone = location_timezone(None, 'NY', 'US')
+        start = datetime(2012, 3, 10, 0, 15)
+        for hours in range(0, 48 * 4):
+            timestamp = start + timedelta(minutes=15 * hours)
+            assert localize(timestamp, zone) == zone.localize(timestamp)
+            assert localize(timestamp, zone).utcoffset() == \
+                zone.localize(timestamp).utcoffset()
+
+
+@skipIf(timezones.pytz is None, 'pytz is not installed')
+class TestCarrierTimezones(TestCase):
+
+    def test_event_location(self):
+        dhl = DHLInterface(DictConfig({}))
+        event = dhl._parse_response(dhl_response, '1234567890').events[0]
+        assert event.timestamp.tzinfo.zone == 'America/New_York'
+        assert event.timestamp.utcoffset() == timedelta(hours=-4)
+
+    def test_unknown_place(self):
+        # a US city that isn't in the tables, without a state, is in the
+        # carrier's DEFAULT_TIMEZONE
+        dhl = DHLInterface(DictConfig({}))
+        for area in ('DES MOINES - US', 'TOLEDO - UNITED STATES', 'NOWHERE'):
+            response = dhl_response.replace('CINCINNATI HUB - USA', area)
+            event = dhl._parse_response(response, '1234567890').events[0]
+            assert event.timestamp.tzinfo.zone == 'UTC', area
+            assert event.timestamp.replace(tzinfo=None) == \
+                datetime(2012, 5, 31, 8, 15), area
+            assert event.timezone_guessed, area
+
+    def test_default_timezone(self):
+        unknown = dhl_response.replace('CINCINNATI HUB - USA', 'NOWHERE')
+        dhl = DHLInterface(DictConfig({'DHL': {
+            'default_timezone': 'Europe/Paris'}}))
+        event = dhl._parse_response(unknown, '1234567890').events[0]
+        assert event.timestamp.tzinfo.zone == 'Europe/Paris'
+        assert event.timezone_guessed
+
+    def test_partly_known(self):
+        # every timestamp is aware, so they can all be ordered
+        usps = USPSInterface(DictConfig({}))
+        info = usps._parse_response(usps_response(
+            ('9:00 am', 'Departed', 'NEWTON', 'IA'),
+            ('10:00 am', 'Arrived', 'SOMEWHERE', '')), 'EJ958083578US')
+        assert [e.timestamp.tzinfo.zone for e in info.events] == [
+            'America/Chicago', 'America/Chicago']
+        assert [e.get('timezone_guessed') for e in info.events] == [
+            None, True]
+        assert info.status == 'Arrived'
+
+    def test_track_since_unknown_place(self):
+        # a new event from an unknown place mustn't change how the earlier
+        # ones compare, or it's dropped as already seen
+        usps = USPSInterface(DictConfig({}))
+        known = ('9:00 am', 'Departed', 'NEWTON', 'IA')
+        usps._send_request = lambda tn: usps_response(known)
+        events, fingerprint = usps.track_since('EJ958083578US')
+        assert [e.detail for e in events] == ['Departed']
+
+        usps._send_request = lambda tn: usps_response(known,
+            ('10:00 am', 'Arrived', 'SOMEWHERE', ''))
+        events, new_fingerprint = usps.track_since('EJ958083578US',
+            fingerprint)
+        assert [e.detail for e in events] == ['Arrived']
+        assert new_fingerprint.split('/')[1] > fingerprint.split('/')[1]
+
+    def test_delivery_date(self):
+        # the estimate is in the ShipTo address's zone, or the default one
+        # like events from unknown places
+        ups = UPSInterface(DictConfig({}))
+        response = ups_response('1Z58R4770350889570', state=IN_TRANSIT)
+        info = ups._parse_response(response, '1Z58R4770350889570')
+        assert info.delivery_date.tzinfo.zone == 'America/Phoenix'
+        info = ups._parse_response(response.replace('PHOENIX', 'SOMEWHERE'
+            ).replace('<StateProvinceCode>AZ', '<StateProvinceCode>'),
+            '1Z58R4770350889570')
+        assert info.delivery_date.tzinfo.zone == 'America/Chicago'
+        assert info.delivery_date.replace(tzinfo=None) == \
+            datetime(2012, 6, 5, 18)
@@ -1,7 +1,9 @@
-from datetime import datetime, date
+import random
+from collections import MutableMapping
+from datetime import datetime, date, timedelta
 from unittest import TestCase
 
-from packagetrack.data import TrackingInfo
+from packagetrack.data import TrackingInfo, TrackingEvent
 
 
 class TestTrackingInfo(TestCase):
@@ -17,4 +19,84 @@ class TestTrackingInfo(TestCase):
         assert repr(today) in s
         assert 'IN TRANSIT' in s
 
-        
+
+class TestTrackingEvents(TestCase):
+
+    def setUp(self):
+        start = datetime(2012, 6, 1)
+        self.events = [TrackingEvent(start + timedelta(hours=i % 7), 'LOC', str(i))
+            for i in range(30)]
+        random.Random(1).shuffle(self.events)
+
+    def expected(self):
+        return sorted(self.events, key=lambda e: e.timestamp)
+
+    def test_add_event(self):
+        info = TrackingInfo('1Z')
+        for event in self.events:
+            info.add_event(event)
+        # events with equal timestamps stay in the order they were added
+        assert info.events == self.expected()
+        assert [e.detail for e in info.events] == \
+            [e.detail for e in self.expected()]
+        assert info.last_update == datetime(2012, 6, 1, 6)
+
+    def test_add_events(self):
+        info = TrackingInfo('1Z')
+        info.add_events(self.events[:10])
+        info.add_events(iter(self.events[10:]))
+        assert [e.detail for e in info.events] == \
+            [e.detail for e in self.expected()]
+        assert info.status == info.events[-1].detail
+
+
+class TestTrackingRecords(TestCase):
+
+    def setUp(self):
+        self.info = TrackingInfo('1Z', service='Ground')
+        self.info.create_event(datetime(2012, 6, 1), 'NEWTON,IA', 'Delivered',
+            code='DL')
+
+    def test_attributes(self):
+        event = self.info.events[0]
+        assert not hasattr(event, '__dict__')
+        assert event['detail'] == event.detail == 'Delivered'
+        assert event.code == event.extras['code'] == 'DL'
+        assert self.info.service == self.info['service']
+        self.assertRaises(AttributeError, getattr, event, 'missing')
+        self.assertRaises(KeyError, event.__getitem__, 'missing')
+
+    def test_dict_view(self):
+        event = self.info.events[0]
+        assert dict(event.items()) == {'timestamp': datetime(2012, 6, 1),
+            'location': 'NEWTON,IA', 'detail': 'Delivered', 'code': 'DL'}
+        assert 'code' in event and 'location' in event
+        event.update(code='X', extra=1)
+        assert event.extras == {'code': 'X', 'extra': 1}
+        del event['extra']
+        assert 'extra' not in event
+
+    def test_mutable_mapping(self):
+        event = self.info.events[0]
+        assert isinstance(event, MutableMapping)
+        assert event.setdefault('extra', 1) == 1
+        assert event.setdefault('extra', 2) == 1
+        assert event.pop('extra') == 1
+        assert event.pop('extra', None) is None
+        self.assertRaises(KeyError, event.pop, 'detail')
+        self.assertRaises(KeyError, event.pop, 'detail', None)
+        other = event.copy()
+        assert other == event
+        other['code'] = 'X'
+        assert event.code == 'DL'
+        assert event.popitem() == ('code', 'DL')
+        self.assertRaises(KeyError, event.popitem)
+        other.clear()
+        assert sorted(other) == ['detail', 'location', 'timestamp']
+
+    def test_pickle(self):
+        import cPickle as pickle
+        for protocol in (0, pickle.HIGHEST_PROTOCOL):
+            info = pickle.loads(pickle.dumps(self.info, protocol))
+            assert info == self.info
+            assert info.events[0].code == 'DL'
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from packagetrack.carriers.ups_interface import UPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.xml_dict import xml_to_dict
+
+
+def make_config(password):
+    return DictConfig({'UPS': {
+        'license_number': 'ABCDEF0123456789',
+        'user_id': 'user',
+        'password': password,
+    }})
+
+
+class TestUPSInterface(TestCase):
+
+    def setUp(self):
+        self.ups = UPSInterface(make_config('p<&>'))
+
+    def test_build_track_request(self):
+        req = xml_to_dict(self.ups._build_track_request('123456789012345678'))
+        assert req['TrackRequest']['TrackingNumber'] == '123456789012345678'
+        assert req['TrackRequest']['TrackingOption'] == '03'
+        req = xml_to_dict(self.ups._build_track_request('1Z58R4770350889570'))
+        assert 'TrackingOption' not in req['TrackRequest']
+
+    def test_access_request_cached(self):
+        access = xml_to_dict(self.ups._build_access_request())
+        assert access['AccessRequest']['Password'] == 'p<&>'
+        assert self.ups._build_access_request() is \
+            self.ups._build_access_request()
+        self.ups.config = make_config('changed')
+        access = xml_to_dict(self.ups._build_access_request())
+        assert access['AccessRequest']['Password'] == 'changed'
@@ -0,0 +1,101 @@
+from unittest import TestCase
+
+from packagetrack.carriers.errors import TrackingApiFailure, \
+    TrackingNumberFailure
+from packagetrack.carriers.usps_interface import USPSInterface
+from packagetrack.configuration import DictConfig
+from packagetrack.data import TrackingInfo
+
+batch_response = '''<?xml version="1.0"?>
+<TrackResponse>
+  <TrackInfo ID="EJ958083578US">
+    <TrackSummary>
+      <EventTime>8:10 am</EventTime>
+      <EventDate>June 1, 2012</EventDate>
+      <Event>Delivered</Event>
+      <EventCity>NEWTON</EventCity>
+      <EventState>IA</EventState>
+      <EventZIPCode>50208</EventZIPCode>
+      <EventCountry/>
+    </TrackSummary>
+    <TrackDetail>
+      <EventTime>6:00 am</EventTime>
+      <EventDate>May 29, 2012</EventDate>
+      <Event>Acceptance</Event>
+      <EventCity>DES MOINES</EventCity>
+      <EventState>IA</EventState>
+      <EventCountry/>
+    </TrackDetail>
+  </TrackInfo>
+  <TrackInfo ID="9400100000000000000001">
+    <Error>
+      <Number>-2147219302</Number>
+      <Description>No record of that item</Description>
+    </Error>
+  </TrackInfo>
+</TrackResponse>'''
+
+single_response = batch_response[:batch_response.index(
+    '  <TrackInfo ID="94001')] + '</TrackResponse>'
+
+
+class TestUSPSInterface(TestCase):
+
+    def setUp(self):
+        self.usps = USPSInterface(DictConfig({'USPS': {'userid': 'USER'}}))
+
+    def test_build_batch_request(self):
+        req = self.usps._build_batch_request(['EJ958083578US',
+            '9400100000000000000001'])
+        assert req.count('<TrackID ') == 2
+        assert 'USERID="USER"' in req
+
+    def test_parse_batch_response(self):
+        results = dict(self.usps._parse_batch_response(batch_response,
+            ['EJ958083578US', '9400100000000000000001',
+                '9400100000000000000002']))
+        info = results['EJ958083578US']
+        assert isinstance(info, TrackingInfo)
+        assert info.is_delivered
+        assert len(info.events) == 2
+        assert isinstance(results['9400100000000000000001'],
+            TrackingNumberFailure)
+        assert isinstance(results['9400100000000000000002'],
+            TrackingApiFailure)
+
+    def test_not_xml(self):
+        # an HTML error page served with a 200
+        page = '<html><body><h1>Service Unavailable</h1></body>'
+        self.assertRaises(TrackingApiFailure, self.usps._parse_response,
+            page, 'EJ958083578US')
+        self.assertRaises(TrackingApiFailure,
+            self.usps._parse_batch_response, page, ['EJ958083578US'])
+
+    def test_track_batch(self):
+        self.usps._send_batch_request = lambda tns: batch_response
+        results = dict(self.usps.track_batch(['EJ958083578US',
+            '9400100000000000000001']))
+        assert results['EJ958083578US'].carrier == 'USPS'
+        assert isinstance(results['9400100000000000000001'],
+            TrackingNumberFailure)
+
+    def test_track_since(self):
+        tn = 'EJ958083578US'
+        self.usps._send_request = lambda tn: single_response
+        events, fingerprint = self.usps.track_since(tn)
+        assert len(events) == 2
+
+        # unchanged, so the response isn't parsed
+        parse = self.usps._parse_response
+        self.usps._parse_response = None
+        assert self.usps.track_since(tn, fingerprint) == ([], fingerprint)
+
+        self.usps._parse_response = parse
+        self.usps._send_request = lambda tn: single_response.replace(
+            '<EventDate>June 1, 2012', '<EventDate>June 2, 2012')
+        events, new_fingerprint = self.usps.track_since(tn, fingerprint)
+        assert [e.detail for e in events] == ['Delivered']
+        assert new_fingerprint != fingerprint
+
+        events, _ = self.usps.track_since(tn, events[0].timestamp)
+        assert events == []
@@ -1,3 +1,4 @@
+from StringIO import StringIO
 from unittest import TestCase
 
 from packagetrack import xml_dict
@@ -30,3 +31,27 @@ class TestXMLDict(TestCase):
     def test_attribute(self):
         xml = xml_dict.dict_to_xml(test_dict, {'xml:lang': 'en-US'})
         assert '<foo xml:lang="en-US">' in xml
+
+    def test_stream(self):
+        assert xml_dict.xml_stream_to_dict(StringIO(test_xml)) == test_dict
+
+    def test_repeated_elements(self):
+        xml = '<a><b>1</b><b>2</b><c><d/></c><c>3</c></a>'
+        assert xml_dict.xml_to_dict(xml) == \
+            {'a': {'b': ['1', '2'], 'c': [{'d': ''}, '3']}}
+
+    def test_element_dicts(self):
+        xml = '<r><T ID="1"><a>x</a></T><T ID="2"/></r>'
+        assert xml_dict.xml_to_element_dicts(xml, 'T') == \
+            [({'ID': '1'}, {'a': 'x'}), ({'ID': '2'}, {})]
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, xml_dict.xml_to_dict, '<a>')
+
+    def test_fragment(self):
+        xml = '<r><Act><ActLoc>x</ActLoc></Act><Act id="2">y</Act></r>'
+        assert xml_dict.xml_fragment(xml, 'Act') == \
+            '<Act><ActLoc>x</ActLoc></Act>'
+        assert xml_dict.xml_fragment(xml, 'Act', last=True) == \
+            '<Act id="2">y</Act>'
+        assert xml_dict.xml_fragment(xml, 'Missing') is None
@@ -20,8 +20,8 @@ Will be transformed to and from this dict:
              'goodbye': 'no'}}
 """
 
-from xml.dom.minidom import getDOMImplementation, parseString
-from xml.parsers.expat import ExpatError
+from xml.dom.minidom import getDOMImplementation
+from xml.parsers.expat import ExpatError, ParserCreate
 
 
 def dict_to_doc(d, attrs=None):
@@ -51,53 +51,106 @@ def dict_to_xml(d, attrs=None):
 
 def xml_to_dict(s):
     """Convert XML data to a Python dict"""
+    builder = _DictBuilder()
+    _parse(builder, s)
+    return builder.result
+
+def xml_stream_to_dict(stream):
+    """Convert XML read from the file-like {stream} to a Python dict, without
+    holding the whole document in memory
+    """
+    builder = _DictBuilder()
+    _parse(builder, stream, from_stream=True)
+    return builder.result
+
+def xml_to_element_dicts(s, tag_name):
+    """Convert every {tag_name} element in the XML data to a dict, returns a
+    list of (attributes, dict) tuples in document order. Useful for responses
+    that repeat an element per item and identify it by an attribute, which
+    xml_to_dict() drops.
+    """
+    builder = _DictBuilder(capture=tag_name)
+    _parse(builder, s)
+    return builder.captured
+
+def xml_fragment(s, tag_name, last=False):
+    """Return the raw text of the first (or {last}) {tag_name} element in the
+    XML data without parsing it, or None if there isn't one. Meant for cheaply
+    checking whether part of a response changed, not for reading values.
+    """
+    close = '</%s>' % tag_name
+    end = s.rfind(close) if last else s.find(close)
+    if end < 0:
+        return None
+    start = end
+    while True:
+        start = s.rfind('<' + tag_name, 0, start)
+        if start < 0:
+            return None
+        if s[start + len(tag_name) + 1] in '> \t\r\n':
+            return s[start:end + len(close)]
+
+def _parse(builder, source, from_stream=False):
+    parser = ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = builder.start
+    parser.EndElementHandler = builder.end
+    parser.CharacterDataHandler = builder.data
+    parser.StartCdataSectionHandler = builder.other
+    parser.CommentHandler = builder.other
+    parser.ProcessingInstructionHandler = builder.other
     try:
-        data = nodeToDict(parseString(s))
+        if from_stream:
+            parser.ParseFile(source)
+        else:
+            parser.Parse(source, True)
     except ExpatError as err:
         raise ValueError(err)
-    return data
 
-class NotTextNodeError: pass
-
-def getTextFromNode(node):
-    """
-    scans through all children of node and gathers the
-    text. if node has non-text child-nodes, then
-    NotTextNodeError is raised.
+class _DictBuilder(object):
+    """Builds a dict straight from expat's callbacks, the same one the old
+    minidom based parsing made: an element with only text becomes its
+    text, any other element a dict of its child elements, and repeated child
+    elements a list.
     """
-    t = ""
-    for n in node.childNodes:
-        if n.nodeType == n.TEXT_NODE:
-            t += n.nodeValue
-        else:
-            raise NotTextNodeError
-    return t
-
-def nodeToDict(node):
-    """Convert a minidom node to dict"""
-    dic = {}
-    for n in node.childNodes:
-        if n.nodeType != n.ELEMENT_NODE:
-            continue
-
-        # we've seen this element before, so we make it a list
-        if n.nodeName in dic and type(dic[n.nodeName]) != list:
-            dic[n.nodeName] = [dic[n.nodeName]]
-
-        try:
-            text = getTextFromNode(n)
-        except NotTextNodeError:
-            if n.nodeName in dic and type(dic[n.nodeName]) == list:
-                dic[n.nodeName].append(nodeToDict(n))
-            else:
-                dic.update({n.nodeName:nodeToDict(n)})
-            continue
 
-        # text node
-        if n.nodeName in dic and type(dic[n.nodeName]) == list:
-            dic[n.nodeName].append(text)
+    def __init__(self, capture=None):
+        # each open element is [name, children, text chunks, only_text]
+        self._stack = [[None, {}, [], False]]
+        self._capture = capture
+        self._capture_slots = []
+        self.captured = []
+
+    @property
+    def result(self):
+        return self._stack[0][1]
+
+    def start(self, name, attrs):
+        self._stack[-1][3] = False
+        self._stack.append([name, {}, [], True])
+        if name == self._capture:
+            self._capture_slots.append(len(self.captured))
+            self.captured.append((attrs, None))
+
+    def end(self, name):
+        name, children, text, only_text = self._stack.pop()
+        if name == self._capture:
+            slot = self._capture_slots.pop()
+            self.captured[slot] = (self.captured[slot][0], children)
+        value = ''.join(text) if only_text else children
+        siblings = self._stack[-1][1]
+        if name in siblings:
+            if type(siblings[name]) != list:
+                siblings[name] = [siblings[name]]
+            siblings[name].append(value)
         else:
-            dic.update({n.nodeName:text})
+            siblings[name] = value
 
-    return dic
+    def data(self, text):
+        self._stack[-1][2].append(text)
 
+    def other(self, *pargs):
+        """CDATA sections, comments and processing instructions aren't text
+        nodes to minidom, so they turn their element into a dict
+        """
+        self._stack[-1][3] = False